@@ -6,6 +6,8 @@ import csv
 import pandas as pd
 import numpy as np
 
+from geo_keys import county_keys_by_name
+
 # Functions
 ## This function is used to test the data_frames used throughout this program
 def test (data_frame):
@@ -26,28 +28,6 @@ def save_data_frame(df, dir, file_name):
     print("File saved as ", new_file_name)
     print(df)
 
-# This function will find matches between two data frames (df), compare items in the specified columns for each df, and fill them into df2 that is returned.
-def match_insert(df1, df2, map_col_name1, map_col_name2, col_name_match, new_col_name):
-    # Copy data frames
-    df1_copy = df1.copy()
-    df2_copy = df2.copy()
-
-    # Create new column in df2
-    df2_copy[new_col_name] = 0
-
-    # Create a mapping from map_col_name1 to map_col_name2
-    fipsMap = dict(zip(df1_copy[map_col_name1], df1_copy[map_col_name2]))
-
-    # Map the new_col_name values based on col_name_match using the map
-    df2_copy[new_col_name] = df2_copy[col_name_match].map(fipsMap)
-
-    # If data type is numeric, replace NaN's with 0 and convert values to integer (removes decimals)
-    if pd.api.types.is_numeric_dtype(df2_copy[new_col_name]):
-        df2_copy[new_col_name] = df2_copy[new_col_name].fillna(0).astype(int)
-
-    print(df2_copy)
-    return df2_copy
-
 # Main
 ## File inputs
 df_roster = pd.read_csv("./Deliverables/Data/06-18-2024_Ohio_Medical_Marijuana_Dispensary_Roster_COOs.csv")
@@ -61,7 +41,8 @@ df_dispensary_county_qty.columns = ['County', 'Count']
 save_data_frame(df_dispensary_county_qty, "./Deliverables/Data","ohio-county-dispensary-qty")
 
 # match fips code with county in df_roster
-df_new_roster = match_insert(df_county_fips, df_roster, "label", "fips", "Public Address - County", "Fips")
+# Integer county keys (see geo_keys); 0 where the county name is unknown, as before
+df_new_roster = df_roster.assign(Fips=county_keys_by_name(df_roster['Public Address - County']).fillna(0).astype('int64'))
 save_data_frame(df_new_roster,"./Deliverables/Data","roster-fips.csv")
 
 ## File Checks
@@ -0,0 +1,49 @@
+# Dispensary and pharmacy accessibility (2SFCA / enhanced 2SFCA) per census tract and ZCTA, for several
+# catchment radii and distance decay functions in one run (see accessibility.py). Values are facilities
+# per 1,000 residents.
+
+# Imports
+import os
+import time
+from pathlib import Path
+
+from accessibility import accessibility, tract_units, zcta_units
+from checkpoint import atomic_write_csv
+from nearest_facility import FacilityIndex, load_block_group_centroids
+from typed_storage import load_records
+
+# Variables
+DATA_DIR = Path(__file__).parent.parent / 'Data'
+
+# Facility set name -> (roster, id column)
+facility_sets = {
+    'Dispensary': (DATA_DIR / 'Dispensary-Roster-Geo-ZCTA-Votes.csv', 'License: Number'),
+    'Pharmacy': (DATA_DIR / 'Primary-Dataset-2(pharmacy-official).csv', 'LicenseNumber'),
+}
+
+radii = [5, 10, 20]  # Catchment radii in miles
+decays = ['binary', 'gaussian', 'e2sfca']
+workers = os.cpu_count() or 1
+
+outputs = {
+    'tract': DATA_DIR / 'tract-accessibility.csv',
+    'zcta': DATA_DIR / 'zcta-accessibility.csv',
+}
+
+# MAIN
+if __name__ == "__main__":
+    start = time.perf_counter()
+    facilities = {name: FacilityIndex.from_frame(load_records(path, [id_column, 'latitude', 'longitude']), id_column)
+                  for name, (path, id_column) in facility_sets.items()}
+
+    for level, output_file in outputs.items():
+        try:
+            units = tract_units(load_block_group_centroids()) if level == 'tract' else zcta_units()
+        except FileNotFoundError as e:
+            print(f"Skipping {level}: {e}")
+            continue
+        result = accessibility(units, facilities, radii, decays, workers=workers)
+        atomic_write_csv(result, output_file)
+        print(f"Wrote {len(result)} {level} rows to {output_file}")
+
+    print(f"Done in {time.perf_counter() - start:.1f}s")
@@ -0,0 +1,151 @@
+# Two-step floating catchment area (2SFCA) accessibility.
+# Step 1 gives every facility a supply-to-demand ratio: its supply over the (distance weighted) population
+# within its catchment. Step 2 sums, for every population unit, the ratios of the facilities within reach.
+# The unit x facility pairs are found once with a radius query at the largest catchment (see
+# nearest_facility.FacilityIndex.within) and kept as sparse coordinates; each radius / decay combination
+# then only reweights them and runs two sparse matrix-vector products.
+# ZCTA locations: https://www2.census.gov/geo/docs/maps-data/data/gazetteer/2020_Gazetteer/2020_Gaz_zcta_national.zip (save under Data/Geo)
+
+# Imports
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from acs_loader import acs_wide, load_acs
+from geo_keys import format_keys, parent_keys, parse_keys
+from geo_utils import DATA_DIR, GEO_DIR
+from nearest_facility import FacilityIndex
+
+# Variables
+ZCTA_GAZETTEER_FILE = GEO_DIR / '2020_Gaz_zcta_national.zip'
+INSURANCE_FILE = DATA_DIR / 'ZCTA' / 'ACSST5Y2023-health-Insurance-coverage-zcta.csv'
+
+PER_POPULATION = 1000  # Accessibility is reported as supply per this many residents
+
+# Distance decay functions of x = distance / catchment radius (0 <= x <= 1)
+_GAUSSIAN_EDGE = np.exp(-0.5)
+DECAYS: Dict[str, Callable[[np.ndarray], np.ndarray]] = {
+    # Classic 2SFCA: everything inside the catchment counts fully
+    'binary': lambda x: np.ones_like(x),
+    'linear': lambda x: 1 - x,
+    # Gaussian 2SFCA (Dai 2010): 1 at the facility, 0 at the catchment edge
+    'gaussian': lambda x: (np.exp(-0.5 * x ** 2) - _GAUSSIAN_EDGE) / (1 - _GAUSSIAN_EDGE),
+    # Enhanced 2SFCA (Luo & Qi 2009): three travel zones weighted 1.00 / 0.68 / 0.22
+    'e2sfca': lambda x: np.select([x < 1 / 3, x < 2 / 3], [1.0, 0.68], 0.22),
+}
+
+# Functions
+def tract_units(centroids: pd.DataFrame) -> pd.DataFrame:
+    """
+    Tract population units from block group centroids (nearest_facility.load_block_group_centroids).
+
+    Returns:
+        pd.DataFrame: 'GEOID' (11-digit tract), population-weighted 'latitude'/'longitude' and 'population'
+    """
+    bg = centroids.assign(
+        tract_key=parent_keys(parse_keys(centroids['GEOID'], 'block_group'), 'block_group', 'tract'),
+        population=centroids['population'].astype('float64').fillna(0),
+    )
+    weight = bg['population'].where(bg['population'] > 0, 1e-9)  # Unpopulated tracts keep a plain mean
+    bg = bg.assign(lat_w=bg['latitude'] * weight, lon_w=bg['longitude'] * weight, weight=weight)
+    sums = bg.groupby('tract_key', sort=True)[['lat_w', 'lon_w', 'weight', 'population']].sum()
+    return pd.DataFrame({
+        'GEOID': format_keys(sums.index.to_series(), 'tract').to_numpy(),
+        'latitude': (sums['lat_w'] / sums['weight']).to_numpy(),
+        'longitude': (sums['lon_w'] / sums['weight']).to_numpy(),
+        'population': sums['population'].to_numpy(),
+    })
+
+
+def zcta_units(acs_path: Path = INSURANCE_FILE, gazetteer: Path = ZCTA_GAZETTEER_FILE) -> pd.DataFrame:
+    """
+    ZCTA population units: ACS TotalPop (as in insurance-match.py) at the Gazetteer internal points.
+
+    Returns:
+        pd.DataFrame: 'GEOID' (ZCTA5), 'latitude', 'longitude' and 'population'
+    """
+    if not Path(gazetteer).exists():
+        raise FileNotFoundError(f"ZCTA gazetteer file '{gazetteer}' not found")
+    gaz = pd.read_csv(gazetteer, sep='\t', dtype=str)
+    gaz.columns = gaz.columns.str.strip()
+    gaz = gaz.set_index('GEOID')
+
+    population = acs_wide(load_acs(acs_path), {'TotalPop': ("Civilian noninstitutionalized population", "Total")})
+    units = pd.DataFrame({'GEOID': population.index, 'population': population['TotalPop'].to_numpy()})
+    units['latitude'] = pd.to_numeric(units['GEOID'].map(gaz['INTPTLAT']), errors='coerce')
+    units['longitude'] = pd.to_numeric(units['GEOID'].map(gaz['INTPTLONG']), errors='coerce')
+
+    missing = units['latitude'].isna().sum()
+    if missing:
+        print(f"No gazetteer location for {missing} of {len(units)} ZCTAs")
+    return units[['GEOID', 'latitude', 'longitude', 'population']]
+
+
+def two_step_fca(pairs: Tuple[np.ndarray, np.ndarray, np.ndarray], population: np.ndarray, supply: np.ndarray,
+                 radius: float, decay: str = 'binary') -> np.ndarray:
+    """
+    2SFCA index for one catchment radius and decay function.
+
+    Args:
+        pairs (Tuple): (unit positions, facility positions, miles) within at least radius (FacilityIndex.within)
+        population (np.ndarray): Demand per unit
+        supply (np.ndarray): Supply per facility (1 for a plain facility count)
+        radius (float): Catchment radius in miles
+        decay (str): Key of DECAYS
+
+    Returns:
+        np.ndarray: Accessibility (supply per resident) for each unit, 0 where nothing is in reach
+    """
+    rows, cols, miles = pairs
+    keep = miles <= radius
+    weights = DECAYS[decay](miles[keep] / radius)
+    W = sparse.csr_matrix((weights, (rows[keep], cols[keep])), shape=(len(population), len(supply)))
+
+    # Step 1: facility supply / weighted population in its catchment
+    demand = W.T @ population
+    ratio = np.divide(supply, demand, out=np.zeros(len(supply)), where=demand > 0)
+    # Step 2: weighted sum of the ratios in reach of each unit
+    return W @ ratio
+
+
+def accessibility(units: pd.DataFrame, facilities: Dict[str, FacilityIndex], radii: Iterable[float],
+                  decays: Iterable[str] = ('binary',), supply: Optional[Dict[str, pd.Series]] = None,
+                  per: int = PER_POPULATION, workers: int = 1) -> pd.DataFrame:
+    """
+    2SFCA indices for several facility sets, catchment radii and decay functions in one run.
+
+    Args:
+        units (pd.DataFrame): 'GEOID', 'latitude', 'longitude' and 'population' (tract_units, zcta_units)
+        facilities (Dict[str, FacilityIndex]): Facility set name -> index
+        radii (Iterable[float]): Catchment radii in miles
+        decays (Iterable[str]): Keys of DECAYS
+        supply (Dict[str, pd.Series]): Optional supply per facility id for a set (default 1 per facility)
+        per (int): Report supply per this many residents
+        workers (int): Processes for the radius queries
+
+    Returns:
+        pd.DataFrame: 'GEOID', 'population' and one '<set>_<decay>_<radius>mi' column per combination
+    """
+    radii = sorted(radii)
+    decays = list(decays)
+    unknown = set(decays) - set(DECAYS)
+    if unknown:
+        raise ValueError(f"Unknown decay function(s) {', '.join(sorted(unknown))} (use {', '.join(DECAYS)})")
+
+    population = units['population'].astype('float64').fillna(0).to_numpy()
+    out = units[['GEOID', 'population']].copy()
+    for name, index in facilities.items():
+        pairs = index.within(units['latitude'], units['longitude'], radii[-1], workers=workers)
+        if supply and name in supply:
+            capacity = pd.Series(index.ids).map(supply[name]).astype('float64').fillna(0).to_numpy()
+        else:
+            capacity = np.ones(len(index))
+        print(f"{name}: {len(pairs[0])} unit-facility pairs within {radii[-1]:g} miles")
+
+        for radius in radii:
+            for decay in decays:
+                out[f"{name}_{decay}_{radius:g}mi"] = (two_step_fca(pairs, population, capacity, radius, decay) * per).round(6)
+    return out
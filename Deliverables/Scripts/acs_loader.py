@@ -0,0 +1,127 @@
+# Loader for data.census.gov ACS exports at the ZCTA level (Data/ZCTA).
+# Those exports are "wide": one row per table line and one column per "ZCTA5 NNNNN!!<group>!!<measure>".
+# This module reshapes any of them into a typed long table and builds ZCTA5-indexed wide tables from it,
+# so every enrichment is a single merge instead of a row scan.
+
+# Imports
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from geo_keys import parse_keys
+
+# Variables
+## "ZCTA5 43001!!Households!!Estimate", "ZCTA5 43001!!Estimate", "ZCTA5 43001!!Percent Insured!!Margin of Error", ...
+COLUMN_PATTERN = r'^ZCTA5 (?P<ZCTA5>\d{5})!!(?:(?P<group>.+)!!)?(?P<measure>Estimate|Margin of Error|Percent Margin of Error|Percent)$'
+
+## Placeholder values used by the Census Bureau for unavailable estimates
+MISSING_VALUES = ['(X)', '-', 'N', '**', '***', '*****', 'null', '']
+
+# Functions
+def clean_numeric(values: pd.Series) -> pd.Series:
+    """
+    Convert ACS-formatted strings ("84,107", "$99,622.00 ", "2.6%", "250,000+", "±1,024") to floats in bulk.
+
+    Args:
+        values (pd.Series): Raw values
+
+    Returns:
+        pd.Series: float64 values, NaN for placeholders such as "(X)" or "-"
+    """
+    # Clean each distinct string once; ACS tables repeat the same values a lot
+    codes, uniques = pd.factorize(values)
+    uniques = pd.Series(uniques, dtype='string').str.strip()
+    uniques = uniques.mask(uniques.isin(MISSING_VALUES))
+    uniques = uniques.str.replace(r'[$,%+±\s]', '', regex=True)
+    numbers = pd.to_numeric(uniques, errors='coerce').to_numpy(dtype='float64', na_value=np.nan)
+    result = np.where(codes >= 0, numbers[codes] if len(numbers) else np.nan, np.nan)
+    return pd.Series(result, index=values.index, dtype='float64')
+
+
+def load_acs(path: Path) -> pd.DataFrame:
+    """
+    Load an ACS ZCTA export into a long table.
+
+    Args:
+        path (Path): Path to the exported CSV
+
+    Returns:
+        pd.DataFrame: Columns 'ZCTA5' (5-digit string), 'line' (row number in the export), 'label',
+            'group' (empty when the export has none), 'measure' and float 'value'
+    """
+    raw = pd.read_csv(path, dtype=str, encoding='utf-8-sig')
+    label_column = raw.columns[0]
+
+    # Parse every column header once
+    headers = pd.Series(raw.columns[1:]).str.extract(COLUMN_PATTERN)
+    keep = headers['ZCTA5'].notna().to_numpy()
+    if not keep.any():
+        raise ValueError(f"No 'ZCTA5 NNNNN!!...' columns found in {path}")
+    headers = headers[keep].fillna({'group': ''})
+    data_columns = raw.columns[1:][keep]
+
+    # One row per (line, column) cell, built with numpy repeat/tile instead of melting row by row
+    n_lines, n_columns = len(raw), len(data_columns)
+    labels = raw[label_column].astype('string').str.replace('\xa0', ' ').str.strip()
+    long = pd.DataFrame({
+        'ZCTA5': np.tile(headers['ZCTA5'].to_numpy(), n_lines),
+        'line': np.repeat(np.arange(n_lines), n_columns),
+        'label': np.repeat(labels.to_numpy(), n_columns),
+        'group': np.tile(headers['group'].to_numpy(), n_lines),
+        'measure': np.tile(headers['measure'].to_numpy(), n_lines),
+        'value': clean_numeric(pd.Series(raw[data_columns].to_numpy().ravel())),
+    })
+    for col in ['ZCTA5', 'label', 'group', 'measure']:
+        long[col] = long[col].astype('category')
+    return long
+
+
+def acs_wide(long: pd.DataFrame, columns: Dict[str, Tuple[str, Optional[str]]], measure: str = 'Estimate') -> pd.DataFrame:
+    """
+    Pick table lines out of a long ACS table as ZCTA5-indexed columns.
+
+    Args:
+        long (pd.DataFrame): Output of load_acs
+        columns (dict): Output column name -> (line label, group). The group may be None when the
+            export has no groups; when a label repeats, its first line is used.
+        measure (str): 'Estimate', 'Margin of Error', 'Percent' or 'Percent Margin of Error'
+
+    Returns:
+        pd.DataFrame: One row per ZCTA5 (index), one float column per requested line
+    """
+    selected = long[long['measure'] == measure]
+    wide = pd.DataFrame(index=pd.Index(selected['ZCTA5'].cat.categories, name='ZCTA5'))
+
+    for name, (label, group) in columns.items():
+        rows = selected[(selected['label'] == label) & (selected['group'] == (group or ''))]
+        if rows.empty:
+            print(f"Warning: '{label}' ({group or 'no group'}) not found in ACS table")
+            wide[name] = np.nan
+            continue
+        rows = rows[rows['line'] == rows['line'].min()]
+        wide[name] = pd.Series(rows['value'].to_numpy(), index=rows['ZCTA5'].astype(str).to_numpy())
+    return wide
+
+
+def merge_acs(df: pd.DataFrame, wide: pd.DataFrame, zcta_column: str = 'ZCTA5') -> pd.DataFrame:
+    """
+    Attach ACS columns to a roster in one vectorized merge on integer ZCTA keys (see geo_keys).
+
+    Existing columns with the same names are replaced.
+
+    Args:
+        df (pd.DataFrame): Roster with a ZCTA column
+        wide (pd.DataFrame): Output of acs_wide
+        zcta_column (str): Name of the roster's ZCTA column
+
+    Returns:
+        pd.DataFrame: Copy of df with the ACS columns added
+    """
+    out = df.drop(columns=[c for c in wide.columns if c in df.columns])
+    right = wide.set_axis(parse_keys(wide.index.to_series(), 'zcta').to_numpy())
+    merged = out.assign(_zcta_key=parse_keys(out[zcta_column], 'zcta')).merge(
+        right, how='left', left_on='_zcta_key', right_index=True, sort=False)
+    merged.index = df.index
+    return merged.drop(columns='_zcta_key')
@@ -4,10 +4,13 @@
 import os
 from dotenv import find_dotenv, load_dotenv
 import pandas as pd
-import requests
-import time
 from pathlib import Path
 
+from api_lookups import geocode_addresses
+from batch_geocoder import geocode_roster
+from checkpoint import atomic_write_csv
+from geocode_cache import GeocodeCache
+
 # Functions 
 ## This function will attempt to find a file within a specified directory and subdirectories. Then it will return the absolute path of that file.
 def Find_File(fileName, desiredDirectory):
@@ -41,7 +44,7 @@ load_dotenv(env_path) # Load env variables
 GOOGLE_API_KEY = os.environ['GEO_API_KEY'] # API_KEY
 
 state = "OH"
-apiUrl = "https://maps.googleapis.com/maps/api/geocode/json" # Gmaps Geocoding API URL
+batch_mode = True # Census batch geocoder first (also fills ZCTA5 and the tract/block codes), Google only for unmatched addresses
 
 ## Read in csv
 df =  pd.read_csv(filePath)
@@ -54,28 +57,20 @@ print(df)
 df["Geo"] = None
 
 ## Get geloc data
-### Loop through each address and request geo location data from google api (json format)
-for idx, row in df.iterrows():
-    address = row['Full Address']
-    params = {
-        "address": address,
-        "key": GOOGLE_API_KEY
-    }
-    ### data from api
-    response = requests.get(apiUrl, params=params)
-    data = response.json()
-    # print(data)
-
-    ### If status is ok then put the data in the appropriate index
-    if data['status'] == 'OK':
-        location = data['results'][0]['geometry']['location']
-        df.at[idx, 'Geo'] = (location['lat'], location['lng'])
-        print(df.at[idx, "Geo"])
+### Addresses already in the local geocode cache are not sent again; results are committed to it in batches,
+### so an interrupted run picks up where it stopped
+with GeocodeCache() as cache:
+    if batch_mode:
+        ### Upload the addresses to the Census batch geocoder in parallel chunks; unmatched ones go to google
+        geo = geocode_roster(df['Full Address'], GOOGLE_API_KEY, cache=cache)
+        for col in ['Geo', 'latitude', 'longitude', 'ZCTA5', 'Census_Tract_Code', 'Block_Group_FIPS', 'Block_FIPS', 'Geocoder']:
+            df[col] = geo[col]
     else:
-        print(f"Geocoding failed for: {address} | Status: {data['status']}")
-
-    time.sleep(.2)  # Wait for 1/5 of a second before next iteration
+        ### Request geo location data for every address concurrently from google api (rate limited, retried on 429/5xx)
+        df["Geo"] = geocode_addresses(df['Full Address'], GOOGLE_API_KEY, cache=cache)
+    cache.report()
+print(df["Geo"])
 
-## Save df to new csv
-df.to_csv(outFile, index=False)
+## Save df to new csv (written to a temporary file first, then renamed into place)
+atomic_write_csv(df, outFile)
 
@@ -0,0 +1,196 @@
+# Vectorized US address parser and normalizer.
+# Splits one-line addresses into street number, directionals, street name, suffix, unit, city, state and ZIP+4,
+# and builds the normalized form (USPS suffix/directional abbreviations, lowercase) used as the cache and dedupe key.
+# Works on whole pandas Series: every regex runs once per distinct address, not once per row.
+
+# Imports
+import re
+
+import pandas as pd
+
+# Variables
+## USPS street suffix abbreviations (Publication 28, Appendix C1) for the suffixes found in Ohio addresses
+STREET_SUFFIXES = {
+    'ALLEY': 'ALY', 'ALLY': 'ALY', 'AVENUE': 'AVE', 'AV': 'AVE', 'AVEN': 'AVE', 'AVENU': 'AVE', 'AVN': 'AVE', 'AVNUE': 'AVE',
+    'BOULEVARD': 'BLVD', 'BOUL': 'BLVD', 'BOULV': 'BLVD', 'BYPASS': 'BYP', 'CENTER': 'CTR', 'CENTRE': 'CTR', 'CENTR': 'CTR',
+    'CNTER': 'CTR', 'CNTR': 'CTR', 'CEN': 'CTR', 'CIRCLE': 'CIR', 'CIRC': 'CIR', 'CIRCL': 'CIR', 'CRCL': 'CIR', 'CRCLE': 'CIR',
+    'COMMONS': 'CMNS', 'COURT': 'CT', 'COVE': 'CV', 'CREEK': 'CRK', 'CROSSING': 'XING', 'CRSSNG': 'XING', 'DRIVE': 'DR',
+    'DRIV': 'DR', 'DRV': 'DR', 'ESTATES': 'ESTS', 'EXPRESSWAY': 'EXPY', 'EXPRESS': 'EXPY', 'EXPW': 'EXPY', 'FREEWAY': 'FWY',
+    'GARDENS': 'GDNS', 'GREEN': 'GRN', 'GROVE': 'GRV', 'HARBOR': 'HBR', 'HEIGHTS': 'HTS', 'HIGHWAY': 'HWY', 'HIGHWY': 'HWY',
+    'HIWAY': 'HWY', 'HIWY': 'HWY', 'HWAY': 'HWY', 'HILL': 'HL', 'ISLAND': 'IS', 'JUNCTION': 'JCT', 'LAKE': 'LK',
+    'LANDING': 'LNDG', 'LANE': 'LN', 'LOOP': 'LOOP', 'MALL': 'MALL', 'MANOR': 'MNR', 'MEADOWS': 'MDWS', 'MOUNT': 'MT',
+    'MOUNTAIN': 'MTN', 'PARK': 'PARK', 'PARKWAY': 'PKWY', 'PARKWY': 'PKWY', 'PKWAY': 'PKWY', 'PKY': 'PKWY', 'PASS': 'PASS',
+    'PATH': 'PATH', 'PIKE': 'PIKE', 'PINES': 'PNES', 'PLACE': 'PL', 'PLAZA': 'PLZ', 'PLZA': 'PLZ', 'POINT': 'PT',
+    'RIDGE': 'RDG', 'ROAD': 'RD', 'ROUTE': 'RTE', 'ROW': 'ROW', 'RUN': 'RUN', 'SPRINGS': 'SPGS', 'SQUARE': 'SQ',
+    'STATION': 'STA', 'STREET': 'ST', 'STR': 'ST', 'STRT': 'ST', 'SUMMIT': 'SMT', 'TERRACE': 'TER', 'TRACE': 'TRCE',
+    'TRAIL': 'TRL', 'TURNPIKE': 'TPKE', 'VALLEY': 'VLY', 'VIEW': 'VW', 'VILLAGE': 'VLG', 'VISTA': 'VIS', 'WALK': 'WALK',
+    'WAY': 'WAY',
+}
+DIRECTIONALS = {
+    'NORTH': 'N', 'SOUTH': 'S', 'EAST': 'E', 'WEST': 'W',
+    'NORTHEAST': 'NE', 'NORTHWEST': 'NW', 'SOUTHEAST': 'SE', 'SOUTHWEST': 'SW',
+}
+UNIT_DESIGNATORS = {
+    'APARTMENT': 'APT', 'SUITE': 'STE', 'BUILDING': 'BLDG', 'BLDG': 'BLDG', 'FLOOR': 'FL', 'ROOM': 'RM', 'UNIT': 'UNIT',
+    'DEPARTMENT': 'DEPT', 'LOT': 'LOT', 'SPACE': 'SPC', 'TRAILER': 'TRLR', 'APT': 'APT', 'STE': 'STE', 'FL': 'FL',
+    'RM': 'RM', 'DEPT': 'DEPT', 'SPC': 'SPC', 'TRLR': 'TRLR',
+}
+
+UNIT_ABBREVIATIONS = {k: v for k, v in UNIT_DESIGNATORS.items() if k != v}
+
+def _alternation(words):
+    # Longest first so e.g. NORTHEAST wins over NORTH
+    return '|'.join(sorted(set(words), key=len, reverse=True))
+
+SUFFIX_RE = _alternation(list(STREET_SUFFIXES) + list(STREET_SUFFIXES.values()))
+DIR_RE = _alternation(list(DIRECTIONALS) + list(DIRECTIONALS.values()))
+UNIT_RE = rf'(?:(?:{_alternation(UNIT_DESIGNATORS)})\s*#?\s*[A-Z0-9-]+|#\s*[A-Z0-9-]+)'
+
+UNIT_PATTERN = re.compile(rf'^({_alternation(UNIT_ABBREVIATIONS)})\b')
+
+## "<head>, OH 43015-2027" where head is "street, city" or "street city"
+TAIL_PATTERN = rf'^(?P<head>.*?)[,\s]+(?P<State>[A-Z]{{2}})\s+(?P<Zip5>\d{{5}})(?:\s*-?\s*(?P<Zip4>\d{{4}}))?$'
+## Without a comma, the city starts after the last street suffix (and optional unit)
+HEAD_NO_COMMA_PATTERN = rf'^(?P<street>.*\b(?:{SUFFIX_RE}|{DIR_RE})(?:\s+{UNIT_RE})?)\s+(?P<City>[A-Z][A-Z .\'-]*)$'
+STREET_PATTERN = (
+    rf'^(?P<Street_Number>\d+[A-Z]?(?:-\d+[A-Z]?)?)\s+'
+    rf'(?:(?P<Street_Predirection>{DIR_RE})\s+(?=\S+\s+\S))?'
+    rf'(?P<Street_Name>.+?)'
+    rf'(?:\s+(?P<Street_Suffix>{SUFFIX_RE}))?'
+    rf'(?:\s+(?P<Street_Postdirection>{DIR_RE}))?'
+    rf'(?:\s+(?P<Unit>{UNIT_RE}))?$'
+)
+
+ADDRESS_COLUMNS = ['Street', 'Street_Number', 'Street_Predirection', 'Street_Name', 'Street_Suffix',
+                   'Street_Postdirection', 'Unit', 'City', 'State', 'Zip5', 'Zip4']
+
+# Functions
+def _on_unique(values: pd.Series, func) -> pd.DataFrame:
+    """Apply a Series -> DataFrame/Series function to the distinct values only and broadcast back."""
+    codes, uniques = pd.factorize(values)
+    result = func(pd.Series(uniques, dtype='string'))
+    taken = result.iloc[codes] if len(uniques) else result.iloc[:0]
+    taken.index = values.index
+    # factorize marks missing values with -1; blank them instead of taking the last unique
+    taken[codes == -1] = pd.NA
+    return taken
+
+
+def clean_text(values: pd.Series) -> pd.Series:
+    """Uppercase, drop periods and country suffixes, split hyphenated names, collapse whitespace."""
+    values = values.astype('string').str.upper()
+    values = values.str.replace(r',?\s*(?:USA|UNITED STATES)\s*$', '', regex=True)
+    values = values.str.replace(r'[.]', '', regex=True)
+    values = values.str.replace(r'(?<=[A-Z])-(?=[A-Z])', ' ', regex=True)
+    values = values.str.replace(r'\s*,\s*', ', ', regex=True)
+    return values.str.replace(r'\s+', ' ', regex=True).str.strip()
+
+
+def _join(*columns: pd.Series) -> pd.Series:
+    """Space-join string columns, skipping missing parts."""
+    joined = columns[0].str.cat(list(columns[1:]), sep=' ', na_rep='')
+    return joined.str.replace(r'\s+', ' ', regex=True).str.strip()
+
+
+def _parse_unique(addresses: pd.Series) -> pd.DataFrame:
+    addresses = clean_text(addresses)
+    tail = addresses.str.extract(TAIL_PATTERN)
+
+    # Split the head into street and city: on the last comma if there is one, else after the street suffix
+    head = tail['head']
+    has_comma = head.str.contains(',', regex=False).fillna(False)
+    split_comma = head.str.rsplit(', ', n=1, expand=True).reindex(columns=[0, 1])
+    split_suffix = head.str.extract(HEAD_NO_COMMA_PATTERN)
+
+    street = split_comma[0].where(has_comma, split_suffix['street'])
+    city = split_comma[1].where(has_comma, split_suffix['City'])
+
+    parts = parse_streets(street)
+    parts['City'] = city.str.strip()
+    parts['State'] = tail['State']
+    parts['Zip5'] = tail['Zip5']
+    parts['Zip4'] = tail['Zip4']
+    return parts[ADDRESS_COLUMNS]
+
+
+def parse_streets(streets: pd.Series) -> pd.DataFrame:
+    """
+    Split street lines ("241 W MADISON STREET STE 2") into their components.
+
+    Directionals, the street suffix and the unit designator are converted to their USPS
+    abbreviations; the street name itself is left as written (so "RIVER VALLEY BLVD" keeps VALLEY).
+
+    Args:
+        streets (pd.Series): Street lines without city/state/ZIP
+
+    Returns:
+        pd.DataFrame: 'Street' (cleaned input) plus number, predirection, name, suffix, postdirection and unit
+    """
+    streets = clean_text(streets).str.replace(',', '', regex=False)
+    parts = streets.str.extract(STREET_PATTERN)
+    for col in ['Street_Predirection', 'Street_Postdirection']:
+        parts[col] = parts[col].replace(DIRECTIONALS)
+    parts['Street_Suffix'] = parts['Street_Suffix'].replace(STREET_SUFFIXES)
+    parts['Unit'] = parts['Unit'].str.replace(UNIT_PATTERN, lambda m: UNIT_ABBREVIATIONS[m.group(1)], regex=True)
+    parts.insert(0, 'Street', streets)
+    return parts
+
+
+def _normalized_street(parts: pd.DataFrame) -> pd.Series:
+    """Lowercase normalized street from parsed components, the cleaned text where parsing failed."""
+    street = _join(parts['Street_Number'], parts['Street_Predirection'], parts['Street_Name'],
+                   parts['Street_Suffix'], parts['Street_Postdirection'], parts['Unit'])
+    return street.where(parts['Street_Number'].notna(), parts['Street']).str.lower()
+
+
+def parse_addresses(addresses: pd.Series) -> pd.DataFrame:
+    """
+    Parse one-line US addresses into components.
+
+    Accepts "Street, City, ST 12345", "Street, City, ST 12345-6789, USA" and the roster's
+    comma-less "Street City, ST 12345" form. Addresses that cannot be split have every
+    component missing instead of raising.
+
+    Args:
+        addresses (pd.Series): One-line addresses
+
+    Returns:
+        pd.DataFrame: Columns ADDRESS_COLUMNS, same index as addresses
+    """
+    return _on_unique(addresses, _parse_unique)
+
+
+def normalize_street(streets: pd.Series) -> pd.Series:
+    """
+    Normalize street lines, e.g. "1015 N. COURT STREET" -> "1015 n court st".
+
+    Only the trailing suffix is abbreviated; suffix words inside the name (the COURT above) are kept,
+    which is why a few hand-normalized rows in address-comparison.csv ("1015 n ct st") differ.
+
+    Args:
+        streets (pd.Series): Street lines
+
+    Returns:
+        pd.Series: Lowercase streets with USPS abbreviations
+    """
+    return _on_unique(streets, lambda s: _normalized_street(parse_streets(s)))
+
+
+def normalize_addresses(addresses: pd.Series) -> pd.Series:
+    """
+    Build the normalized key for full addresses: "<street> <city> <st> <zip5>", lowercase and abbreviated.
+
+    Addresses that cannot be parsed fall back to their cleaned text so they still get a stable key.
+
+    Args:
+        addresses (pd.Series): One-line addresses
+
+    Returns:
+        pd.Series: Normalized address keys
+    """
+    def _normalize(unique):
+        parts = _parse_unique(unique)
+        key = (_normalized_street(parts) + ' ' + parts['City'] + ' ' + parts['State'] + ' ' + parts['Zip5']).str.lower()
+        return key.fillna(clean_text(unique).str.replace(',', '', regex=False).str.lower())
+
+    return _on_unique(addresses, _normalize)
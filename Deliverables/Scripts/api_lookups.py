@@ -0,0 +1,261 @@
+# Concurrent lookups against the Google Geocoding, Census geocoder and FCC area APIs.
+# Each function takes whole columns and returns results in input order.
+
+# Imports
+import asyncio
+import csv
+import io
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import aiohttp
+import pandas as pd
+
+from address_parser import normalize_addresses, parse_addresses
+from async_client import PROVIDERS, AsyncAPIClient, ProviderConfig, fetch_all
+from geocode_cache import (ADDRESS_COORDS, ADDRESS_GEOGRAPHIES, COORDS_BLOCK, COORDS_ZCTA, NO_MATCH, GeocodeCache,
+                           cached_lookup, coords_key)
+
+# Variables
+## Vintage and TTL recorded with cached results per provider
+GOOGLE_VINTAGE = 'current'
+GOOGLE_TTL = 30 * 24 * 3600                            # Google geocodes are refreshed after 30 days
+CENSUS_VINTAGE = 'Public_AR_Current/Current_Current'   # benchmark/vintage sent with every request
+FCC_VINTAGE = '2020'                                   # censusYear sent with every request
+
+## Census batch geocoder
+CENSUS_BATCH_SIZE = 1000   # Addresses per upload; smaller uploads run in parallel and return sooner
+CENSUS_BATCH_MAX = 10000   # Largest upload the batch geocoder accepts
+CENSUS_BATCH_COLUMNS = ['id', 'input_address', 'match', 'match_type', 'matched_address', 'coordinates',
+                        'tiger_line_id', 'side', 'state', 'county', 'tract', 'block']
+
+# Functions
+def parse_google_geocode(data) -> Optional[Tuple[float, float]]:
+    """Extract (lat, lon) from a Google Geocoding response."""
+    if data and data.get('status') == 'OK':
+        location = data['results'][0]['geometry']['location']
+        return (location['lat'], location['lng'])
+    return None
+
+
+def parse_census_zcta(data) -> Optional[str]:
+    """Extract the ZCTA5 code from a Census geographies/coordinates response."""
+    try:
+        return data["result"]["geographies"]["2020 Census ZIP Code Tabulation Areas"][0]["ZCTA5"]
+    except (KeyError, IndexError, TypeError):
+        return None
+
+
+def parse_census_batch(text) -> Dict[str, Optional[Tuple[float, float, Optional[str]]]]:
+    """
+    Parse a Census addressbatch (geographies) CSV response.
+
+    Matched rows carry "lon,lat" coordinates and the state, county, tract and block codes;
+    No_Match and Tie rows only echo the id and input address.
+
+    Returns:
+        dict: id -> (lat, lon, 15-digit block FIPS), None for unmatched rows
+    """
+    results = {}
+    for row in csv.reader(io.StringIO(text if isinstance(text, str) else '')):
+        if not row:
+            continue
+        record = dict(zip(CENSUS_BATCH_COLUMNS, row))
+        if record.get('match') != 'Match' or not record.get('coordinates'):
+            results[record['id']] = None
+            continue
+        lon, lat = (float(value) for value in record['coordinates'].split(','))
+        block = ''.join(record.get(col, '') for col in ['state', 'county', 'tract', 'block'])
+        results[record['id']] = (lat, lon, block if len(block) == 15 else None)
+    return results
+
+
+def parse_fcc_block(data) -> Optional[str]:
+    """Extract the 15-digit block FIPS from an FCC census/area response."""
+    try:
+        return data['results'][0]['block_fips'] or None
+    except (KeyError, IndexError, TypeError):
+        return None
+
+
+def _or_no_match(value, answered: bool, no_match):
+    """The parsed value, no_match when the provider answered without one, None when the request failed."""
+    return value if value is not None or not answered else no_match
+
+
+async def geocode_addresses_async(addresses: Sequence[str], api_key: str,
+                                  provider: ProviderConfig = PROVIDERS['google_geocode'],
+                                  no_match=None) -> List[Optional[Tuple[float, float]]]:
+    """
+    Geocode addresses concurrently with the Google Geocoding API.
+
+    Args:
+        addresses (Sequence[str]): Full one-line addresses
+        api_key (str): Google API key
+        provider (ProviderConfig): Provider settings (override the url to use a stub server)
+        no_match: Returned for addresses Google answered with ZERO_RESULTS (the cache passes NO_MATCH)
+
+    Returns:
+        List: (lat, lon) tuple per address, None where geocoding failed
+    """
+    responses = await fetch_all(provider, ({"address": address, "key": api_key} for address in addresses))
+    results = []
+    for address, data in zip(addresses, responses):
+        coords = parse_google_geocode(data)
+        if coords is None:
+            status = data.get('status') if data else 'NO RESPONSE'
+            print(f"Geocoding failed for: {address} | Status: {status}")
+            if status == 'ZERO_RESULTS':
+                coords = no_match
+        results.append(coords)
+    return results
+
+
+async def census_zcta_async(latitudes: Sequence[float], longitudes: Sequence[float],
+                            provider: ProviderConfig = PROVIDERS['census'], no_match=None) -> List[Optional[str]]:
+    """
+    Look up ZCTA5 codes concurrently with the Census geocoder.
+
+    Args:
+        latitudes (Sequence[float]): Point latitudes
+        longitudes (Sequence[float]): Point longitudes
+        provider (ProviderConfig): Provider settings (override the url to use a stub server)
+        no_match: Returned for points the geocoder answered without a ZCTA (the cache passes NO_MATCH)
+
+    Returns:
+        List: ZCTA5 string per point, None where the lookup failed
+    """
+    params = ({
+        "x": lon,
+        "y": lat,
+        "benchmark": "Public_AR_Current",   # current census geography
+        "vintage": "Current_Current",       # current vintage
+        "format": "json",
+        "layers": "2"                       # Data Layer (2 for ZCTA)
+    } for lat, lon in zip(latitudes, longitudes))
+    return [_or_no_match(parse_census_zcta(data), isinstance(data, dict) and 'result' in data, no_match)
+            for data in await fetch_all(provider, params)]
+
+
+async def fcc_block_fips_async(latitudes: Sequence[float], longitudes: Sequence[float],
+                               provider: ProviderConfig = PROVIDERS['fcc'], no_match=None) -> List[Optional[str]]:
+    """
+    Look up 15-digit block FIPS codes concurrently with the FCC area API.
+
+    Args:
+        latitudes (Sequence[float]): Point latitudes
+        longitudes (Sequence[float]): Point longitudes
+        provider (ProviderConfig): Provider settings (override the url to use a stub server)
+        no_match: Returned for points the API answered without a block (the cache passes NO_MATCH)
+
+    Returns:
+        List: Block FIPS string per point, None where the lookup failed
+    """
+    params = ({
+        'lat': lat,
+        'lon': lon,
+        'censusYear': '2020',  # Use 2020 census data
+        'format': 'json'
+    } for lat, lon in zip(latitudes, longitudes))
+    return [_or_no_match(parse_fcc_block(data), isinstance(data, dict) and 'results' in data, no_match)
+            for data in await fetch_all(provider, params)]
+
+
+def _census_batch_form(rows: Sequence[Tuple[str, str, str, str, str]]) -> Callable[[], aiohttp.FormData]:
+    """Build the multipart upload (id, street, city, state, zip rows) for one batch."""
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    content = buffer.getvalue()
+
+    def build():
+        form = aiohttp.FormData()
+        form.add_field('addressFile', content, filename='addresses.csv', content_type='text/csv')
+        form.add_field('benchmark', 'Public_AR_Current')
+        form.add_field('vintage', 'Current_Current')
+        return form
+    return build
+
+
+async def census_batch_geocode_async(streets: Sequence[str], cities: Sequence[str], states: Sequence[str],
+                                     zips: Sequence[str], provider: ProviderConfig = PROVIDERS['census_batch'],
+                                     batch_size: int = CENSUS_BATCH_SIZE, no_match=None) -> List[Optional[Tuple[float, float, Optional[str]]]]:
+    """
+    Geocode addresses with the Census batch geocoder, uploading the batches in parallel.
+
+    Args:
+        streets, cities, states, zips (Sequence[str]): Address components
+        provider (ProviderConfig): Provider settings (override the url to use a stub server)
+        batch_size (int): Addresses per upload (at most CENSUS_BATCH_MAX)
+        no_match: Returned for No_Match/Tie rows (the cache passes NO_MATCH); rows of failed uploads are None
+
+    Returns:
+        List: (lat, lon, block FIPS) per address, None where the geocoder found no match
+    """
+    batch_size = min(batch_size, CENSUS_BATCH_MAX)
+    rows = [(str(i), *(('' if pd.isna(value) else str(value)) for value in address))
+            for i, address in enumerate(zip(streets, cities, states, zips))]
+    batches = [rows[start:start + batch_size] for start in range(0, len(rows), batch_size)]
+
+    async with AsyncAPIClient(provider) as client:
+        responses = await asyncio.gather(*(client.request_json('POST', data=_census_batch_form(batch)) for batch in batches))
+        print(f"[{provider.name}] {len(batches)} batches, {client.requests_sent} requests sent, {client.retries} retries")
+
+    results = {}
+    for response in responses:
+        results.update(parse_census_batch(response))
+    return [_or_no_match(results.get(row[0]), row[0] in results, no_match) for row in rows]
+
+
+## Blocking wrappers for the scripts, consulting the cache (when given) before the network.
+## The default provider is looked up in PROVIDERS at call time, so a stub server can be swapped in there.
+def _split_coords_keys(keys):
+    pairs = [key.split(',') for key in keys]
+    return [float(lat) for lat, _ in pairs], [float(lon) for _, lon in pairs]
+
+
+def geocode_addresses(addresses, api_key, provider: Optional[ProviderConfig] = None, cache: Optional[GeocodeCache] = None):
+    provider = provider or PROVIDERS['google_geocode']
+    addresses = list(addresses)
+    # Normalized addresses are the cache key, so formatting variants of one address share an entry
+    keys = normalize_addresses(pd.Series(addresses, dtype='string')).fillna('').tolist()
+    originals = dict(zip(keys, addresses))
+    fetch = lambda missing: asyncio.run(geocode_addresses_async([originals[key] for key in missing], api_key, provider, NO_MATCH))
+    # Missing or unparseable addresses have no key; they are neither requested nor cached
+    valid = [key for key in keys if key]
+    results = cached_lookup(cache, ADDRESS_COORDS, valid, provider.name, GOOGLE_VINTAGE, fetch, ttl=GOOGLE_TTL)
+    found = dict(zip(valid, results))
+    return [tuple(found[key]) if found.get(key) is not None else None for key in keys]
+
+
+def census_zcta(latitudes, longitudes, provider: Optional[ProviderConfig] = None, cache: Optional[GeocodeCache] = None):
+    provider = provider or PROVIDERS['census']
+    fetch = lambda keys: asyncio.run(census_zcta_async(*_split_coords_keys(keys), provider, NO_MATCH))
+    keys = [coords_key(lat, lon) for lat, lon in zip(latitudes, longitudes)]
+    return cached_lookup(cache, COORDS_ZCTA, keys, provider.name, CENSUS_VINTAGE, fetch)
+
+
+def fcc_block_fips(latitudes, longitudes, provider: Optional[ProviderConfig] = None, cache: Optional[GeocodeCache] = None):
+    provider = provider or PROVIDERS['fcc']
+    fetch = lambda keys: asyncio.run(fcc_block_fips_async(*_split_coords_keys(keys), provider, NO_MATCH))
+    keys = [coords_key(lat, lon) for lat, lon in zip(latitudes, longitudes)]
+    return cached_lookup(cache, COORDS_BLOCK, keys, provider.name, FCC_VINTAGE, fetch)
+
+
+def census_batch_geocode(addresses, provider: Optional[ProviderConfig] = None, cache: Optional[GeocodeCache] = None,
+                         batch_size: int = CENSUS_BATCH_SIZE):
+    provider = provider or PROVIDERS['census_batch']
+    addresses = pd.Series(list(addresses), dtype='string')
+    parsed = parse_addresses(addresses)
+    keys = normalize_addresses(addresses).fillna('').tolist()
+    components = dict(zip(keys, parsed[['Street', 'City', 'State', 'Zip5']].itertuples(index=False, name=None)))
+
+    def fetch(missing):
+        streets, cities, states, zips = zip(*(components[key] for key in missing))
+        return asyncio.run(census_batch_geocode_async(streets, cities, states, zips, provider, batch_size, NO_MATCH))
+
+    # Addresses that could not be split into components are left to the caller's fallback;
+    # the cache is committed after every round of parallel uploads
+    valid = [key for key in keys if key]
+    results = cached_lookup(cache, ADDRESS_GEOGRAPHIES, valid, provider.name, CENSUS_VINTAGE, fetch,
+                            batch_size=batch_size * provider.max_connections)
+    found = dict(zip(valid, results))
+    return [tuple(found[key]) if found.get(key) is not None else None for key in keys]
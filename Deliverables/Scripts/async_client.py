@@ -0,0 +1,181 @@
+# Shared asyncio HTTP client for the geocoding, ZCTA, tract and Places lookups.
+# Replaces serial requests calls + fixed time.sleep pauses with a keep-alive connection pool,
+# a per-provider token bucket, and jittered exponential backoff on 429/5xx responses.
+
+# Imports
+import asyncio
+import random
+import time
+from dataclasses import dataclass, replace
+from typing import Any, Dict, Iterable, List, Optional
+
+import aiohttp
+
+# Classes
+@dataclass(frozen=True)
+class ProviderConfig:
+    """Connection and rate limit settings for one API provider."""
+    name: str
+    url: str
+    rate_per_second: float          # Sustained request rate allowed by the provider
+    burst: int = 1                  # Requests that may be sent back to back before the rate applies
+    max_connections: int = 10       # Size of the keep-alive connection pool
+    max_retries: int = 5            # Retries after the first attempt on 429/5xx/connection errors
+    backoff_base: float = 0.5       # First backoff window in seconds, doubled per attempt
+    backoff_cap: float = 30.0       # Longest single backoff window in seconds
+    timeout: float = 30.0           # Total timeout for one request in seconds
+
+    def with_url(self, url: str) -> 'ProviderConfig':
+        """Return a copy pointing at another endpoint (e.g. a local stub server)."""
+        return replace(self, url=url)
+
+
+# Provider presets, rates kept under each service's published limits
+PROVIDERS = {
+    'google_geocode': ProviderConfig('google_geocode', "https://maps.googleapis.com/maps/api/geocode/json",
+                                     rate_per_second=40, burst=10, max_connections=20),
+    'google_places': ProviderConfig('google_places', "https://places.googleapis.com/v1/places:searchText",
+                                    rate_per_second=10, burst=5, max_connections=10),
+    'census': ProviderConfig('census', "https://geocoding.geo.census.gov/geocoder/geographies/coordinates",
+                             rate_per_second=10, burst=5, max_connections=10),
+    'census_batch': ProviderConfig('census_batch', "https://geocoding.geo.census.gov/geocoder/geographies/addressbatch",
+                                   rate_per_second=1, burst=4, max_connections=4, timeout=900.0),
+    'fcc': ProviderConfig('fcc', "https://geo.fcc.gov/api/census/area",
+                          rate_per_second=10, burst=5, max_connections=10),
+}
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """Asyncio token bucket: refills rate_per_second tokens per second up to burst."""
+
+    def __init__(self, rate_per_second: float, burst: int = 1):
+        self.rate = rate_per_second
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        """Wait until a token is available and take it."""
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class AsyncAPIClient:
+    """
+    Rate limited JSON client for one provider.
+
+    Usage:
+        async with AsyncAPIClient(PROVIDERS['fcc']) as client:
+            data = await client.get_json(params={...})
+    """
+
+    def __init__(self, provider: ProviderConfig):
+        self.provider = provider
+        self.bucket = TokenBucket(provider.rate_per_second, provider.burst)
+        self.session: Optional[aiohttp.ClientSession] = None
+        self.requests_sent = 0
+        self.retries = 0
+
+    async def __aenter__(self):
+        connector = aiohttp.TCPConnector(limit=self.provider.max_connections, keepalive_timeout=60)
+        timeout = aiohttp.ClientTimeout(total=self.provider.timeout)
+        self.session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.session.close()
+        self.session = None
+
+    def backoff_delay(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """
+        Delay before retry number attempt (0-based): full jitter over an exponentially growing window.
+
+        A Retry-After header in seconds, when sent, is used as the lower bound.
+        """
+        window = min(self.provider.backoff_cap, self.provider.backoff_base * 2 ** attempt)
+        delay = random.uniform(0, window)
+        if retry_after:
+            try:
+                delay = max(delay, float(retry_after))
+            except ValueError:
+                pass
+        return delay
+
+    async def request_json(self, method: str = 'GET', params: Optional[Dict[str, Any]] = None,
+                           json: Optional[Dict[str, Any]] = None, headers: Optional[Dict[str, str]] = None,
+                           data: Any = None) -> Optional[Any]:
+        """
+        Send one request with rate limiting and retries.
+
+        Args:
+            method (str): HTTP method
+            params (dict): Query string parameters
+            json (dict): JSON body
+            headers (dict): Extra request headers
+            data: Raw body, or a callable building it for each attempt (aiohttp.FormData can only be sent once)
+
+        Returns:
+            The decoded JSON body (or text for non-JSON responses), None if every attempt failed
+        """
+        for attempt in range(self.provider.max_retries + 1):
+            await self.bucket.acquire()
+            self.requests_sent += 1
+            retry_after = None
+            try:
+                body = data() if callable(data) else data
+                async with self.session.request(method, self.provider.url, params=params, json=json,
+                                                headers=headers, data=body) as response:
+                    if response.status == 200:
+                        if response.content_type == 'application/json':
+                            return await response.json()
+                        return await response.text()
+                    if response.status not in RETRY_STATUSES:
+                        body = await response.text()
+                        print(f"[{self.provider.name}] request failed with status {response.status}: {body[:200]}")
+                        return None
+                    retry_after = response.headers.get('Retry-After')
+                    print(f"[{self.provider.name}] status {response.status} on attempt {attempt + 1}")
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                print(f"[{self.provider.name}] request error on attempt {attempt + 1}: {e!r}")
+
+            if attempt < self.provider.max_retries:
+                self.retries += 1
+                await asyncio.sleep(self.backoff_delay(attempt, retry_after))
+
+        return None
+
+    async def get_json(self, params: Optional[Dict[str, Any]] = None, **kwargs) -> Optional[Any]:
+        """GET shortcut for request_json."""
+        return await self.request_json('GET', params=params, **kwargs)
+
+    async def post_json(self, json: Optional[Dict[str, Any]] = None, **kwargs) -> Optional[Any]:
+        """POST shortcut for request_json."""
+        return await self.request_json('POST', json=json, **kwargs)
+
+
+# Functions
+async def fetch_all(provider: ProviderConfig, params_list: Iterable[Dict[str, Any]]) -> List[Optional[Any]]:
+    """
+    GET one request per parameter set concurrently, throttled to the provider's limits.
+
+    Args:
+        provider (ProviderConfig): Provider to query
+        params_list (Iterable[dict]): Query parameters for each request
+
+    Returns:
+        List: JSON responses in the same order as params_list (None for failed requests)
+    """
+    async with AsyncAPIClient(provider) as client:
+        results = await asyncio.gather(*(client.get_json(params) for params in params_list))
+        print(f"[{provider.name}] {client.requests_sent} requests sent, {client.retries} retries")
+        return results
@@ -0,0 +1,71 @@
+# Batch geocoding for whole rosters: the Census batch geocoder returns coordinates and the block (and so
+# the tract) for thousands of addresses per request. Only the addresses it cannot match are sent to
+# Google one by one; ZCTA5 is then resolved for every row from the coordinates (the batch output has no ZCTA).
+
+# Imports
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from api_lookups import CENSUS_BATCH_SIZE, census_batch_geocode, census_zcta, fcc_block_fips, geocode_addresses
+from geocode_cache import GeocodeCache
+from tract_resolver import BLOCK_FILE, resolve_blocks, split_block_fips
+from zcta_resolver import ZCTA_FILE, resolve_zcta
+
+# Functions
+def geocode_roster(addresses: pd.Series, api_key: str, cache: Optional[GeocodeCache] = None,
+                   batch_size: int = CENSUS_BATCH_SIZE) -> pd.DataFrame:
+    """
+    Geocode a column of one-line addresses and resolve their ZCTA, tract, block group and block.
+
+    Args:
+        addresses (pd.Series): Full addresses ("Street, City, OH Zip")
+        api_key (str): Google API key for the unmatched addresses
+        cache (GeocodeCache): Lookup cache shared by every step
+        batch_size (int): Addresses per Census batch upload
+
+    Returns:
+        pd.DataFrame: 'Geo' ((lat, lon) tuples), 'latitude', 'longitude', 'ZCTA5', 'Census_Tract_Code',
+            'Block_Group_FIPS', 'Block_FIPS' and 'Geocoder' ('census_batch', 'google' or None), same index as addresses
+    """
+    batch = census_batch_geocode(addresses, cache=cache, batch_size=batch_size)
+    lat = np.array([r[0] if r else np.nan for r in batch], dtype='float64')
+    lon = np.array([r[1] if r else np.nan for r in batch], dtype='float64')
+    block = pd.Series([r[2] if r else None for r in batch], index=addresses.index, dtype='string')
+    geocoder = pd.Series(np.where(np.isnan(lat), None, 'census_batch'), index=addresses.index, dtype='object')
+    print(f"Census batch geocoder matched {int((~np.isnan(lat)).sum())} of {len(addresses)} addresses")
+
+    # Fall back to Google for the rest
+    unmatched = np.flatnonzero(np.isnan(lat))
+    if len(unmatched):
+        coords = geocode_addresses(addresses.iloc[unmatched], api_key, cache=cache)
+        lat[unmatched] = [c[0] if c else np.nan for c in coords]
+        lon[unmatched] = [c[1] if c else np.nan for c in coords]
+        geocoder.iloc[unmatched] = [('google' if c else None) for c in coords]
+
+    # Blocks for the Google-geocoded rows (and any batch match without a block)
+    need_block = np.flatnonzero(block.isna().to_numpy() & ~np.isnan(lat))
+    if len(need_block):
+        if BLOCK_FILE.exists():
+            block.iloc[need_block] = resolve_blocks(lat[need_block], lon[need_block])['Block_FIPS'].to_numpy()
+        else:
+            block.iloc[need_block] = fcc_block_fips(lat[need_block], lon[need_block], cache=cache)
+
+    # ZCTA for every located row
+    located = np.flatnonzero(~np.isnan(lat))
+    zcta = pd.Series(None, index=addresses.index, dtype='object')
+    if len(located):
+        if ZCTA_FILE.exists():
+            zcta.iloc[located] = resolve_zcta(lat[located], lon[located]).to_numpy()
+        else:
+            zcta.iloc[located] = census_zcta(lat[located], lon[located], cache=cache)
+
+    out = split_block_fips(block)
+    # Plain floats, so the CSVs get '(40.1, -83.2)' rather than numpy reprs that parse_geo_column cannot read
+    out.insert(0, 'Geo', [(float(a), float(b)) if not np.isnan(a) else None for a, b in zip(lat, lon)])
+    out.insert(1, 'latitude', lat)
+    out.insert(2, 'longitude', lon)
+    out.insert(3, 'ZCTA5', zcta)
+    out['Geocoder'] = geocoder
+    return out
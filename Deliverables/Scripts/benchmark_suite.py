@@ -0,0 +1,567 @@
+# Benchmarks for the enrichment stages on synthetic rosters 1x-1000x the size of the Ohio ones.
+# A synthetic roster repeats the rows of an enriched roster (dispensary, official pharmacy or gPlaces
+# pharmacy) with new ids, house numbers and slightly moved coordinates, so every copy is a distinct
+# lookup. The network stages run against StubServers, a local HTTP server that answers in the Google
+# Geocoding, Census geocoder (coordinates and addressbatch) and FCC area formats. Each stage runs in its
+# own process, which gives a clean peak memory reading and keeps one stage's caches out of the next.
+# Without the precinct polygons, the precinct stage runs on a synthetic grid of precincts over Ohio.
+# Results are appended to Benchmarks/benchmark-runs.csv and can be compared with a saved baseline.
+
+# Imports
+import asyncio
+import contextlib
+import csv
+import io
+import json
+import multiprocessing
+import subprocess
+import sys
+import threading
+import time
+import zlib
+from dataclasses import dataclass, replace
+from datetime import datetime
+from graphlib import TopologicalSorter
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from aiohttp import web
+
+from address_parser import normalize_addresses
+from geo_utils import DATA_DIR, OHIO_BBOX, parse_geo_column
+from geocode_cache import coords_key
+
+try:
+    import resource  # Peak memory readings (not available on Windows)
+except ImportError:
+    resource = None
+
+# Variables
+BENCHMARK_DIR = Path(__file__).parent.parent / 'Benchmarks'
+WORK_DIR = DATA_DIR / 'Cache' / 'benchmarks'  # Synthetic rosters, stage outputs and logs (not committed)
+RUNS_FILE = BENCHMARK_DIR / 'benchmark-runs.csv'
+BASELINE_FILE = BENCHMARK_DIR / 'baseline.csv'
+
+SCALES = [1, 10, 100, 1000]
+NETWORK_SCALES = [1, 10, 100]  # Scales the stub-backed stages run at; at 1000x they would take hours on one core
+NETWORK_STAGES = ['address-to-coords', 'coords-to-zcta', 'find-tract', 'census-batch']  # Stages that call the stubs
+JITTER_DEGREES = 0.005  # Standard deviation of the coordinate shift of each copy (~0.3 mi)
+REGRESSION_RATIO = 1.25  # A stage slower than its baseline by more than this is flagged
+
+UNLIMITED_RATE = 1e9  # Token bucket rate used against the stubs when rate limits are off
+
+PRECINCT_CELL_DEGREES = 0.05  # Side of a synthetic precinct (~7,000 over Ohio's bounding box, about as many as the real ones)
+
+RESULT_COLUMNS = ['run', 'commit', 'schema', 'scale', 'rows', 'stage', 'status', 'seconds', 'rows_per_second',
+                  'requests', 'peak_rss_mb', 'stage_rss_mb', 'detail']
+
+
+# Classes
+@dataclass(frozen=True)
+class RosterSchema:
+    """An enriched roster used as the template of a synthetic one."""
+    source: Path
+    ids: Tuple[str, ...]  # Columns made unique in each copy
+    mapping: str  # RDF mapping config converting this roster (Mappings/<mapping>.yaml)
+
+
+SCHEMAS = {
+    'dispensary': RosterSchema(DATA_DIR / 'Dispensary-Roster-Geo-ZCTA-Votes.csv', ('License: Number',), 'dispensary'),
+    'pharmacy-official': RosterSchema(DATA_DIR / 'Primary-Dataset-2(pharmacy-official).csv', ('LicenseNumber',), 'pharmacy-official'),
+    'pharmacy-places': RosterSchema(DATA_DIR / 'Primary-Dataset-2(pharmacy).csv', ('Places_ID',), 'pharmacy-places'),
+}
+
+
+class StubServers:
+    """
+    Local stand-ins for the Google Geocoding, Census geocoder and FCC area APIs.
+
+    Answers come from a truth table (the synthetic rosters' addresses, coordinates, ZCTAs and blocks), in
+    each API's response format; unknown addresses and points get the API's no-match answer. The server
+    runs on its own thread and counts the requests per endpoint.
+
+    Usage:
+        with StubServers(truth) as stubs:
+            urls = stubs.urls()  # Provider name -> stub endpoint, for ProviderConfig.with_url
+    """
+
+    ROUTES = {
+        'google_geocode': ('GET', '/maps/api/geocode/json'),
+        'census': ('GET', '/geocoder/geographies/coordinates'),
+        'census_batch': ('POST', '/geocoder/geographies/addressbatch'),
+        'fcc': ('GET', '/api/census/area'),
+    }
+
+    def __init__(self, truth: pd.DataFrame, latency: float = 0.0, host: str = '127.0.0.1'):
+        """
+        Args:
+            truth (pd.DataFrame): 'Full Address', 'latitude', 'longitude', 'ZCTA5' and 'Block_FIPS' per row
+            latency (float): Seconds each response is held back, to imitate a remote service
+            host (str): Interface to listen on (a free port is picked)
+        """
+        truth = truth.drop_duplicates('Full Address')
+        points = zip(truth['latitude'].to_numpy(), truth['longitude'].to_numpy())
+        self.addresses = dict(zip(truth['Full Address'], points))
+        self.normalized = dict(zip(normalize_addresses(truth['Full Address'].astype('string')), self.addresses.values()))
+        keys = [coords_key(lat, lon) for lat, lon in self.addresses.values()]
+        self.points = dict(zip(keys, zip(truth['ZCTA5'], truth['Block_FIPS'])))
+        self.latency = latency
+        self.host = host
+        self.port = None
+        self.counts = {name: 0 for name in self.ROUTES}
+        self._loop = None
+        self._thread = None
+        self._runner = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def start(self):
+        """Start serving on a background thread."""
+        started = threading.Event()
+
+        def serve():
+            self._loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self._loop)
+            self._loop.run_until_complete(self._start_app())
+            started.set()
+            self._loop.run_forever()
+
+        self._thread = threading.Thread(target=serve, daemon=True)
+        self._thread.start()
+        started.wait()
+
+    def stop(self):
+        """Shut the server down."""
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+    async def _start_app(self):
+        app = web.Application()
+        handlers = {'google_geocode': self._google, 'census': self._census, 'census_batch': self._census_batch, 'fcc': self._fcc}
+        for name, (method, path) in self.ROUTES.items():
+            app.router.add_route(method, path, handlers[name])
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, 0)
+        await site.start()
+        self.port = self._runner.addresses[0][1]
+
+    def urls(self) -> Dict[str, str]:
+        """Provider name -> stub endpoint."""
+        return {name: f"http://{self.host}:{self.port}{path}" for name, (_, path) in self.ROUTES.items()}
+
+    def total_requests(self) -> int:
+        return sum(self.counts.values())
+
+    async def _answer(self, name: str):
+        self.counts[name] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    def _point(self, request) -> Optional[Tuple[str, str]]:
+        query = request.query
+        lat, lon = (query.get('y'), query.get('x')) if 'y' in query else (query.get('lat'), query.get('lon'))
+        try:
+            return self.points.get(coords_key(float(lat), float(lon)))
+        except (TypeError, ValueError):
+            return None
+
+    async def _google(self, request):
+        await self._answer('google_geocode')
+        location = self.addresses.get(request.query.get('address', ''))
+        if location is None:
+            return web.json_response({'status': 'ZERO_RESULTS', 'results': []})
+        return web.json_response({'status': 'OK', 'results': [{
+            'geometry': {'location': {'lat': location[0], 'lng': location[1]}, 'location_type': 'ROOFTOP'},
+        }]})
+
+    async def _census(self, request):
+        await self._answer('census')
+        point = self._point(request)
+        zctas = [{'ZCTA5': point[0], 'GEOID': point[0]}] if point and isinstance(point[0], str) else []
+        return web.json_response({'result': {'geographies': {'2020 Census ZIP Code Tabulation Areas': zctas}}})
+
+    async def _fcc(self, request):
+        await self._answer('fcc')
+        point = self._point(request)
+        if point is None or not isinstance(point[1], str):
+            return web.json_response({'results': []})
+        block = point[1]
+        return web.json_response({'results': [{'block_fips': block, 'county_fips': block[:5], 'state_fips': block[:2]}]})
+
+    async def _census_batch(self, request):
+        await self._answer('census_batch')
+        form = await request.post()
+        upload = form['addressFile']
+        text = upload.file.read().decode('utf-8') if hasattr(upload, 'file') else str(upload)
+        rows = [row for row in csv.reader(io.StringIO(text)) if row]
+        addresses = pd.Series([f"{street}, {city}, {state} {zip_code}" for _, street, city, state, zip_code in rows], dtype='string')
+
+        out = io.StringIO()
+        writer = csv.writer(out)
+        for row, address, key in zip(rows, addresses, normalize_addresses(addresses).fillna('')):
+            location = self.normalized.get(key)
+            point = self.points.get(coords_key(*location)) if location else None
+            if point is None or not isinstance(point[1], str):
+                writer.writerow([row[0], address, 'No_Match'])
+                continue
+            block = point[1]
+            writer.writerow([row[0], address, 'Match', 'Exact', address.upper(), f"{location[1]},{location[0]}",
+                             '0', 'L', block[:2], block[2:5], block[5:11], block[11:]])
+        return web.Response(text=out.getvalue(), content_type='text/csv')
+
+
+# Functions
+def synthetic_roster(schema: str, scale: int, seed: int = 0, jitter: float = JITTER_DEGREES) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Build a roster scale times the size of a schema's source roster.
+
+    The first copy is the source itself; later copies get '-<copy>' appended to their ids, a '<copy>-'
+    house number prefix and coordinates moved by a normal jitter.
+
+    Returns:
+        Tuple[pd.DataFrame, pd.DataFrame]: The roster (source columns plus float 'latitude'/'longitude', and
+            'Census_Tract_Code' when the source has none) and its truth table for StubServers
+    """
+    spec = SCHEMAS[schema]
+    base = pd.read_csv(spec.source, dtype=str, encoding='utf-8-sig')
+    copy = np.repeat(np.arange(scale), len(base))
+    roster = base.iloc[np.tile(np.arange(len(base)), scale)].reset_index(drop=True)
+    later = copy > 0
+    suffix = pd.Series(copy.astype(str))
+
+    for column in spec.ids:
+        roster.loc[later, column] = roster.loc[later, column] + '-' + suffix[later]
+    roster.loc[later, 'Full Address'] = suffix[later] + '-' + roster.loc[later, 'Full Address']
+
+    rng = np.random.default_rng(seed)
+    coords = parse_geo_column(roster['Geo'])
+    shift = np.where(later[:, None], rng.normal(0, jitter, (len(roster), 2)), 0)
+    lat = (coords['latitude'].to_numpy() + shift[:, 0]).round(7)
+    lon = (coords['longitude'].to_numpy() + shift[:, 1]).round(7)
+    text = pd.Series(lat).astype(str) + ', ' + pd.Series(lon).astype(str)
+    geo = '(' + text + ')' if base['Geo'].str.startswith('(').any() else text.str.replace(' ', '')  # Keep the source format
+    roster['Geo'] = geo.where(coords['latitude'].notna().to_numpy()).to_numpy()
+    roster['latitude'], roster['longitude'] = lat, lon  # So any stage can run without the geocoding stage before it
+
+    # Rosters without tract codes get one from the official pharmacies' tracts, picked by id
+    # (kept in the roster too, so the tract-based stages can run when find-tract does not)
+    if 'Census_Tract_Code' in roster.columns:
+        tracts = roster['Census_Tract_Code']
+    else:
+        pool = pd.read_csv(SCHEMAS['pharmacy-official'].source, dtype=str, usecols=['Census_Tract_Code'])['Census_Tract_Code'].dropna().unique()
+        ids = roster[spec.ids[0]].fillna('').astype(str)
+        tracts = pd.Series(pool[[zlib.crc32(i.encode()) % len(pool) for i in ids]])
+        roster['Census_Tract_Code'] = tracts.to_numpy()
+    truth = pd.DataFrame({
+        'Full Address': roster['Full Address'],
+        'latitude': lat,
+        'longitude': lon,
+        'ZCTA5': roster['ZCTA5'],
+        'Block_FIPS': (tracts + '1001').to_numpy(),  # Block 1001 (block group 1) of the tract
+    }).dropna(subset=['Full Address', 'latitude'])
+    return roster, truth
+
+
+def synthetic_precincts(path: Path, cell: float = PRECINCT_CELL_DEGREES, seed: int = 0) -> Path:
+    """
+    Write a grid of square precincts with random 2020 results over Ohio's bounding box, in the
+    GeoParquet layout of precinct_index.build_precinct_file, for benchmarking without the real polygons.
+
+    Returns:
+        Path: path (written once; later calls reuse it)
+    """
+    path = Path(path)
+    if path.exists():
+        return path
+    import geopandas as gpd
+    import shapely
+
+    west, south, east, north = OHIO_BBOX
+    cols, rows = int(np.ceil((east - west) / cell)), int(np.ceil((north - south) / cell))
+    col, row = np.tile(np.arange(cols), rows), np.repeat(np.arange(rows), cols)
+    rng = np.random.default_rng(seed)
+    dem, rep = rng.integers(50, 1500, len(col)), rng.integers(50, 1500, len(col))
+    county = 2 * (col * 88 // cols) + 1  # 88 odd county codes, 001-175, in bands from west to east
+    gdf = gpd.GeoDataFrame({
+        'GEOID': [f"39{c:03d}-SYNTHETIC {r}-{k}" for c, r, k in zip(county, row, col)],
+        'votes_dem': dem,
+        'votes_rep': rep,
+        'pct_dem_lead': (100 * (dem - rep) / (dem + rep)).round(1),
+    }, geometry=shapely.box(west + col * cell, south + row * cell, west + (col + 1) * cell, south + (row + 1) * cell), crs=4326)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    gdf.to_parquet(path, compression='zstd', write_covering_bbox=True)
+    return path
+
+
+def census_batch_stage(df: pd.DataFrame) -> pd.DataFrame:
+    """Census batch geocoder over the roster's addresses (see batch_geocoder)."""
+    from api_lookups import census_batch_geocode
+    from geocode_cache import GeocodeCache
+
+    with GeocodeCache() as cache:
+        results = census_batch_geocode(df['Full Address'], cache=cache)
+    return pd.DataFrame({
+        'Batch_Latitude': [r[0] if r else np.nan for r in results],
+        'Batch_Longitude': [r[1] if r else np.nan for r in results],
+        'Batch_Block_FIPS': [r[2] if r else None for r in results],
+    }, index=df.index)
+
+
+def pipeline_stages() -> Dict[str, Tuple[Callable[[pd.DataFrame], pd.DataFrame], List[str]]]:
+    """Stage name -> (function, output columns), in dependency order: the pipeline stages, then the batch geocoder."""
+    from pipeline import build_stages
+
+    stages = {stage.name: stage for stage in build_stages()}
+    order = TopologicalSorter({name: set(stage.depends_on) for name, stage in stages.items()}).static_order()
+    chain = {name: (stages[name].func, stages[name].outputs) for name in order}
+    chain['census-batch'] = (census_batch_stage, ['Batch_Latitude', 'Batch_Longitude', 'Batch_Block_FIPS'])
+    return chain
+
+
+def stage_names() -> List[str]:
+    """Every benchmarked stage, the RDF export last."""
+    return [*pipeline_stages(), 'rdf-export']
+
+
+def _peak_rss_mb() -> float:
+    """Peak resident memory of this process in MB (NaN where it cannot be read)."""
+    # Linux keeps ru_maxrss across exec, so a spawned worker would report its parent's peak; VmHWM starts over
+    status = Path('/proc/self/status')
+    if status.exists():
+        for line in status.read_text().splitlines():
+            if line.startswith('VmHWM:'):
+                return int(line.split()[1]) / 2 ** 10
+    if resource is None:
+        return float('nan')
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2 ** 20 if sys.platform == 'darwin' else peak / 2 ** 10  # Bytes on macOS, KiB elsewhere
+
+
+def _use_stubs(urls: Dict[str, str], cache_file: Path, rate_limits: bool):
+    """Point the API providers and the lookup cache of this process at the stubs and a scratch cache."""
+    import async_client
+    import geocode_cache
+
+    for name, url in urls.items():
+        provider = async_client.PROVIDERS[name].with_url(url)
+        if not rate_limits:
+            provider = replace(provider, rate_per_second=UNLIMITED_RATE, burst=10 ** 6)
+        async_client.PROVIDERS[name] = provider
+    geocode_cache.CACHE_FILE = Path(cache_file)
+
+
+def _use_synthetic_precincts(precinct_file: Path) -> bool:
+    """Point the precinct index of this process at the synthetic precincts when the real ones are missing."""
+    import precinct_index
+
+    if precinct_index.PRECINCT_FILE.exists() or precinct_index.PRECINCT_SOURCE.exists():
+        return False
+    precinct_index.PRECINCT_FILE = precinct_index.PRECINCT_SOURCE = Path(precinct_file)
+    return True
+
+
+def _stage_worker(stage: str, schema: str, input_path: str, output_path: str, csv_path: str, urls: Dict[str, str],
+                  cache_file: str, rate_limits: bool, result_path: str, log_path: str, precinct_file: str):
+    """Run one stage in a fresh process and write its measurements to result_path (JSON)."""
+    with open(log_path, 'w', encoding='utf-8') as log, contextlib.redirect_stdout(log), contextlib.redirect_stderr(log):
+        _use_stubs(urls, Path(cache_file), rate_limits)
+        synthetic = stage == 'coords-geo-match' and _use_synthetic_precincts(Path(precinct_file))
+        result = {'status': 'ok', 'detail': ''}
+        if stage == 'rdf-export':
+            from rdf_mapping import load_mapping
+            from rdf_stream import TripleWriter
+
+            mapping = replace(load_mapping(SCHEMAS[schema].mapping), source=Path(csv_path))
+            rss_before, start = _peak_rss_mb(), time.perf_counter()
+            with TripleWriter(Path(output_path).with_suffix('.nt')) as writer:
+                mapping.run(writer)
+            seconds = time.perf_counter() - start
+            result['detail'] = f"{writer.triples} triples"
+        else:
+            func, outputs = pipeline_stages()[stage]
+            df = pd.read_pickle(input_path)
+            rss_before, start = _peak_rss_mb(), time.perf_counter()
+            try:
+                out = func(df)[outputs]
+            except FileNotFoundError as e:
+                result.update(status='skipped', detail=str(e))
+                out = None
+            seconds = time.perf_counter() - start
+            df = df.drop(columns=[c for c in outputs if c in df.columns])
+            if out is not None:
+                for column in outputs:
+                    df[column] = out[column].to_numpy()
+                result['detail'] = f"{int(out.notna().all(axis=1).sum())} rows with every output"
+                if synthetic:
+                    result['detail'] += "; synthetic precincts"
+            df.to_pickle(output_path)
+        result['seconds'] = seconds
+        result['peak_rss_mb'] = _peak_rss_mb()
+        result['stage_rss_mb'] = result['peak_rss_mb'] - rss_before
+    Path(result_path).write_text(json.dumps(result), encoding='utf-8')
+
+
+def run_stage(stage: str, schema: str, paths: Dict[str, Path], stubs: StubServers, rate_limits: bool = False) -> Dict:
+    """
+    Run one stage on a roster in a separate process.
+
+    Args:
+        stage (str): Stage name (see stage_names)
+        schema (str): Key of SCHEMAS
+        paths (Dict[str, Path]): 'input' (pickled frame), 'output', 'csv' (the roster for the RDF export),
+            'cache' (lookup cache file), 'log' and 'precincts' (synthetic_precincts file)
+        stubs (StubServers): Running stub servers
+        rate_limits (bool): Keep the providers' real rate limits (off measures the code, not the limiter)
+
+    Returns:
+        Dict: 'status', 'seconds', 'requests', 'peak_rss_mb', 'stage_rss_mb' and 'detail'
+    """
+    result_path = paths['output'].with_suffix('.json')
+    result_path.unlink(missing_ok=True)
+    requests_before = stubs.total_requests()
+    process = multiprocessing.get_context('spawn').Process(target=_stage_worker, args=(
+        stage, schema, str(paths['input']), str(paths['output']), str(paths['csv']), stubs.urls(), str(paths['cache']),
+        rate_limits, str(result_path), str(paths['log']), str(paths['precincts'])))
+    process.start()
+    process.join()
+
+    if not result_path.exists():
+        tail = paths['log'].read_text(encoding='utf-8', errors='replace').strip().splitlines()[-1:] if paths['log'].exists() else []
+        return {'status': 'failed', 'seconds': float('nan'), 'requests': stubs.total_requests() - requests_before,
+                'peak_rss_mb': float('nan'), 'stage_rss_mb': float('nan'),
+                'detail': f"exit code {process.exitcode}" + (f": {tail[0]}" if tail else '')}
+    result = json.loads(result_path.read_text(encoding='utf-8'))
+    result['requests'] = stubs.total_requests() - requests_before
+    return result
+
+
+def current_commit() -> str:
+    """Short hash of the checked out commit ('' outside a git checkout)."""
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=Path(__file__).parent, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+
+def repo_relative(text: str) -> str:
+    """Strip the checkout's location from the paths in a message, so results read the same on every machine."""
+    root = str(DATA_DIR.parent.resolve())
+    return text.replace(root + '/', '').replace(root + '\\', '')
+
+
+def run_benchmarks(schemas: List[str], scales: List[int] = SCALES, stages: Optional[List[str]] = None,
+                   latency: float = 0.0, rate_limits: bool = False, work_dir: Path = WORK_DIR,
+                   network_scales: Optional[List[int]] = NETWORK_SCALES) -> pd.DataFrame:
+    """
+    Benchmark stages on synthetic rosters of every schema and scale.
+
+    Network stages query StubServers; each roster gets a fresh lookup cache, so every lookup is a miss.
+    Stage outputs feed the next stage, as in the pipeline. At scales outside network_scales the
+    NETWORK_STAGES are reported as skipped, and the later stages use the roster's own columns instead.
+
+    Args:
+        schemas (List[str]): Keys of SCHEMAS
+        scales (List[int]): Roster size multiples
+        stages (List[str]): Stages to run (default: stage_names())
+        latency (float): Seconds the stubs hold each response
+        rate_limits (bool): Keep the providers' rate limits
+        work_dir (Path): Scratch directory
+        network_scales (List[int]): Scales the NETWORK_STAGES run at (None: every scale)
+
+    Returns:
+        pd.DataFrame: One row per (schema, scale, stage), columns RESULT_COLUMNS
+    """
+    stages = stages or stage_names()
+    unknown = set(stages) - set(stage_names())
+    if unknown:
+        raise ValueError(f"Unknown stage(s) {', '.join(sorted(unknown))} (use {', '.join(stage_names())})")
+    run_id, commit = datetime.now().isoformat(timespec='seconds'), current_commit()
+    precinct_file = synthetic_precincts(Path(work_dir) / 'synthetic-precincts.parquet')
+    rows = []
+
+    for schema in schemas:
+        for scale in scales:
+            directory = Path(work_dir) / f"{schema}-x{scale}"
+            directory.mkdir(parents=True, exist_ok=True)
+            roster, truth = synthetic_roster(schema, scale)
+            roster.to_csv(directory / 'roster.csv', index=False)
+            roster.to_pickle(directory / 'input.pkl')
+            cache_file = directory / 'geocode-cache.sqlite'
+            for stale in directory.glob('geocode-cache.sqlite*'):
+                stale.unlink()
+            print(f"{schema} x{scale}: {len(roster)} rows")
+
+            current = directory / 'input.pkl'
+            with StubServers(truth, latency) as stubs:
+                for stage in stages:
+                    output = directory / f"{stage}.pkl"
+                    paths = {'input': current, 'output': output, 'csv': directory / 'roster.csv',
+                             'cache': cache_file, 'log': directory / f"{stage}.log", 'precincts': precinct_file}
+                    if network_scales is not None and scale not in network_scales and stage in NETWORK_STAGES:
+                        result = {'status': 'skipped', 'seconds': 0.0, 'requests': 0, 'peak_rss_mb': float('nan'),
+                                  'stage_rss_mb': float('nan'), 'detail': f"network stage, not run at {scale}x"}
+                    else:
+                        result = run_stage(stage, schema, paths, stubs, rate_limits)
+                    if result['status'] == 'ok' and stage != 'rdf-export':
+                        current = output
+                    seconds = result['seconds']
+                    rows.append({
+                        'run': run_id, 'commit': commit, 'schema': schema, 'scale': scale, 'rows': len(roster),
+                        'stage': stage, 'status': result['status'], 'seconds': round(seconds, 4),
+                        'rows_per_second': round(len(roster) / seconds, 1) if result['status'] == 'ok' and seconds > 0 else float('nan'),
+                        'requests': result['requests'], 'peak_rss_mb': round(result['peak_rss_mb'], 1),
+                        'stage_rss_mb': round(result['stage_rss_mb'], 1), 'detail': repo_relative(result['detail']),
+                    })
+                    print(f"  [{stage}] {result['status']}: {seconds:.2f} s, {result['requests']} stub requests, "
+                          f"peak {result['peak_rss_mb']:.0f} MB ({result['detail']})")
+    return pd.DataFrame(rows, columns=RESULT_COLUMNS)
+
+
+def scaling_curves(results: pd.DataFrame) -> pd.DataFrame:
+    """
+    Seconds per stage at each scale, with the fitted scaling exponent.
+
+    The exponent is the slope of log(seconds) over log(rows): 1 means time grows linearly with the
+    roster, above 1 means it grows faster.
+
+    Returns:
+        pd.DataFrame: Indexed by (schema, stage), one seconds column per scale plus 'exponent'
+    """
+    ok = results[results['status'] == 'ok']
+    curves = ok.pivot_table(index=['schema', 'stage'], columns='scale', values='seconds', aggfunc='last')
+
+    def exponent(group):
+        group = group[group['seconds'] > 0]
+        if group['rows'].nunique() < 2:
+            return float('nan')
+        return round(np.polyfit(np.log(group['rows']), np.log(group['seconds']), 1)[0], 2)
+
+    curves['exponent'] = ok.groupby(['schema', 'stage'])[['rows', 'seconds']].apply(exponent)
+    return curves
+
+
+def compare_with_baseline(results: pd.DataFrame, baseline: pd.DataFrame, ratio: float = REGRESSION_RATIO) -> pd.DataFrame:
+    """
+    Stage timings and memory against a baseline run.
+
+    Returns:
+        pd.DataFrame: (schema, scale, stage) with both runs' seconds and peak memory, 'time_ratio',
+            'memory_ratio' and 'regression' (time_ratio above ratio)
+    """
+    keys = ['schema', 'scale', 'stage']
+    ok = lambda df: df[df['status'] == 'ok'].drop_duplicates(keys, keep='last')[keys + ['seconds', 'peak_rss_mb']]
+    merged = ok(results).merge(ok(baseline), on=keys, suffixes=('', '_baseline'))
+    merged['time_ratio'] = (merged['seconds'] / merged['seconds_baseline']).round(2)
+    merged['memory_ratio'] = (merged['peak_rss_mb'] / merged['peak_rss_mb_baseline']).round(2)
+    merged['regression'] = merged['time_ratio'] > ratio
+    return merged
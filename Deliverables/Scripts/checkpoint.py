@@ -0,0 +1,97 @@
+# Checkpointing helpers for the long-running API scripts.
+# Keyed lookups (geocodes, ZCTAs, block FIPS) are checkpointed through the geocode cache (see cached_lookup);
+# Journal covers other resumable work such as the Places search cells, and atomic_write_csv makes sure
+# an output file is either the old one or the complete new one, never half written.
+
+# Imports
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Dict
+
+import pandas as pd
+
+from geo_utils import DATA_DIR
+
+# Variables
+JOURNAL_DIR = DATA_DIR / 'Cache' / 'journals'
+
+# Functions
+def atomic_write_csv(df: pd.DataFrame, path: Path, **kwargs):
+    """
+    Write a CSV through a temporary file in the same directory and rename it into place.
+
+    Args:
+        df (pd.DataFrame): Data to write
+        path (Path): Destination file
+        **kwargs: Passed to DataFrame.to_csv (index defaults to False)
+    """
+    path = Path(path)
+    kwargs.setdefault('index', False)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', newline='', encoding=kwargs.pop('encoding', 'utf-8')) as f:
+            df.to_csv(f, **kwargs)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+# Classes
+class Journal:
+    """
+    Append-only JSON lines journal of completed work items (key -> record).
+
+    Records are appended in batches and fsynced, so everything up to the last finished batch
+    survives a crash or Ctrl-C. A partially written last line is ignored on load.
+
+    Usage:
+        journal = Journal('ohio-pharmacy-search')
+        done = journal.load()
+        ... work on items not in done, journal.append({key: record, ...}) after each batch ...
+        atomic_write_csv(result, out_file)
+        journal.remove()
+    """
+
+    def __init__(self, name: str, directory: Path = JOURNAL_DIR):
+        self.path = Path(directory) / f"{name}.jsonl"
+
+    def load(self) -> Dict[str, Any]:
+        """Read every completed record; later records for a key replace earlier ones."""
+        done = {}
+        if not self.path.exists():
+            return done
+        with open(self.path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # Line cut off by an interrupted write
+                done[entry['key']] = entry['record']
+        if done:
+            print(f"Resuming from {self.path}: {len(done)} items already done")
+        return done
+
+    def append(self, records: Dict[str, Any]):
+        """Durably append a batch of completed records."""
+        if not records:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        lines = ''.join(json.dumps({'key': key, 'record': record}) + '\n' for key, record in records.items())
+        with open(self.path, 'a+b') as f:
+            # Start on a fresh line if an earlier write was cut off mid-line
+            if f.seek(0, os.SEEK_END) > 0:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b'\n':
+                    lines = '\n' + lines
+            f.write(lines.encode('utf-8'))
+            f.flush()
+            os.fsync(f.fileno())
+
+    def remove(self):
+        """Delete the journal once its results have been merged into the final output."""
+        self.path.unlink(missing_ok=True)
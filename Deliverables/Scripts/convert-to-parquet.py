@@ -0,0 +1,38 @@
+# Converts the enriched CSV datasets to typed Parquet files in Data/Parquet (see typed_storage.py for the schema).
+
+# Imports
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from typed_storage import PARQUET_DIR, read_records, write_records
+
+# Variables
+DATA_DIR = Path(__file__).parent.parent / 'Data'
+
+csv_files = [
+    DATA_DIR / 'Primary-Dataset-1(dispensary).csv',
+    DATA_DIR / 'Primary-Dataset-2(pharmacy).csv',
+    DATA_DIR / 'Primary-Dataset-2(pharmacy-official).csv',
+    DATA_DIR / 'Dispensary-Roster-Geo-ZCTA-Votes.csv',
+    DATA_DIR / 'Pharmacy' / 'Official' / 'Ohio-Retail-Pharmacies-with-zcta-vote-ins-hh-tract.csv',
+    DATA_DIR / 'Pharmacy' / 'gPlaces' / 'ohio-pharmacies-with-zcta-split-vote-ins-hh-tract.csv',
+]
+
+# MAIN
+if __name__ == "__main__":
+    for csv_file in csv_files:
+        parquet_file = PARQUET_DIR / f"{csv_file.stem}.parquet"
+
+        start = time.perf_counter()
+        df = pd.read_csv(csv_file, dtype=str, encoding='utf-8-sig')
+        write_records(df, parquet_file)
+        csv_time = time.perf_counter() - start
+
+        # Compare a projected load against the CSV read
+        start = time.perf_counter()
+        typed = read_records(parquet_file, columns=['latitude', 'longitude', 'ZCTA5'])
+        parquet_time = time.perf_counter() - start
+        print(f"  CSV read + typing: {csv_time * 1000:.1f} ms, Parquet read (3 columns): {parquet_time * 1000:.1f} ms, "
+              f"{typed.memory_usage(deep=True).sum() / 1024:.0f} KiB in memory")
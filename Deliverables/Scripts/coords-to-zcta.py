@@ -1,54 +1,52 @@
-import requests
 import pandas as pd
-import json
-import time
 from pathlib import Path
 
+from api_lookups import census_zcta
+from checkpoint import atomic_write_csv
+from geo_utils import parse_geo_column
+from geocode_cache import GeocodeCache
+from zcta_resolver import ZCTA_FILE, add_zcta_column
+
+# Functions
+## This function looks up the ZCTA for each row through the U.S. Census API (concurrent, rate limited requests). Only used when the ZCTA polygons are not available locally.
+def add_zcta_from_census(df):
+  coords = parse_geo_column(df["Geo"])
+  valid = coords['latitude'].notna()
+  for idx in df.index[~valid]:
+    print(f'Coordinate not valid: {idx}')
+
+  df["ZCTA5"] = None
+  ## Coordinates already in the local geocode cache are not sent again; results are committed to it in batches,
+  ## so an interrupted run picks up where it stopped
+  with GeocodeCache() as cache:
+    df.loc[valid, "ZCTA5"] = census_zcta(coords.loc[valid, 'latitude'], coords.loc[valid, 'longitude'], cache=cache)
+    cache.report()
+
+  missing = df.loc[valid, "ZCTA5"].isna().sum()
+  if missing:
+    print(f"ZCTA not found for {missing} rows!")
+  return df
+
 # MAIN
-## Variables
-inFile = Path(__file__).parent.parent / 'Data' / 'Pharmacy' / 'Official' / 'Ohio-Retail-Pharmacies-Geo.csv'
-outFile = Path(__file__).parent.parent / 'Data' / 'Pharmacy' / 'Official' / "Ohio-Retail-Pharmacies-with-zcta.csv"
-
-url = "https://geocoding.geo.census.gov/geocoder/geographies/coordinates" # U.S. Census API Url for coordinates
-
-## Read in csv an create new col for ZCTA
-df =  pd.read_csv(inFile)
-df["ZCTA5"] = None
-
-## Iterate through each row, create varibles from geocoordinates, request ZCTA data from U.S. Census API, and append to dataframe
-for idx, row in df.iterrows():
-  ### Split coordinates into variables
-  value = df.iloc[idx]["Geo"]
-  if isinstance(value, str):
-      coord = value.strip('()').split(',')
-  else:
-      print(f'Coordinate not a string: {idx}')
-      coord = [None, None]  # Or handle it however makes sense for your case
-  lat = float(coord[0])
-  lon = float(coord[1])
-
-  parameters = {
-    "x": lon,
-    "y": lat,
-    "benchmark": "Public_AR_Current",       # current census geography
-    "vintage": "Current_Current",        # current vintage
-    "format": "json",
-    "layers": "2"   # Data Layer (2 for ZCTA)
-  }
-
-  r = requests.get(url, params=parameters)
-  data = r.json()
-  # print(json.dumps(data, indent=2))
-
-  try:
-    zcta = data["result"]["geographies"]["2020 Census ZIP Code Tabulation Areas"][0]["ZCTA5"]
-    df.at[idx,'ZCTA5'] = zcta
-    # print(df.at[idx,'ZCTA5'])
-  except: 
-    print(f"ZCTA ${zcta} not found!")
-
-  time.sleep(.2)  # Wait for 1/5 of a second before next iteration
-
-  # print(idx, ': ', lat, lon)
-
-df.to_csv(outFile, index=False)
+if __name__ == "__main__":
+  ## Variables
+  inFile = Path(__file__).parent.parent / 'Data' / 'Pharmacy' / 'Official' / 'Ohio-Retail-Pharmacies-Geo.csv'
+  outFile = Path(__file__).parent.parent / 'Data' / 'Pharmacy' / 'Official' / "Ohio-Retail-Pharmacies-with-zcta.csv"
+
+  ## Read in csv
+  df =  pd.read_csv(inFile, dtype={"ZCTA5": str})
+
+  ## Rows geocoded in batch mode (address-to-coords.py) already have their ZCTA5
+  todo = df["ZCTA5"].isna() if "ZCTA5" in df.columns else pd.Series(True, index=df.index)
+  print(f"{len(df) - todo.sum()} rows already have a ZCTA5, resolving {todo.sum()}")
+
+  ## Resolve every row at once against the local ZCTA polygons (no network); fall back to the Census API only if they are missing
+  if todo.any():
+    if ZCTA_FILE.exists():
+      resolved = add_zcta_column(df[todo])
+    else:
+      print(f"ZCTA polygons not found at {ZCTA_FILE}, falling back to the Census API")
+      resolved = add_zcta_from_census(df[todo].copy())
+    df.loc[todo, "ZCTA5"] = resolved["ZCTA5"]
+
+  atomic_write_csv(df, outFile)
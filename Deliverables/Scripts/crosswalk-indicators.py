@@ -0,0 +1,88 @@
+# Moves the indicators that come at different geographies onto common ones with the census crosswalks
+# (see crosswalk.py): ADI (block group) and life expectancy (tract) to ZCTA, and those plus the ACS ZCTA
+# tables and the PUMA-ACS-5-Yr counts to county. Replaces looking codes up by hand (e.g. the FFIEC map
+# step in Data/README.md). Indicators whose crosswalk files are missing are skipped.
+
+# Imports
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from acs_loader import acs_wide, load_acs
+from checkpoint import atomic_write_csv
+from crosswalk import load_crosswalk
+from nearest_facility import load_adi
+from table_cache import load_puma_tables
+
+# Variables
+DATA_DIR = Path(__file__).parent.parent / 'Data'
+
+life_expectancy_file = DATA_DIR / 'ohio-life-exp-census-2023.csv'
+insurance_file = DATA_DIR / 'ZCTA' / 'ACSST5Y2023-health-Insurance-coverage-zcta.csv'
+income_file = DATA_DIR / 'ZCTA' / 'ACSST5Y2023-household-income-zcta.csv'
+
+# PUMA table (see table_cache.load_puma_tables) -> output column (households, Housing Unit Weights)
+puma_columns = {
+    'Below_200_perc_poverty_level': 'Households_Below_200_Poverty',
+    'Income_Loss': 'Households_Income_Loss',
+}
+
+targets = ['zcta', 'county']
+outputs = {
+    'zcta': DATA_DIR / 'zcta-indicators.csv',
+    'county': DATA_DIR / 'county-indicators.csv',
+}
+
+# Functions
+def indicators(target: str) -> pd.DataFrame:
+    """All indicators moved to one target level, one row per target unit."""
+    frames = []
+
+    def add(name, source, frame, key_column, columns):
+        try:
+            moved = load_crosswalk(source, target).transform(frame, key_column, columns)
+        except FileNotFoundError as e:
+            print(f"Skipping {name} at {target} level: {e}")
+            return
+        frames.append(moved.set_index('GEOID'))
+        print(f"{name}: {len(frame)} {source} rows -> {moved.iloc[:, 1:].notna().any(axis=1).sum()} {target} rows")
+
+    adi = load_adi()
+    adi = adi.assign(FIPS=adi.index, ADI_NATRANK_Mean=adi['ADI_NATRANK'], ADI_STATERNK_Mean=adi['ADI_STATERNK'])
+    add('ADI', 'block_group', adi, 'FIPS', {'ADI_NATRANK': 'median', 'ADI_STATERNK': 'median',
+                                            'ADI_NATRANK_Mean': 'average', 'ADI_STATERNK_Mean': 'average'})
+
+    life = pd.read_csv(life_expectancy_file, dtype=str).rename(columns={'e(0)': 'Life_Expectancy'})
+    add('Life expectancy', 'tract', life, 'Tract ID', {'Life_Expectancy': 'average'})
+
+    if target != 'zcta':
+        insured = acs_wide(load_acs(insurance_file), {
+            'TotalPop': ("Civilian noninstitutionalized population", "Total"),
+            'PopInsured': ("Civilian noninstitutionalized population", "Insured"),
+        })
+        income = acs_wide(load_acs(income_file), {'Median_Income_Dollars': ('Median income (dollars)', 'Households')})
+        acs = insured.join(income).rename_axis('ZCTA5').reset_index()
+        add('ACS', 'zcta', acs, 'ZCTA5', {'TotalPop': 'apportion', 'PopInsured': 'apportion', 'Median_Income_Dollars': 'median'})
+
+        puma = load_puma_tables()
+        if 'puma_key' not in puma.columns:
+            print("Skipping PUMA tables: no PUMA keys")
+        else:
+            puma = puma.rename(columns=puma_columns)[['puma_key', *puma_columns.values()]]
+            add('PUMA', 'puma', puma, 'puma_key', {column: 'apportion' for column in puma_columns.values()})
+
+    return pd.concat(frames, axis=1).reset_index() if frames else pd.DataFrame()
+
+
+# MAIN
+if __name__ == "__main__":
+    start = time.perf_counter()
+    for target in targets:
+        result = indicators(target)
+        if result.empty:
+            print(f"No {target} indicators written")
+            continue
+        atomic_write_csv(result, outputs[target])
+        print(f"Wrote {len(result)} {target} rows to {outputs[target]}")
+    print(f"Done in {time.perf_counter() - start:.1f}s")
@@ -0,0 +1,378 @@
+# Crosswalks between census geographies (block group, tract, county, ZCTA, PUMA).
+# A crosswalk is a sparse (target x source) matrix of overlap weights: the population (or land area) that
+# each source unit shares with each target unit. Moving an indicator to another geography is then one
+# sparse matrix-vector product: counts are split by each source unit's share in the targets (apportion),
+# rates and ranks are overlap-weighted means (average), and medians are overlap-weighted medians.
+# Block groups, tracts and counties nest, so those crosswalks come from the integer keys (see geo_keys);
+# ZCTAs and PUMAs are joined to tracts with the Census relationship files, and every other pair is routed
+# through tracts. Tract weights are populations from the block group centroid file.
+# Relationship files (save under Data/Geo):
+#   https://www2.census.gov/geo/docs/maps-data/data/rel2020/zcta520/tab20_zcta520_tract20_natl.txt
+#   https://www2.census.gov/geo/docs/maps-data/data/rel2020/2020_Census_Tract_to_2020_PUMA.txt
+#   https://www2.census.gov/geo/docs/reference/puma2020/2020_PUMA_Names.txt
+
+# Imports
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from geo_keys import format_keys, parent_keys, parse_keys
+from geo_utils import GEO_DIR, OHIO_FIPS
+from nearest_facility import CENTROID_FILE, load_block_group_centroids
+
+# Variables
+ZCTA_TRACT_FILE = GEO_DIR / 'tab20_zcta520_tract20_natl.txt'
+TRACT_PUMA_FILE = GEO_DIR / '2020_Census_Tract_to_2020_PUMA.txt'
+PUMA_NAMES_FILE = GEO_DIR / '2020_PUMA_Names.txt'
+
+WEIGHTS = ['population', 'area']
+METHODS = ['apportion', 'average', 'median']
+
+_edges = {}  # (source, target, weight) -> Crosswalk, built once per process
+_tract_weights = {}  # weight -> tract weights
+
+# Functions
+def weighted_median(groups: np.ndarray, values: np.ndarray, weights: np.ndarray, n_groups: int) -> np.ndarray:
+    """
+    Weighted median of values within each group, for all groups at once.
+
+    Args:
+        groups (np.ndarray): Group position (0..n_groups-1) of each value
+        values (np.ndarray): Values (NaN values are ignored)
+        weights (np.ndarray): Weight of each value (values with weight 0 are ignored)
+        n_groups (int): Number of groups
+
+    Returns:
+        np.ndarray: Lower weighted median per group, NaN for groups without values
+    """
+    keep = ~np.isnan(values) & (weights > 0)
+    groups, values, weights = groups[keep], values[keep], weights[keep]
+    order = np.lexsort((values, groups))
+    groups, values, weights = groups[order], values[order], weights[order]
+
+    # Cumulative weight within each group; the median is the first value reaching half the group's weight
+    cumulative = np.cumsum(weights)
+    totals = np.bincount(groups, weights=weights, minlength=n_groups)
+    before = np.cumsum(totals) - totals
+    reached = cumulative - before[groups] >= totals[groups] * (0.5 - 1e-9)  # Tolerate cumsum rounding at exact halves
+    first_group, first = np.unique(groups[reached], return_index=True)
+
+    result = np.full(n_groups, np.nan)
+    result[first_group] = values[reached][first]
+    return result
+
+
+# Classes
+class Crosswalk:
+    """
+    Sparse overlap weights from a source geography to a target geography.
+
+    Usage:
+        bg_to_zcta = load_crosswalk('block_group', 'zcta')
+        adi_by_zcta = bg_to_zcta.average(adi['ADI_NATRANK'])  # adi indexed by block group key
+    """
+
+    def __init__(self, source: str, target: str, source_keys: np.ndarray, target_keys: np.ndarray,
+                 overlap: sparse.csr_matrix):
+        """
+        Args:
+            source (str): Source level (key of geo_keys.LEVELS)
+            target (str): Target level
+            source_keys (np.ndarray): Sorted int64 keys of the matrix columns
+            target_keys (np.ndarray): Sorted int64 keys of the matrix rows
+            overlap (sparse.csr_matrix): (target x source) overlap weights
+        """
+        self.source = source
+        self.target = target
+        self.source_keys = source_keys
+        self.target_keys = target_keys
+        self.overlap = overlap
+
+    @classmethod
+    def from_pairs(cls, source: str, target: str, source_keys, target_keys, weights) -> 'Crosswalk':
+        """
+        Build from one row per (source unit, target unit) overlap.
+
+        Args:
+            source (str): Source level
+            target (str): Target level
+            source_keys (array-like): Int64 source keys
+            target_keys (array-like): Int64 target keys
+            weights (array-like): Overlap weight of each pair (duplicate pairs are summed)
+        """
+        source_keys = pd.array(source_keys, dtype='Int64')
+        target_keys = pd.array(target_keys, dtype='Int64')
+        weights = np.nan_to_num(np.asarray(weights, dtype='float64'))
+        keep = ~(source_keys.isna() | target_keys.isna())
+        sources, cols = np.unique(source_keys[keep].to_numpy(dtype='int64'), return_inverse=True)
+        targets, rows = np.unique(target_keys[keep].to_numpy(dtype='int64'), return_inverse=True)
+        overlap = sparse.csr_matrix((weights[keep], (rows, cols)), shape=(len(targets), len(sources)))
+        overlap.sum_duplicates()
+        return cls(source, target, sources, targets, overlap)
+
+    def __repr__(self):
+        return (f"Crosswalk({self.source} -> {self.target}: {len(self.source_keys)} x {len(self.target_keys)}, "
+                f"{self.overlap.nnz} overlaps)")
+
+    def reverse(self) -> 'Crosswalk':
+        """The same overlaps from the target geography to the source geography."""
+        return Crosswalk(self.target, self.source, self.target_keys, self.source_keys, self.overlap.T.tocsr())
+
+    def shares(self) -> sparse.csr_matrix:
+        """Fraction of each source unit's weight lying in each target unit (columns sum to 1)."""
+        totals = np.asarray(self.overlap.sum(axis=0)).ravel()
+        scale = np.divide(1.0, totals, out=np.zeros_like(totals), where=totals > 0)
+        return (self.overlap @ sparse.diags(scale)).tocsr()
+
+    def then(self, other: 'Crosswalk') -> 'Crosswalk':
+        """
+        Chain two crosswalks (source -> middle, middle -> target).
+
+        Each source unit's overlap with a middle unit is split over the targets by the middle unit's
+        shares in other, so the chained overlaps keep this crosswalk's weight units.
+        """
+        if other.source != self.target:
+            raise ValueError(f"Cannot chain {self.source} -> {self.target} with {other.source} -> {other.target}")
+        # Columns of other's shares lined up with this crosswalk's target keys (missing units -> no overlap)
+        positions = np.searchsorted(other.source_keys, self.target_keys)
+        positions = np.minimum(positions, len(other.source_keys) - 1)
+        found = other.source_keys[positions] == self.target_keys
+        align = sparse.csr_matrix((np.ones(found.sum()), (positions[found], np.flatnonzero(found))),
+                                  shape=(len(other.source_keys), len(self.target_keys)))
+        overlap = (other.shares() @ align @ self.overlap).tocsr()
+        overlap.eliminate_zeros()
+        return Crosswalk(self.source, other.target, self.source_keys, other.target_keys, overlap)
+
+    def _align(self, values: pd.Series) -> np.ndarray:
+        """Values indexed by source codes or keys -> float array over source_keys (NaN where missing)."""
+        keys = parse_keys(values.index.to_series(), self.source)
+        keep = keys.notna().to_numpy()
+        indexed = pd.Series(pd.to_numeric(values, errors='coerce').to_numpy(dtype='float64', na_value=np.nan)[keep],
+                            index=keys[keep].to_numpy(dtype='int64'))
+        indexed = indexed[~indexed.index.duplicated()]
+        return indexed.reindex(self.source_keys).to_numpy()
+
+    def _result(self, values: np.ndarray, name) -> pd.Series:
+        return pd.Series(values, index=pd.Index(self.target_keys, name=f"{self.target}_key"), name=name)
+
+    def apportion(self, values: pd.Series) -> pd.Series:
+        """
+        Split counts (population, households, ...) over the targets by each source unit's share.
+
+        Args:
+            values (pd.Series): Counts indexed by source codes or keys
+
+        Returns:
+            pd.Series: Counts indexed by target key, NaN where no source unit had a count
+        """
+        v = self._align(values)
+        shares = self.shares()
+        counts = shares @ np.nan_to_num(v)
+        covered = shares @ (~np.isnan(v)).astype('float64')
+        return self._result(np.where(covered > 0, counts, np.nan), values.name)
+
+    def average(self, values: pd.Series) -> pd.Series:
+        """
+        Overlap-weighted mean of rates, ranks or other intensive values.
+
+        Source units without a value are left out of the weights instead of counting as 0.
+
+        Args:
+            values (pd.Series): Values indexed by source codes or keys
+
+        Returns:
+            pd.Series: Means indexed by target key, NaN where no overlapping source unit has a value
+        """
+        v = self._align(values)
+        present = ~np.isnan(v)
+        totals = self.overlap @ np.where(present, v, 0)
+        weights = self.overlap @ present.astype('float64')
+        return self._result(np.divide(totals, weights, out=np.full(len(totals), np.nan), where=weights > 0), values.name)
+
+    def median(self, values: pd.Series) -> pd.Series:
+        """Overlap-weighted median of values indexed by source codes or keys (see weighted_median)."""
+        v = self._align(values)
+        coo = self.overlap.tocoo()
+        return self._result(weighted_median(coo.row, v[coo.col], coo.data, len(self.target_keys)), values.name)
+
+    def transform(self, df: pd.DataFrame, key_column: str, columns: Dict[str, str]) -> pd.DataFrame:
+        """
+        Move several indicator columns of a source-level table at once.
+
+        Args:
+            df (pd.DataFrame): Source table
+            key_column (str): Column holding the source codes
+            columns (Dict[str, str]): Column -> method ('apportion', 'average' or 'median')
+
+        Returns:
+            pd.DataFrame: One row per target unit: 'GEOID' (zero-padded code) and the moved columns
+        """
+        unknown = set(columns.values()) - set(METHODS)
+        if unknown:
+            raise ValueError(f"Unknown crosswalk method(s) {', '.join(sorted(unknown))} (use {', '.join(METHODS)})")
+        indexed = df.set_index(df[key_column].to_numpy())
+        out = pd.DataFrame(index=pd.Index(self.target_keys, name=f"{self.target}_key"))
+        for column, method in columns.items():
+            out[column] = getattr(self, method)(indexed[column]).to_numpy()
+        out.insert(0, 'GEOID', format_keys(pd.Series(self.target_keys), self.target).to_numpy())
+        return out.reset_index(drop=True)
+
+
+# Functions
+def nested_crosswalk(keys: pd.Series, level: str, parent: str, weights=None) -> Crosswalk:
+    """
+    Crosswalk from a level to one that contains it (block group -> tract -> county, tract -> state, ...).
+
+    Args:
+        keys (pd.Series): Int64 keys of the units at level
+        level (str): Level of keys
+        parent (str): Containing level
+        weights (array-like): Weight of each unit, e.g. its population (default 1)
+    """
+    keys = keys.astype('Int64')
+    weights = np.ones(len(keys)) if weights is None else weights
+    return Crosswalk.from_pairs(level, parent, keys, parent_keys(keys, level, parent), weights)
+
+
+def tract_weights(weight: str = 'population') -> pd.Series:
+    """
+    Weight of every tract: its population (summed from the block group centroid file) or land area.
+
+    Returns:
+        pd.Series: float weights indexed by int64 tract key
+    """
+    if weight not in _tract_weights:
+        if weight == 'population':
+            centroids = load_block_group_centroids(CENTROID_FILE)
+            tracts = parent_keys(parse_keys(centroids['GEOID'], 'block_group'), 'block_group', 'tract')
+            _tract_weights[weight] = centroids['population'].astype('float64').groupby(tracts.to_numpy()).sum()
+        elif weight == 'area':
+            pairs = read_zcta_tract(ZCTA_TRACT_FILE)
+            _tract_weights[weight] = pairs.drop_duplicates('tract_key').set_index('tract_key')['tract_area'].astype('float64')
+        else:
+            raise ValueError(f"Unknown crosswalk weight '{weight}' (use {', '.join(WEIGHTS)})")
+    return _tract_weights[weight]
+
+
+def read_zcta_tract(path: Path = ZCTA_TRACT_FILE, state_fips: Optional[str] = OHIO_FIPS) -> pd.DataFrame:
+    """
+    Read the 2020 ZCTA to tract relationship file.
+
+    Args:
+        path (Path): tab20_zcta520_tract20_natl.txt (pipe delimited)
+        state_fips (str): Keep the tracts of one state (None keeps the whole country)
+
+    Returns:
+        pd.DataFrame: 'zcta_key', 'tract_key', 'part_area' (land area of the overlap) and 'tract_area'
+    """
+    if not Path(path).exists():
+        raise FileNotFoundError(f"ZCTA-tract relationship file '{path}' not found")
+    raw = pd.read_csv(path, sep='|', dtype=str, encoding='utf-8-sig',
+                      usecols=['GEOID_ZCTA5_20', 'GEOID_TRACT_20', 'AREALAND_TRACT_20', 'AREALAND_PART'])
+    pairs = pd.DataFrame({
+        'zcta_key': parse_keys(raw['GEOID_ZCTA5_20'], 'zcta'),
+        'tract_key': parse_keys(raw['GEOID_TRACT_20'], 'tract'),
+        'part_area': pd.to_numeric(raw['AREALAND_PART'], errors='coerce'),
+        'tract_area': pd.to_numeric(raw['AREALAND_TRACT_20'], errors='coerce'),
+    })
+    if state_fips is not None:
+        pairs = pairs[parent_keys(pairs['tract_key'], 'tract', 'state') == int(state_fips)]
+    return pairs.dropna(subset=['tract_key']).reset_index(drop=True)
+
+
+def read_tract_puma(path: Path = TRACT_PUMA_FILE, state_fips: Optional[str] = OHIO_FIPS) -> pd.DataFrame:
+    """
+    Read the 2020 tract to PUMA relationship file (every tract lies in one PUMA).
+
+    Returns:
+        pd.DataFrame: 'tract_key' and 'puma_key' (state FIPS followed by the 5-digit PUMA code)
+    """
+    if not Path(path).exists():
+        raise FileNotFoundError(f"Tract-PUMA relationship file '{path}' not found")
+    raw = pd.read_csv(path, dtype=str, encoding='utf-8-sig')
+    if state_fips is not None:
+        raw = raw[raw['STATEFP'] == state_fips]
+    return pd.DataFrame({
+        'tract_key': parse_keys(raw['STATEFP'] + raw['COUNTYFP'] + raw['TRACTCE'], 'tract'),
+        'puma_key': parse_keys(raw['STATEFP'] + raw['PUMA5CE'], 'puma'),
+    }).reset_index(drop=True)
+
+
+def puma_keys_by_name(names: pd.Series, path: Optional[Path] = None, state_fips: str = OHIO_FIPS) -> pd.Series:
+    """
+    PUMA keys for PUMA names as used by data.census.gov ('Allen County PUMA; Ohio').
+
+    Returns:
+        pd.Series: Int64 keys, <NA> for unknown names
+    """
+    path = path or PUMA_NAMES_FILE
+    if not Path(path).exists():
+        raise FileNotFoundError(f"PUMA names file '{path}' not found")
+    raw = pd.read_csv(path, dtype=str, encoding='utf-8-sig')
+    raw = raw[raw['STATEFP'] == state_fips]
+    lookup = pd.Series(parse_keys(raw['STATEFP'] + raw['PUMA5CE'], 'puma').to_numpy(),
+                       index=raw['PUMA NAME'].str.strip().str.upper().to_numpy(), dtype='Int64')
+    cleaned = names.astype('string').str.replace(r';[^;]*$', '', regex=True).str.strip().str.upper()
+    return cleaned.map(lookup).astype('Int64')
+
+
+def _edge(source: str, target: str, weight: str) -> Crosswalk:
+    """Base crosswalks between tracts and their neighbouring levels, built once per process."""
+    key = (source, target, weight)
+    if key not in _edges:
+        if (target, source, weight) in _edges:
+            _edges[key] = _edges[(target, source, weight)].reverse()
+        elif (source, target) == ('block_group', 'tract'):
+            if weight != 'population':
+                raise ValueError("Block group crosswalks are population weighted only (no block group areas)")
+            centroids = load_block_group_centroids(CENTROID_FILE)
+            _edges[key] = nested_crosswalk(parse_keys(centroids['GEOID'], 'block_group'), 'block_group', 'tract',
+                                           centroids['population'].astype('float64').fillna(0).to_numpy())
+        elif (source, target) == ('tract', 'county'):
+            weights = tract_weights(weight)
+            _edges[key] = nested_crosswalk(pd.Series(weights.index, dtype='Int64'), 'tract', 'county', weights.to_numpy())
+        elif (source, target) == ('tract', 'zcta'):
+            # Each tract's weight is split over its ZCTAs by land area
+            pairs = read_zcta_tract(ZCTA_TRACT_FILE)
+            share = np.divide(pairs['part_area'], pairs['tract_area'], out=np.zeros(len(pairs)),
+                              where=pairs['tract_area'] > 0)
+            weights = tract_weights(weight).reindex(pairs['tract_key'].to_numpy()).fillna(0).to_numpy()
+            _edges[key] = Crosswalk.from_pairs('tract', 'zcta', pairs['tract_key'], pairs['zcta_key'], share * weights)
+        elif (source, target) == ('tract', 'puma'):
+            pairs = read_tract_puma(TRACT_PUMA_FILE)
+            weights = tract_weights(weight).reindex(pairs['tract_key'].to_numpy()).fillna(0).to_numpy()
+            _edges[key] = Crosswalk.from_pairs('tract', 'puma', pairs['tract_key'], pairs['puma_key'], weights)
+        else:
+            return _edge(target, source, weight).reverse()
+    return _edges[key]
+
+
+def load_crosswalk(source: str, target: str, weight: str = 'population') -> Crosswalk:
+    """
+    Crosswalk between any two of block group, tract, county, ZCTA and PUMA.
+
+    Pairs that are not tract based go through tracts, e.g. block group -> tract -> ZCTA.
+
+    Args:
+        source (str): Source level
+        target (str): Target level
+        weight (str): 'population' (block group centroid populations) or 'area' (land area)
+
+    Returns:
+        Crosswalk: source -> target overlaps
+    """
+    supported = ['block_group', 'tract', 'county', 'zcta', 'puma']
+    for level in (source, target):
+        if level not in supported:
+            raise ValueError(f"No crosswalk for '{level}' (use {', '.join(supported)})")
+    if weight not in WEIGHTS:
+        raise ValueError(f"Unknown crosswalk weight '{weight}' (use {', '.join(WEIGHTS)})")
+    if source == target:
+        raise ValueError(f"Source and target are both '{source}'")
+
+    if 'tract' in (source, target):
+        return _edge(source, target, weight)
+    return _edge(source, 'tract', weight).then(_edge('tract', target, weight))
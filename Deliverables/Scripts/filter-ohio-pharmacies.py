@@ -3,14 +3,19 @@ import pandas as pd
 import os
 from pathlib import Path
 
+from geo_utils import OHIO_FIPS, StateFilter, coordinates, state_in_address
+
 # Functions
-def filter_ohio_addresses(input_filename, output_filename=None):
+def filter_ohio_addresses(input_filename, output_filename=None, state_fips=OHIO_FIPS):
     """
-    Filter CSV to keep only addresses containing 'OH'
+    Filter CSV to keep only places whose coordinates lie inside the state polygon and whose address names the state
+
+    Without the state polygon (Data/Geo/tl_2020_us_state.zip) only the address check is applied.
     
     Args:
         input_filename (str): Path to input CSV file
         output_filename (str): Path to output CSV file (optional)
+        state_fips (str): 2-digit FIPS code of the state to keep
     
     Returns:
         pd.DataFrame: Filtered DataFrame
@@ -30,9 +35,9 @@ def filter_ohio_addresses(input_filename, output_filename=None):
         print(f"Error reading CSV file: {e}")
         return None
     
-    # Check if Address column exists
-    if 'Address' not in df.columns:
-        print("Error: 'Address' column not found in the CSV file!")
+    # Check if Address and Geo columns exist
+    if 'Address' not in df.columns or 'Geo' not in df.columns:
+        print("Error: 'Address' or 'Geo' column not found in the CSV file!")
         print(f"Available columns: {list(df.columns)}")
         return None
     
@@ -44,9 +49,17 @@ def filter_ohio_addresses(input_filename, output_filename=None):
     # Count records before filtering
     original_count = len(df)
     
-    # Filter for addresses containing 'OH' (case-insensitive)
-    # Using str.contains with case=False to handle variations like 'oh', 'Oh', 'OH'
-    ohio_mask = df['Address'].str.contains('OH', case=False, na=False)
+    # Test the coordinates against the state polygon (bounding box prefilter, then one bulk polygon test)
+    # and the address for ', OH 12345' (a plain substring test would keep 'John St' or 'Ohio Ave' in other states)
+    coords = coordinates(df, 'Geo')
+    try:
+        ohio_mask = StateFilter(state_fips).contains(coords['latitude'], coords['longitude'], df['Address'])
+        missing = coords['latitude'].isna().sum()
+        if missing:
+            print(f"Dropping {missing} records without coordinates")
+    except FileNotFoundError as e:
+        print(f"{e}\nChecking the addresses only")
+        ohio_mask = state_in_address(df['Address'], state_fips)
     df_filtered = df[ohio_mask].copy()
     
     # Count records after filtering
@@ -56,7 +69,7 @@ def filter_ohio_addresses(input_filename, output_filename=None):
     # Display results
     print(f"\n=== FILTERING RESULTS ===")
     print(f"Original records: {original_count}")
-    print(f"Records with 'OH' in address: {filtered_count}")
+    print(f"Records inside the state: {filtered_count}")
     print(f"Records removed: {removed_count}")
     print(f"Percentage kept: {(filtered_count/original_count)*100:.1f}%")
     
@@ -70,7 +83,7 @@ def filter_ohio_addresses(input_filename, output_filename=None):
     if removed_count > 0:
         non_ohio_mask = ~ohio_mask
         df_removed = df[non_ohio_mask]
-        print(f"\nSample removed addresses (non-OH):")
+        print(f"\nSample removed addresses (outside the state):")
         for i, addr in enumerate(df_removed['Address'].head(5)):
             print(f"  {i+1}. {addr}")
     
@@ -0,0 +1,159 @@
+# Integer keys for the geographic identifiers shared by our datasets (state, county, tract, block group,
+# block, ZCTA, PUMA and precinct). FIPS codes are nested digit strings (SS CCC TTTTTT G BBB), so as int64 a
+# parent is the child integer-divided by a power of ten: block group -> tract -> county -> state needs no
+# string slicing. Parsing works on the distinct values only (ACS and Census tables repeat codes a lot) and
+# accepts 5-digit strings, integers that lost their leading zeros ('4501' -> 04501), floats read from
+# CSVs (39041.0) and Census GEO_IDs ('1400000US39041010100'). Joins then run on Int64 columns.
+
+# Imports
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# Variables
+DATA_DIR = Path(__file__).parent.parent / 'Data'
+COUNTY_FIPS_FILE = DATA_DIR / 'ohio-county-fips.csv'
+
+## Census GEO_ID prefix ('0500000US39041', '8600000US43001')
+GEO_ID_PREFIX = r'^\d{7}US'
+
+_county_keys = None  # Loaded once per process
+
+# Classes
+@dataclass(frozen=True)
+class Level:
+    """A geographic level: its FIPS digit count and the level it nests in."""
+    name: str
+    digits: int
+    parent: Optional[str] = None
+
+
+LEVELS: Dict[str, Level] = {
+    'state': Level('state', 2),
+    'county': Level('county', 5, 'state'),
+    'tract': Level('tract', 11, 'county'),
+    'block_group': Level('block_group', 12, 'tract'),
+    'block': Level('block', 15, 'block_group'),
+    'zcta': Level('zcta', 5),  # ZCTAs do not nest in counties
+    'puma': Level('puma', 7, 'state'),  # SS PPPPP; PUMAs are built from tracts but cross county lines
+}
+
+# Functions
+def _level(name: str) -> Level:
+    if name not in LEVELS:
+        raise ValueError(f"Unknown geographic level '{name}' (use {', '.join(LEVELS)})")
+    return LEVELS[name]
+
+
+def parse_keys(values, level: str) -> pd.Series:
+    """
+    Parse identifiers of one level into Int64 keys.
+
+    Args:
+        values (array-like): Codes as strings, integers, floats or Census GEO_IDs
+        level (str): Key of LEVELS
+
+    Returns:
+        pd.Series: Int64 keys (same index as values when it is a Series), <NA> for missing codes and for
+            codes that are not valid at this level (too many digits, state part outside 01-78)
+    """
+    spec = _level(level)
+    values = values if isinstance(values, pd.Series) else pd.Series(values)
+
+    if pd.api.types.is_integer_dtype(values) or pd.api.types.is_float_dtype(values):
+        numeric = values.astype('float64')
+        keys = numeric.where(numeric == np.floor(numeric))
+    else:
+        # Parse each distinct string once, with Arrow string kernels (much faster than str.extract + to_numeric)
+        codes, uniques = pd.factorize(values)
+        digits = pc.replace_substring_regex(pc.utf8_trim_whitespace(pa.array(uniques.astype(str), type=pa.string())),
+                                            GEO_ID_PREFIX, '')
+        valid = pc.match_substring_regex(digits, rf'^\d{{1,{spec.digits}}}$')
+        parsed = pc.cast(pc.if_else(valid, digits, pa.scalar(None, pa.string())), pa.int64())
+        parsed = parsed.to_numpy(zero_copy_only=False).astype('float64')  # Nulls -> NaN; keys stay exact below 2**53
+        keys = pd.Series(np.where(codes >= 0, parsed[codes] if len(parsed) else np.nan, np.nan), index=values.index)
+
+    valid = (keys >= 0) & (keys < 10 ** spec.digits)
+    if level != 'zcta':
+        state = keys // 10 ** (spec.digits - 2)
+        valid &= (state >= 1) & (state <= 78)
+    return keys.where(valid).astype('Int64')
+
+
+def parent_keys(keys: pd.Series, level: str, parent: str) -> pd.Series:
+    """
+    Keys of the enclosing level, by integer division (e.g. block group 390410101001 -> county 39041).
+
+    Args:
+        keys (pd.Series): Int64 keys of level
+        level (str): Level of keys
+        parent (str): Any level above it in the FIPS hierarchy
+
+    Returns:
+        pd.Series: Int64 parent keys
+    """
+    child, target = _level(level), _level(parent)
+    ancestor = child.parent
+    while ancestor and ancestor != parent:
+        ancestor = LEVELS[ancestor].parent
+    if ancestor is None:
+        raise ValueError(f"'{parent}' does not contain '{level}'")
+    return keys.astype('Int64') // 10 ** (child.digits - target.digits)
+
+
+def format_keys(keys: pd.Series, level: str) -> pd.Series:
+    """Zero-padded code strings for output files and IRIs (39041 -> '39041', 4501 as ZCTA -> '04501')."""
+    return keys.astype('Int64').astype('string').str.zfill(_level(level).digits)
+
+
+def with_keys(df: pd.DataFrame, columns: Dict[str, str]) -> pd.DataFrame:
+    """
+    Add '<level>_key' Int64 columns parsed from code columns.
+
+    Args:
+        df (pd.DataFrame): Table
+        columns (Dict[str, str]): Code column -> level, e.g. {'ZCTA5': 'zcta', 'Census_Tract_Code': 'tract'}
+
+    Returns:
+        pd.DataFrame: df with the key columns added
+    """
+    return df.assign(**{f"{level}_key": parse_keys(df[column], level) for column, level in columns.items()})
+
+
+def precinct_keys(geoids) -> pd.DataFrame:
+    """
+    Split precinct GEOIDs ('39041-DELAWARE CITY 4-F') into a categorical GEOID and an Int64 county key.
+
+    The county is parsed once per distinct precinct, not once per row.
+
+    Returns:
+        pd.DataFrame: Categorical 'GEOID' and Int64 'county_key', same index as geoids when it is a Series
+    """
+    geoids = geoids if isinstance(geoids, pd.Series) else pd.Series(geoids)
+    precincts = geoids.astype('category')
+    counties = parse_keys(pd.Series(precincts.cat.categories, dtype='string').str.split('-', n=1).str[0], 'county')
+    codes = precincts.cat.codes.to_numpy()
+    county = counties.array.take(codes, allow_fill=True)  # Code -1 (missing GEOID) -> <NA>
+    return pd.DataFrame({'GEOID': precincts, 'county_key': pd.array(county, dtype='Int64')}, index=geoids.index)
+
+
+def county_keys(path: Path = COUNTY_FIPS_FILE) -> pd.Series:
+    """Int64 county keys by upper-case county name without spaces ('DELAWARE' -> 39041, 'VANWERT' -> 39161), from ohio-county-fips.csv."""
+    global _county_keys
+    if _county_keys is None:
+        counties = pd.read_csv(path, dtype=str, encoding='utf-8-sig').drop_duplicates('fips')
+        _county_keys = pd.Series(parse_keys(counties['fips'], 'county').to_numpy(),
+                                 index=counties['label'].str.upper().str.replace(r'\s+', '', regex=True).to_numpy(), dtype='Int64')
+    return _county_keys
+
+
+def county_keys_by_name(names: pd.Series) -> pd.Series:
+    """Int64 county keys for county names in any case ('Delaware', 'DELAWARE COUNTY', 'Van Wert'), <NA> when unknown."""
+    cleaned = names.astype('string').str.strip().str.upper().str.replace(r'\s+COUNTY$', '', regex=True)
+    cleaned = cleaned.str.replace(r'\s+', '', regex=True)
+    return cleaned.map(county_keys()).astype('Int64')
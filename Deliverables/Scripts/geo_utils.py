@@ -0,0 +1,276 @@
+# Shared geometry helpers for the offline lookup scripts (ZCTA, tract, precinct, ...)
+
+# Imports
+from pathlib import Path
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+import shapely
+from shapely.strtree import STRtree
+
+# Variables
+DATA_DIR = Path(__file__).parent.parent / 'Data'
+GEO_DIR = DATA_DIR / 'Geo'
+
+# Ohio boundaries (approximate), used as a cheap read filter for national shapefiles
+OHIO_BBOX = (-84.820, 38.403, -80.519, 41.977)  # (west, south, east, north)
+OHIO_FIPS = '39'
+STATE_ABBREVIATIONS = {OHIO_FIPS: 'OH'}  # State FIPS -> USPS code, for the address check in StateFilter
+
+STATE_FILE = GEO_DIR / 'tl_2020_us_state.zip'  # https://www2.census.gov/geo/tiger/TIGER2020/STATE/
+
+# Functions
+def parse_geo_column(geo: pd.Series) -> pd.DataFrame:
+    """
+    Parse a whole column of coordinate strings into float latitude/longitude columns.
+
+    Handles both formats found in our data: '(40.2987, -83.0482)' from address-to-coords.py
+    and '38.74579,-83.845231' from pharmacy-extraction.py. Unparseable or out of range
+    coordinates become NaN instead of raising.
+
+    Args:
+        geo (pd.Series): Column of coordinate strings
+
+    Returns:
+        pd.DataFrame: Frame with float64 'latitude' and 'longitude' columns, same index as geo
+    """
+    parts = geo.astype('string').str.strip().str.strip('()').str.split(',', n=1, expand=True)
+    if parts.shape[1] < 2:
+        parts[1] = None
+
+    lat = pd.to_numeric(parts[0].str.strip(), errors='coerce').astype('float64')
+    lon = pd.to_numeric(parts[1].str.strip(), errors='coerce').astype('float64')
+
+    # Basic validation for reasonable coordinate ranges
+    invalid = ~(lat.between(-90, 90) & lon.between(-180, 180))
+    lat[invalid] = np.nan
+    lon[invalid] = np.nan
+
+    return pd.DataFrame({'latitude': lat, 'longitude': lon}, index=geo.index)
+
+
+def coordinates(df: pd.DataFrame, geo_column: str = 'Geo') -> pd.DataFrame:
+    """
+    Get float latitude/longitude columns for a roster.
+
+    Typed rosters (see typed_storage.py) already carry 'latitude' and 'longitude' and are used
+    as is; CSV rosters have their coordinate strings parsed.
+
+    Args:
+        df (pd.DataFrame): Roster
+        geo_column (str): Name of the coordinate string column, used when the float columns are missing
+
+    Returns:
+        pd.DataFrame: Frame with float64 'latitude' and 'longitude' columns, same index as df
+    """
+    if 'latitude' in df.columns and 'longitude' in df.columns:
+        return df[['latitude', 'longitude']].astype('float64')
+    return parse_geo_column(df[geo_column])
+
+
+def read_polygons(path: Path, columns: Sequence[str], bbox: Optional[Tuple[float, float, float, float]] = None) -> gpd.GeoDataFrame:
+    """
+    Read a polygon layer (shapefile, zipped shapefile, GeoJSON, ...) in EPSG:4326.
+
+    Args:
+        path (Path): Path to the polygon file
+        columns (Sequence[str]): Attribute columns to keep (geometry is always kept)
+        bbox (tuple): Optional (west, south, east, north) filter applied while reading
+
+    Returns:
+        gpd.GeoDataFrame: Polygons with the requested columns
+    """
+    if not Path(path).exists():
+        raise FileNotFoundError(f"Polygon file '{path}' not found")
+
+    gdf = gpd.read_file(path, bbox=bbox, columns=list(columns))
+    if gdf.crs is None:
+        gdf = gdf.set_crs(epsg=4326)
+    elif gdf.crs.to_epsg() != 4326:
+        gdf = gdf.to_crs(epsg=4326)
+    return gdf[list(columns) + ['geometry']].reset_index(drop=True)
+
+
+def load_state_boundary(state_fips: str = OHIO_FIPS, path: Path = STATE_FILE):
+    """
+    Load one state's boundary polygon from the TIGER state file.
+
+    There is no bounding box fallback: Ohio's box takes in parts of Kentucky, West Virginia,
+    Pennsylvania, Indiana and Michigan.
+
+    Args:
+        state_fips (str): 2-digit state FIPS code
+        path (Path): Path to the TIGER state shapefile (zipped is fine)
+
+    Returns:
+        shapely.Geometry: State (multi)polygon in EPSG:4326
+    """
+    if not Path(path).exists():
+        raise FileNotFoundError(f"State file '{path}' not found; download it from "
+                                f"https://www2.census.gov/geo/tiger/TIGER2020/STATE/")
+
+    states = read_polygons(path, ['STATEFP'])
+    state = states[states['STATEFP'] == state_fips]
+    if state.empty:
+        raise ValueError(f"State FIPS '{state_fips}' not found in '{path}'")
+    return state.geometry.union_all()
+
+
+def state_in_address(addresses, state_fips: str = OHIO_FIPS) -> np.ndarray:
+    """
+    Test whether one-line addresses name the state before their ZIP code (', OH 43215').
+
+    Args:
+        addresses (array-like): One-line addresses
+        state_fips (str): 2-digit state FIPS code (must be in STATE_ABBREVIATIONS)
+
+    Returns:
+        np.ndarray: Boolean mask, False for missing addresses
+    """
+    pattern = rf',\s*{STATE_ABBREVIATIONS[state_fips]}\s+\d{{5}}'
+    return pd.Series(addresses, dtype='string').str.contains(pattern, regex=True).fillna(False).to_numpy(dtype=bool)
+
+
+class StateFilter:
+    """
+    Vectorized state membership test against a prepared state polygon.
+
+    Points outside the state's bounding box are rejected with plain array comparisons; only the
+    rest are tested against the polygon, in one bulk call. Raises FileNotFoundError when the state
+    polygon is missing (see load_state_boundary). Given addresses, a place must also name the state
+    in its address (see state_in_address), which catches geocodes that landed on the wrong side of
+    the border.
+
+    Usage:
+        ohio = StateFilter('39')
+        inside = ohio.contains(df['latitude'], df['longitude'], df['Address'])
+    """
+
+    def __init__(self, state_fips: str = OHIO_FIPS, boundary=None, path: Path = STATE_FILE):
+        """
+        Args:
+            state_fips (str): 2-digit state FIPS code
+            boundary (shapely.Geometry): Boundary to use instead of loading it (see load_state_boundary)
+            path (Path): Path to the TIGER state shapefile
+        """
+        self.state_fips = state_fips
+        self.boundary = boundary if boundary is not None else load_state_boundary(state_fips, path)
+        shapely.prepare(self.boundary)
+        self.west, self.south, self.east, self.north = self.boundary.bounds
+
+    def contains(self, latitude, longitude, addresses=None) -> np.ndarray:
+        """
+        Test whether points lie in the state (points on the border count as inside).
+
+        Args:
+            latitude (array-like): Point latitudes
+            longitude (array-like): Point longitudes
+            addresses (array-like): Optional one-line addresses that must also name the state
+
+        Returns:
+            np.ndarray: Boolean mask, False for points without coordinates
+        """
+        lat = np.asarray(latitude, dtype='float64')
+        lon = np.asarray(longitude, dtype='float64')
+        with np.errstate(invalid='ignore'):
+            inside = (lat >= self.south) & (lat <= self.north) & (lon >= self.west) & (lon <= self.east)
+        candidates = np.flatnonzero(inside)
+        inside[candidates] = shapely.intersects_xy(self.boundary, lon[candidates], lat[candidates])
+        if addresses is not None:
+            inside &= state_in_address(addresses, self.state_fips)
+        return inside
+
+    def filter(self, df: pd.DataFrame, geo_column: str = 'Geo', address_column: Optional[str] = None) -> pd.DataFrame:
+        """Rows of a roster (see coordinates) that lie in the state (and name it in address_column, if given)."""
+        coords = coordinates(df, geo_column)
+        addresses = df[address_column] if address_column else None
+        return df[self.contains(coords['latitude'], coords['longitude'], addresses)]
+
+
+class PolygonIndex:
+    """
+    STR-tree backed point-in-polygon lookup over a set of keyed polygons.
+
+    The tree is built once; every lookup resolves a whole array of points in a
+    single bulk query instead of one request (or one sjoin) per row.
+    """
+
+    def __init__(self, gdf: gpd.GeoDataFrame, key_column: str, attributes: Optional[pd.DataFrame] = None):
+        """
+        Args:
+            gdf (gpd.GeoDataFrame): Polygons in EPSG:4326
+            key_column (str): Column holding the identifier returned by lookups
+            attributes (pd.DataFrame): Optional per-polygon columns, row-aligned with gdf (see lookup_indices)
+        """
+        if attributes is not None and len(attributes) != len(gdf):
+            raise ValueError(f"attributes has {len(attributes)} rows for {len(gdf)} polygons")
+        self.key_column = key_column
+        self.attributes = attributes.reset_index(drop=True) if attributes is not None else None
+        self.keys = gdf[key_column].to_numpy()
+        self.geometries = gdf.geometry.to_numpy()
+        self.tree = STRtree(self.geometries)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def lookup_indices(self, latitude, longitude, max_distance: Optional[float] = None) -> np.ndarray:
+        """
+        Find the polygon containing each point.
+
+        Args:
+            latitude (array-like): Point latitudes
+            longitude (array-like): Point longitudes
+            max_distance (float): If set, points inside no polygon (gaps and slivers between
+                neighbouring polygons) get the nearest polygon within this many degrees
+
+        Returns:
+            np.ndarray: Position of the containing polygon for each point, -1 where none does
+        """
+        lat = np.asarray(latitude, dtype='float64')
+        lon = np.asarray(longitude, dtype='float64')
+        result = np.full(len(lat), -1, dtype='int64')
+
+        valid = ~(np.isnan(lat) | np.isnan(lon))
+        if not valid.any():
+            return result
+
+        valid_idx = np.flatnonzero(valid)
+        points = shapely.points(lon[valid], lat[valid])
+
+        # 'intersects' keeps points lying exactly on a shared boundary
+        point_idx, poly_idx = self.tree.query(points, predicate='intersects')
+
+        # Points on a shared edge match several polygons; keep the lowest polygon position
+        order = np.lexsort((poly_idx, point_idx))
+        point_idx, poly_idx = point_idx[order], poly_idx[order]
+        first = np.ones(len(point_idx), dtype=bool)
+        first[1:] = point_idx[1:] != point_idx[:-1]
+        result[valid_idx[point_idx[first]]] = poly_idx[first]
+
+        if max_distance is not None:
+            missed = np.flatnonzero(result[valid_idx] < 0)
+            if len(missed):
+                point_idx, poly_idx = self.tree.query_nearest(points[missed], max_distance=max_distance, all_matches=False)
+                result[valid_idx[missed[point_idx]]] = poly_idx
+        return result
+
+    def lookup(self, latitude, longitude, max_distance: Optional[float] = None) -> pd.Series:
+        """
+        Find the key of the polygon containing each point.
+
+        Args:
+            latitude (array-like): Point latitudes
+            longitude (array-like): Point longitudes
+            max_distance (float): Nearest-polygon fallback distance in degrees (see lookup_indices)
+
+        Returns:
+            pd.Series: Key for each point, None where no polygon contains it
+        """
+        idx = self.lookup_indices(latitude, longitude, max_distance)
+        keys = np.empty(len(idx), dtype=object)
+        found = idx >= 0
+        keys[found] = self.keys[idx[found]]
+        keys[~found] = None
+        return pd.Series(keys, name=self.key_column)
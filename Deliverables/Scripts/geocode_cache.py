@@ -0,0 +1,171 @@
+# Persistent SQLite cache for geocoding lookups so reruns only query the network for new rows.
+# Stores address -> (lat, lon), (lat, lon) -> ZCTA5, (lat, lon) -> block FIPS and address -> (lat, lon, block FIPS),
+# each entry tagged with the provider, data vintage, creation time and TTL. Addresses are keyed by address_parser.normalize_addresses.
+
+# Imports
+import json
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+from geo_utils import DATA_DIR
+
+# Variables
+CACHE_FILE = DATA_DIR / 'Cache' / 'geocode-cache.sqlite'
+
+ADDRESS_COORDS = 'address_coords'
+COORDS_ZCTA = 'coords_zcta'
+COORDS_BLOCK = 'coords_block'
+ADDRESS_GEOGRAPHIES = 'address_geographies'  # address -> (lat, lon, block FIPS) from the Census batch geocoder
+
+COORD_PRECISION = 6  # Decimal places kept in coordinate keys (~0.1 m)
+NO_MATCH = '__no_match__'  # Stored for lookups the provider answered without a result (see cached_lookup)
+NO_MATCH_TTL = 7 * 24 * 3600  # Negative results are asked again after a week
+CHECKPOINT_BATCH = 200  # Misses fetched per batch; each batch is committed before the next starts
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS lookups (
+    kind     TEXT NOT NULL,
+    key      TEXT NOT NULL,
+    provider TEXT NOT NULL,
+    vintage  TEXT NOT NULL,
+    value    TEXT NOT NULL,
+    created  REAL NOT NULL,
+    ttl      REAL,
+    PRIMARY KEY (kind, key, provider, vintage)
+)
+"""
+
+# Functions
+def coords_key(lat: float, lon: float) -> str:
+    """Round a coordinate pair into a cache key."""
+    return f"{round(float(lat), COORD_PRECISION):.{COORD_PRECISION}f},{round(float(lon), COORD_PRECISION):.{COORD_PRECISION}f}"
+
+
+# Classes
+class GeocodeCache:
+    """
+    SQLite-backed lookup cache with hit/miss counters.
+
+    Entries whose TTL has passed are treated as misses and overwritten on the next put. Lookups the
+    provider answered without a result are stored as NO_MATCH (for at most NO_MATCH_TTL); failed
+    requests are not stored at all.
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        path = path or CACHE_FILE  # Looked up at call time, so another cache file can be swapped in
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = Path(path)
+        self.conn = sqlite3.connect(str(path))
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(SCHEMA)
+        self.conn.commit()
+        self.hits = 0
+        self.misses = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.conn.close()
+
+    def get_many(self, kind: str, keys: Iterable[str], provider: str, vintage: str = '') -> Dict[str, Any]:
+        """
+        Fetch cached values for a set of keys.
+
+        Args:
+            kind (str): Lookup kind (ADDRESS_COORDS, COORDS_ZCTA or COORDS_BLOCK)
+            keys (Iterable[str]): Cache keys
+            provider (str): Provider the values came from
+            vintage (str): Data vintage the values belong to
+
+        Returns:
+            dict: key -> value for every fresh entry found
+        """
+        keys = list(dict.fromkeys(keys))
+        now = time.time()
+        found = {}
+        # Query in slices to stay under SQLite's host parameter limit
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            rows = self.conn.execute(
+                f"SELECT key, value, created, ttl FROM lookups WHERE kind = ? AND provider = ? AND vintage = ? "
+                f"AND key IN ({','.join('?' * len(chunk))})",
+                [kind, provider, vintage, *chunk]).fetchall()
+            for key, value, created, ttl in rows:
+                if ttl is None or created + ttl > now:
+                    found[key] = json.loads(value)
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, kind: str, items: Dict[str, Any], provider: str, vintage: str = '', ttl: Optional[float] = None):
+        """
+        Store values; None values are skipped so failed lookups are retried next run.
+
+        NO_MATCH values are kept for NO_MATCH_TTL at most, so addresses or points the provider could not
+        place are not requested on every warm run but are retried eventually.
+
+        Args:
+            kind (str): Lookup kind
+            items (dict): key -> value (must be JSON serializable)
+            provider (str): Provider the values came from
+            vintage (str): Data vintage the values belong to
+            ttl (float): Seconds until the entries expire, None to keep them forever
+        """
+        now = time.time()
+        negative_ttl = NO_MATCH_TTL if ttl is None else min(ttl, NO_MATCH_TTL)
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO lookups (kind, key, provider, vintage, value, created, ttl) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [(kind, key, provider, vintage, json.dumps(value), now, negative_ttl if value == NO_MATCH else ttl)
+             for key, value in items.items() if value is not None])
+        self.conn.commit()
+
+    def report(self):
+        """Print the hit/miss counts for this session."""
+        total = self.hits + self.misses
+        rate = self.hits / total * 100 if total else 0.0
+        print(f"Geocode cache: {self.hits} hits, {self.misses} misses ({rate:.1f}% hit rate)")
+
+
+def cached_lookup(cache: Optional[GeocodeCache], kind: str, keys: Sequence[str], provider: str, vintage: str,
+                  fetch: Callable[[List[str]], List[Any]], ttl: Optional[float] = None,
+                  batch_size: int = CHECKPOINT_BATCH) -> List[Any]:
+    """
+    Resolve keys from the cache and fetch only the misses (each unique key once).
+
+    Misses are fetched in batches and every batch is committed to the cache as soon as it
+    returns, so an interrupted run keeps its completed lookups and a rerun only fetches the rest.
+    fetch returns NO_MATCH for lookups the provider answered without a result and None for failed
+    requests; both come back as None, but only NO_MATCH is cached.
+
+    Args:
+        cache (GeocodeCache): Cache to consult, None to always fetch
+        kind (str): Lookup kind
+        keys (Sequence[str]): Cache key for every row
+        provider (str): Provider name recorded with the entries
+        vintage (str): Data vintage recorded with the entries
+        fetch (Callable): Takes the list of missing keys, returns their values (or NO_MATCH / None) in the same order
+        ttl (float): Seconds until new entries expire, None to keep them forever
+        batch_size (int): Misses fetched (and committed) per batch
+
+    Returns:
+        List: Value for every key, in input order (None where there is no result)
+    """
+    if cache is None:
+        return [None if value == NO_MATCH else value for value in fetch(list(keys))]
+
+    values = cache.get_many(kind, keys, provider, vintage)
+    missing = [key for key in dict.fromkeys(keys) if key not in values]
+    for start in range(0, len(missing), batch_size):
+        batch = missing[start:start + batch_size]
+        fetched = dict(zip(batch, fetch(batch)))
+        cache.put_many(kind, fetched, provider, vintage, ttl)
+        values.update(fetched)
+        if len(missing) > batch_size:
+            print(f"Checkpointed {min(start + batch_size, len(missing))}/{len(missing)} {kind} lookups")
+    return [None if values.get(key) == NO_MATCH else values.get(key) for key in keys]
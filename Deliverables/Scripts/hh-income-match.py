@@ -1,7 +1,9 @@
 import pandas as pd
-import re
 from pathlib import Path
 
+from acs_loader import acs_wide, load_acs, merge_acs
+from typed_storage import load_records, save_records
+
 def merge_income_data(file1_path, file2_path, output_path):
     """
     Merge income data from two CSV files based on ZCTA5 matching.
@@ -12,84 +14,32 @@ def merge_income_data(file1_path, file2_path, output_path):
         output_path (str): Path for the output merged CSV file
     """
     
-    # Read the first CSV file
+    # Read the first CSV file (typed, through its Parquet copy)
     print("Reading first CSV file...")
-    df1 = pd.read_csv(file1_path)
+    df1 = load_records(file1_path)
     
-    # Read the second CSV file
+    # Read the second CSV file into a long table (ZCTA5, label, group, measure, value)
     print("Reading second CSV file...")
-    df2 = pd.read_csv(file2_path)
+    income = load_acs(file2_path)
     
     # Check if ZCTA5 column exists in first file
     if 'ZCTA5' not in df1.columns:
         raise ValueError("Column 'ZCTA5' not found in first CSV file")
     
-    # Find columns in the second file that match the ZCTA5 pattern
-    zcta5_pattern = re.compile(r'ZCTA5 (\d{5})!!Households!!Estimate')
-    zcta5_columns = []
-    zcta5_codes = []
-    
-    for col in df2.columns:
-        match = zcta5_pattern.match(col)
-        if match:
-            zcta5_columns.append(col)
-            zcta5_codes.append(match.group(1))
-    
-    print(f"Found {len(zcta5_columns)} ZCTA5 columns in second file")
-    
-    # Find the rows containing median and mean income data
-    median_income_row = None
-    mean_income_row = None
-    
-    for idx, row in df2.iterrows():
-        if 'Median income (dollars)' in str(row.iloc[0]):
-            median_income_row = idx
-        elif 'Mean income (dollars)' in str(row.iloc[0]):
-            mean_income_row = idx
-    
-    if median_income_row is None:
-        print("Warning: 'Median income (dollars)' row not found in second file")
-    if mean_income_row is None:
-        print("Warning: 'Mean income (dollars)' row not found in second file")
+    print(f"Found {income['ZCTA5'].nunique()} ZCTA5 codes in second file")
     
-    # Create new columns for median and mean income in the first dataframe
-    df1['Median_Income_Dollars'] = None
-    df1['Mean_Income_Dollars'] = None
+    # Pick the median and mean income rows as columns indexed by ZCTA5 (values already cleaned to floats)
+    income_by_zcta = acs_wide(income, {
+        'Median_Income_Dollars': ('Median income (dollars)', 'Households'),
+        'Mean_Income_Dollars': ('Mean income (dollars)', 'Households'),
+    })
     
-    # Process each row in the first CSV
-    for idx, row in df1.iterrows():
-        zcta5_value = str(row['ZCTA5']).zfill(5)  # Ensure 5 digits with leading zeros
-        
-        # Find matching ZCTA5 column in second file
-        if zcta5_value in zcta5_codes:
-            zcta5_col_idx = zcta5_codes.index(zcta5_value)
-            zcta5_col = zcta5_columns[zcta5_col_idx]
-            
-            # Extract median income if row exists
-            if median_income_row is not None:
-                median_value = df2.loc[median_income_row, zcta5_col]
-                # Clean the value (remove commas, convert to numeric)
-                try:
-                    if pd.notna(median_value) and str(median_value) != '':
-                        median_clean = str(median_value).replace(',', '').replace('$', '')
-                        df1.loc[idx, 'Median_Income_Dollars'] = float(median_clean)
-                except (ValueError, TypeError):
-                    print(f"Warning: Could not convert median income value '{median_value}' for ZCTA5 {zcta5_value}")
-            
-            # Extract mean income if row exists
-            if mean_income_row is not None:
-                mean_value = df2.loc[mean_income_row, zcta5_col]
-                # Clean the value (remove commas, convert to numeric)
-                try:
-                    if pd.notna(mean_value) and str(mean_value) != '':
-                        mean_clean = str(mean_value).replace(',', '').replace('$', '')
-                        df1.loc[idx, 'Mean_Income_Dollars'] = float(mean_clean)
-                except (ValueError, TypeError):
-                    print(f"Warning: Could not convert mean income value '{mean_value}' for ZCTA5 {zcta5_value}")
+    # Attach both columns to every row in one merge
+    df1 = merge_acs(df1, income_by_zcta)
     
     # Save the merged data
     print(f"Saving merged data to {output_path}...")
-    df1.to_csv(output_path, index=False)
+    save_records(df1, output_path)
     
     # Print summary statistics
     matched_count = df1['Median_Income_Dollars'].notna().sum()
@@ -0,0 +1,26 @@
+# Parses the PUMA-ACS-5-Yr exports, Ohio_County_Data.csv and the distributor roster into the typed Arrow
+# cache (see table_cache.py) and compares a cached load with the original parse.
+
+# Imports
+import time
+
+from table_cache import cached_table, sources
+
+# MAIN
+if __name__ == "__main__":
+    for path, parse in sources().items():
+        if not path.exists():
+            print(f"Skipping {path.name}: not found")
+            continue
+
+        start = time.perf_counter()
+        parsed = parse(path)
+        parse_time = time.perf_counter() - start
+
+        cached_table(path, parse)  # Builds the cache entry when the file changed
+
+        start = time.perf_counter()
+        table = cached_table(path, parse)
+        cached_time = time.perf_counter() - start
+        print(f"{path.name}: {len(table)} rows x {table.shape[1]} columns, parse {parse_time * 1000:.1f} ms, "
+              f"cached load {cached_time * 1000:.1f} ms, {table.memory_usage(deep=True).sum() / 1024:.0f} KiB in memory")
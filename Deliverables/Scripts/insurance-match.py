@@ -1,45 +1,28 @@
 import pandas as pd
 from pathlib import Path
 
+from acs_loader import acs_wide, load_acs, merge_acs
+from typed_storage import load_records, save_records
+
 # File paths
 roster_path = Path(__file__).parent.parent / 'Data' / 'Pharmacy' / 'Official'/'Ohio-Retail-Pharmacies-with-zcta-vote.csv'
-insured_path = Path(__file__).parent.parent / 'Data' / 'ZCTA' / 'ACSST5Y2023-health-insurance-coverage-zcta.csv'
+insured_path = Path(__file__).parent.parent / 'Data' / 'ZCTA' / 'ACSST5Y2023-health-Insurance-coverage-zcta.csv'
 output_path = Path(__file__).parent.parent / 'Data' / 'Pharmacy' / 'Official'/'Ohio-Retail-Pharmacies-with-zcta-vote-ins.csv'
 
-# Load data
-dfRoster = pd.read_csv(roster_path)
-dfInsured = pd.read_csv(insured_path)
-
-# Prepare new columns
-dfRoster["TotalPop"] = None
-dfRoster["PopInsured"] = None
-
-# Build a lookup dictionary from dfInsured's single row
-insured_row = dfInsured.iloc[0]
-zcta_lookup = {}
-
-for col in insured_row.index:
-    if "!!Total!!Estimate" in col:
-        zcta = col.split("!!")[0].split()[1]  # Extract ZCTA5 code
-        zcta_lookup[zcta] = {
-            "Total": insured_row[col],
-            "Insured": None  # Will fill in next
-        }
+# Load data (typed, through the roster's Parquet copy)
+dfRoster = load_records(roster_path)
+dfInsured = load_acs(insured_path)
 
-for col in insured_row.index:
-    if "!!Insured!!Estimate" in col:
-        zcta = col.split("!!")[0].split()[1]
-        if zcta in zcta_lookup:
-            zcta_lookup[zcta]["Insured"] = insured_row[col]
+# Build a ZCTA5-indexed lookup table from the first line (civilian noninstitutionalized population)
+insured_by_zcta = acs_wide(dfInsured, {
+    "TotalPop": ("Civilian noninstitutionalized population", "Total"),
+    "PopInsured": ("Civilian noninstitutionalized population", "Insured"),
+})
 
-# Fill in values to dfRoster
-for i, row in dfRoster.iterrows():
-    zcta = str(row["ZCTA5"]).zfill(5)  # Ensure 5-digit format
-    if zcta in zcta_lookup:
-        dfRoster.at[i, "TotalPop"] = zcta_lookup[zcta]["Total"]
-        dfRoster.at[i, "PopInsured"] = zcta_lookup[zcta]["Insured"]
+# Fill in values to dfRoster with a single merge on ZCTA5
+dfRoster = merge_acs(dfRoster, insured_by_zcta)
 
-# Save to CSV
-dfRoster.to_csv(output_path, index=False)
+# Save to CSV, plus the typed Parquet copy hh-income-match.py loads
+save_records(dfRoster, output_path)
 
 print(dfRoster[['ZCTA5', 'TotalPop', 'PopInsured']])
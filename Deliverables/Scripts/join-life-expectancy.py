@@ -0,0 +1,79 @@
+# Joins tract life expectancy to the pharmacy and dispensary rosters in one pass (see life_expectancy.py),
+# replacing the manual FFIEC geo map lookups. Rows whose tract has no value get a neighbouring-tract or
+# county estimate, flagged in 'Life_Exp_Source'; a 'Life Exp' already entered by hand is never replaced by
+# an estimate and is flagged 'manual'. The dispensary roster has no tract codes, so they are resolved from
+# the block polygons when available, and otherwise from the FCC area API as find-tract.py does.
+
+# Imports
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from api_lookups import fcc_block_fips
+from checkpoint import atomic_write_csv
+from geo_utils import coordinates
+from geocode_cache import GeocodeCache
+from life_expectancy import estimate_tables, join_life_expectancy
+from tract_resolver import BLOCK_FILE, add_block_columns, split_block_fips
+
+# Variables
+DATA_DIR = Path(__file__).parent.parent / 'Data'
+
+# Roster -> (file, license column, name column, county column)
+rosters = {
+    'pharmacy': (DATA_DIR / 'Primary-Dataset-2(pharmacy-official).csv', 'LicenseNumber', 'BusinessName', 'LocationCounty'),
+    'dispensary': (DATA_DIR / 'Dispensary-Roster-Geo-ZCTA-Votes.csv', 'License: Number', 'Licensee Doing Business As', 'Public Address - County'),
+}
+
+output_file = DATA_DIR / 'facility-life-expectancy.csv'
+
+# Functions
+def fcc_tract_codes(df: pd.DataFrame) -> pd.Series:
+    """Census tract codes for a roster's 'Geo' coordinates from the FCC area API, through the geocode cache."""
+    coords = coordinates(df)
+    valid = coords['latitude'].notna()
+    with GeocodeCache() as cache:
+        block_codes = pd.Series(fcc_block_fips(coords.loc[valid, 'latitude'], coords.loc[valid, 'longitude'], cache=cache),
+                                index=df.index[valid], dtype='string')
+        cache.report()
+    return split_block_fips(block_codes)['Census_Tract_Code'].reindex(df.index)
+
+# MAIN
+if __name__ == "__main__":
+    start = time.perf_counter()
+    frames = []
+    for roster, (path, license_column, name_column, county_column) in rosters.items():
+        df = pd.read_csv(path, dtype=str, encoding='utf-8-sig')
+        if 'Census_Tract_Code' not in df.columns:
+            if BLOCK_FILE.exists():
+                df = add_block_columns(df)
+            else:
+                print(f"Block polygons not found at {BLOCK_FILE}, looking up {roster} tracts with the FCC area API")
+                df['Census_Tract_Code'] = fcc_tract_codes(df)
+                print(f"Resolved {df['Census_Tract_Code'].notna().sum()} of {len(df)} {roster} tracts; the rest keep their 'Life Exp' or use their county")
+        frames.append(pd.DataFrame({
+            'Roster': roster,
+            'License': df[license_column],
+            'Name': df[name_column],
+            'County': df[county_column],
+            'Census_Tract_Code': df['Census_Tract_Code'],
+            'Life Exp': df['Life Exp'],
+        }))
+    facilities = pd.concat(frames, ignore_index=True)
+
+    # One lookup over every facility
+    tables = estimate_tables()
+    result = facilities.join(join_life_expectancy(facilities, county_column='County', tables=tables, manual_column='Life Exp'))
+
+    atomic_write_csv(result, output_file)
+    print(f"Wrote {len(result)} facilities to {output_file}")
+    print(result.groupby('Roster')['Life_Exp_Source'].value_counts(dropna=False).unstack(fill_value=0))
+
+    # Compare the tract values with the ones previously entered by hand (rows flagged 'manual' kept theirs)
+    manual = pd.to_numeric(result['Life Exp'], errors='coerce')
+    compared = manual.notna() & (result['Life_Exp_Source'] == 'tract')
+    agree = (manual[compared] - result.loc[compared, 'Life_Expectancy']).abs() < 0.05
+    print(f"Agrees with the manual 'Life Exp' for {agree.sum()} of {compared.sum()} facilities; "
+          f"filled {(manual.isna() & result['Life_Expectancy'].notna()).sum()} that had none")
+    print(f"Done in {time.perf_counter() - start:.1f}s")
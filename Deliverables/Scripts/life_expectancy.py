@@ -0,0 +1,172 @@
+# Life expectancy for facilities, joined on their census tract instead of looking each address up in the
+# FFIEC geo map. ohio-life-exp-census-2023.csv does not cover every tract (its tracts predate the 2020
+# tract codes find-tract.py assigns), so a tract without a value gets the population-weighted mean of its
+# nearest neighbouring tracts that have one, and failing that the population-weighted mean of its county.
+# All fallbacks are computed once per tract, so joining facilities is a single reindex however many
+# there are. 'Life_Exp_Source' records where each value came from ('tract', 'manual', 'neighbours' or 'county');
+# a value already entered by hand is kept in preference to any estimate.
+
+# Imports
+from pathlib import Path
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from sklearn.neighbors import BallTree
+
+from crosswalk import Crosswalk, nested_crosswalk
+from geo_keys import county_keys_by_name, parent_keys, parse_keys
+from geo_utils import DATA_DIR
+from nearest_facility import CENTROID_FILE, EARTH_RADIUS_MILES, load_block_group_centroids
+
+# Variables
+LIFE_EXPECTANCY_FILE = DATA_DIR / 'ohio-life-exp-census-2023.csv'
+
+NEIGHBOURS = 6  # Nearest tracts with a value that can stand in for a missing tract
+NEIGHBOUR_MILES = 5.0  # ... as long as their centroids are this close
+
+SOURCES = ['tract', 'manual', 'neighbours', 'county']
+
+# Functions
+def load_life_expectancy(path: Path = LIFE_EXPECTANCY_FILE) -> pd.DataFrame:
+    """
+    Read the tract life expectancy table.
+
+    Returns:
+        pd.DataFrame: Indexed by int64 tract key, with float 'Life_Expectancy' (e(0)) and 'Life_Expectancy_SE'
+    """
+    raw = pd.read_csv(path, dtype=str, encoding='utf-8-sig')
+    life = pd.DataFrame({
+        'tract_key': parse_keys(raw['Tract ID'], 'tract'),
+        'Life_Expectancy': pd.to_numeric(raw['e(0)'], errors='coerce'),
+        'Life_Expectancy_SE': pd.to_numeric(raw['se(e(0))'], errors='coerce'),
+    }).dropna(subset=['tract_key', 'Life_Expectancy'])
+    return life.drop_duplicates('tract_key').set_index(life['tract_key'].astype('int64').rename('tract_key')).drop(columns='tract_key')
+
+
+def tract_centroids(path: Path = CENTROID_FILE) -> pd.DataFrame:
+    """
+    Population-weighted tract centroids and populations, from the block group centroids.
+
+    Returns:
+        pd.DataFrame: Indexed by int64 tract key, with 'latitude', 'longitude' and 'population'
+    """
+    centroids = load_block_group_centroids(path)
+    population = centroids['population'].astype('float64').fillna(0)
+    tracts = parent_keys(parse_keys(centroids['GEOID'], 'block_group'), 'block_group', 'tract').to_numpy(dtype='int64')
+    # Block groups without people still place the tract (weight 1e-9 instead of 0)
+    weights = population.clip(lower=1e-9)
+    sums = pd.DataFrame({
+        'latitude': centroids['latitude'] * weights,
+        'longitude': centroids['longitude'] * weights,
+        'weight': weights,
+        'population': population,
+    }).groupby(tracts).sum()
+    return pd.DataFrame({
+        'latitude': sums['latitude'] / sums['weight'],
+        'longitude': sums['longitude'] / sums['weight'],
+        'population': sums['population'],
+    }).rename_axis('tract_key')
+
+
+def neighbour_estimates(values: pd.Series, centroids: pd.DataFrame, k: int = NEIGHBOURS,
+                        max_miles: float = NEIGHBOUR_MILES) -> pd.Series:
+    """
+    Population-weighted mean of the nearest tracts with a value, for every tract without one.
+
+    Args:
+        values (pd.Series): Values indexed by int64 tract key
+        centroids (pd.DataFrame): tract_centroids()
+        k (int): Neighbours per tract
+        max_miles (float): Largest centroid distance of a neighbour
+
+    Returns:
+        pd.Series: Estimates indexed by tract key (NaN where no neighbour is close enough)
+    """
+    known = centroids.index.isin(values.dropna().index)
+    donors, targets = centroids[known], centroids[~known]
+    if donors.empty or targets.empty:
+        return pd.Series(np.nan, index=targets.index, name=values.name)
+
+    tree = BallTree(np.radians(donors[['latitude', 'longitude']].to_numpy()), metric='haversine')
+    distances, neighbours = tree.query(np.radians(targets[['latitude', 'longitude']].to_numpy()), k=min(k, len(donors)))
+    rows = np.repeat(np.arange(len(targets)), neighbours.shape[1])
+    neighbours, close = neighbours.ravel(), distances.ravel() * EARTH_RADIUS_MILES <= max_miles
+
+    # Each missing tract is a target unit overlapping its neighbours by their populations
+    weights = Crosswalk.from_pairs('tract', 'tract', donors.index.to_numpy()[neighbours[close]],
+                                   targets.index.to_numpy()[rows[close]], donors['population'].to_numpy()[neighbours[close]])
+    return weights.average(values).reindex(targets.index)
+
+
+def estimate_tables(path: Path = LIFE_EXPECTANCY_FILE, centroid_path: Path = CENTROID_FILE,
+                    k: int = NEIGHBOURS, max_miles: float = NEIGHBOUR_MILES) -> Tuple[pd.DataFrame, pd.Series]:
+    """
+    Life expectancy for every known tract, with its source, and for every county.
+
+    Without the block group centroid file there are no tract populations or locations: the neighbour
+    step is skipped and county means weight every tract equally.
+
+    Returns:
+        Tuple[pd.DataFrame, pd.Series]: Tracts indexed by int64 tract key ('Life_Expectancy', 'Life_Exp_Source')
+            and county means indexed by int64 county key
+    """
+    life = load_life_expectancy(path)['Life_Expectancy']
+    tracts = pd.DataFrame({'Life_Expectancy': life, 'Life_Exp_Source': 'tract'})
+
+    try:
+        centroids = tract_centroids(centroid_path)
+    except FileNotFoundError as e:
+        print(f"No neighbour estimates, equal county weights: {e}")
+        weights = pd.Series(1.0, index=life.index)
+    else:
+        nearby = neighbour_estimates(life, centroids, k, max_miles).dropna()
+        tracts = pd.concat([tracts, pd.DataFrame({'Life_Expectancy': nearby, 'Life_Exp_Source': 'neighbours'})])
+        # Tracts only in the life expectancy table (older codes) count as an average tract
+        population = centroids['population']
+        weights = population.reindex(life.index).fillna(population.mean())
+
+    counties = nested_crosswalk(pd.Series(life.index), 'tract', 'county', weights.to_numpy()).average(life)
+    tracts['Life_Exp_Source'] = tracts['Life_Exp_Source'].astype(pd.CategoricalDtype(SOURCES))
+    return tracts.rename_axis('tract_key'), counties.rename('Life_Expectancy')
+
+
+def join_life_expectancy(df: pd.DataFrame, tract_column: str = 'Census_Tract_Code', county_column: Optional[str] = None,
+                         tables: Optional[Tuple[pd.DataFrame, pd.Series]] = None,
+                         manual_column: Optional[str] = None) -> pd.DataFrame:
+    """
+    Life expectancy of each row's tract, falling back to neighbouring tracts and then the county.
+
+    A tract value always wins; otherwise a value already present in manual_column (e.g. one looked up
+    by hand in the FFIEC geo map) is kept rather than replaced by an estimate, and flagged 'manual'.
+
+    Args:
+        df (pd.DataFrame): Rows with a tract code column (11-digit codes, any format parse_keys accepts)
+        tract_column (str): Tract code column (rows without one use the county)
+        county_column (str): County name column, for rows without a tract code
+        tables (Tuple): estimate_tables() result, to reuse across calls
+        manual_column (str): Column of hand-entered values that take precedence over the estimates
+
+    Returns:
+        pd.DataFrame: 'Life_Expectancy' (float) and 'Life_Exp_Source' (categorical, <NA> without a value), same index as df
+    """
+    tracts, counties = estimate_tables() if tables is None else tables
+    tract_keys = parse_keys(df[tract_column], 'tract') if tract_column in df.columns else pd.Series(pd.NA, index=df.index, dtype='Int64')
+    county = parent_keys(tract_keys, 'tract', 'county')
+    if county_column:
+        county = county.fillna(county_keys_by_name(df[county_column]))
+
+    by_tract = tracts.reindex(tract_keys.array)
+    by_county = counties.reindex(county.array).to_numpy()
+    use_tract = by_tract['Life_Expectancy'].notna().to_numpy()
+    source = by_tract['Life_Exp_Source'].to_numpy().astype(object)
+    source[~use_tract] = np.where(np.isnan(by_county[~use_tract]), None, 'county')
+    value = np.where(use_tract, by_tract['Life_Expectancy'].to_numpy(), by_county)
+    if manual_column:
+        manual = pd.to_numeric(df[manual_column], errors='coerce').to_numpy(dtype='float64')
+        keep = ~np.isnan(manual) & (source != 'tract')
+        value[keep], source[keep] = manual[keep], 'manual'
+    return pd.DataFrame({
+        'Life_Expectancy': value,
+        'Life_Exp_Source': pd.Categorical(source, categories=SOURCES),
+    }, index=df.index)
@@ -0,0 +1,22 @@
+# Converts every dataset with a mapping config in Deliverables/Mappings to its own RDF file
+# (Data/RDF/<mapping>.ttl). Adding a dataset to the graph only takes a new config there.
+
+# Imports
+import time
+
+from rdf_mapping import convert, mapping_names
+from rdf_stream import RDF_DIR
+
+# Variables
+selected = None  # Mapping names to convert, e.g. ['adi-block-groups']; None converts all of them
+output_format = 'ttl'  # 'ttl' (Turtle) or 'nt' (N-Triples)
+
+# MAIN
+if __name__ == "__main__":
+    start = time.perf_counter()
+    total = 0
+    for name in selected or mapping_names():
+        total += convert([name], RDF_DIR / f"{name}.{output_format}")
+
+    elapsed = time.perf_counter() - start
+    print(f"Wrote {total} triples in {elapsed:.1f}s ({total / elapsed * 60:,.0f} triples/min)")
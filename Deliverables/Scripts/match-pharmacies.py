@@ -0,0 +1,48 @@
+# Links the Google Places pharmacies to the Board of Pharmacy roster (Places_ID -> LicenseNumber) with
+# blocked, vectorized entity resolution (see pharmacy_matching.py), replacing the hand reconciliation
+# in address-comparison.csv. Unmatched records on either side are listed with an empty partner id.
+
+# Imports
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from checkpoint import atomic_write_csv
+from pharmacy_matching import MATCH_THRESHOLD, match_records, prepare
+
+# Variables
+DATA_DIR = Path(__file__).parent.parent / 'Data'
+places_file = DATA_DIR / 'Pharmacy' / 'gPlaces' / 'ohio-pharmacies-with-zcta-split-vote-ins-hh-tract.csv'
+official_file = DATA_DIR / 'Pharmacy' / 'Official' / 'Ohio-Retail-Pharmacies-with-zcta-vote-ins-hh-tract.csv'
+roster_file = DATA_DIR / 'Pharmacy' / 'Official' / 'Ohio-Retail-Pharmacies.csv'  # Board roster, license numbers as issued
+output_file = DATA_DIR / 'Pharmacy' / 'pharmacy-matches.csv'
+
+threshold = MATCH_THRESHOLD
+
+# MAIN
+if __name__ == "__main__":
+    start = time.perf_counter()
+    places = pd.read_csv(places_file, dtype=str, encoding='utf-8-sig')
+    official = pd.read_csv(official_file, dtype=str, encoding='utf-8-sig')
+
+    # The enriched file lost the license numbers' leading zeros (022010550 -> 22010550); take them back
+    # from the Board roster so the match table joins to it
+    licenses = pd.read_csv(roster_file, dtype=str, encoding='utf-8-sig', usecols=['LicenseNumber'])['LicenseNumber']
+    issued = pd.Series(licenses.to_numpy(), index=licenses.str.lstrip('0'))
+    official['LicenseNumber'] = official['LicenseNumber'].str.lstrip('0').map(issued).fillna(official['LicenseNumber'])
+
+    left = prepare(places, 'Places_ID', ['Business_Name'], 'Public Address Street')
+    right = prepare(official, 'LicenseNumber', ['BusinessName', 'DoingBusinessAs'], 'LocationStreetAddress')
+    matches = match_records(left, right, threshold).rename(columns={'left_id': 'Places_ID', 'right_id': 'LicenseNumber'})
+
+    # Unmatched records from both sides, so the table covers both universes
+    unmatched = pd.concat([
+        pd.DataFrame({'Places_ID': left['id'][~left['id'].isin(matches['Places_ID'])]}),
+        pd.DataFrame({'LicenseNumber': right['id'][~right['id'].isin(matches['LicenseNumber'])]}),
+    ], ignore_index=True)
+    result = pd.concat([matches, unmatched], ignore_index=True)
+
+    atomic_write_csv(result, output_file)
+    print(f"Matched {len(matches)} of {len(left)} Places pharmacies to {len(right)} licensed pharmacies "
+          f"in {time.perf_counter() - start:.2f}s; wrote {output_file}")
@@ -0,0 +1,40 @@
+# Distance from every Ohio block group to its nearest dispensaries and pharmacies, next to the block
+# group's ADI ranks (see nearest_facility.py). Answers "how far is each neighbourhood from its nearest
+# dispensary vs pharmacy" for the whole state in one run.
+
+# Imports
+import os
+import time
+from pathlib import Path
+
+from checkpoint import atomic_write_csv
+from nearest_facility import CENTROID_FILE, FacilityIndex, block_group_access, load_block_group_centroids
+from typed_storage import load_records
+
+# Variables
+DATA_DIR = Path(__file__).parent.parent / 'Data'
+
+# Facility set name -> (roster, id column)
+facility_sets = {
+    'Dispensary': (DATA_DIR / 'Dispensary-Roster-Geo-ZCTA-Votes.csv', 'License: Number'),
+    'Pharmacy': (DATA_DIR / 'Primary-Dataset-2(pharmacy-official).csv', 'LicenseNumber'),
+    'gPlaces_Pharmacy': (DATA_DIR / 'Primary-Dataset-2(pharmacy).csv', 'Places_ID'),
+}
+
+k = 3  # Nearest facilities per set
+workers = os.cpu_count() or 1
+output_file = DATA_DIR / 'block-group-nearest-facility.csv'
+
+# MAIN
+if __name__ == "__main__":
+    start = time.perf_counter()
+    centroids = load_block_group_centroids(CENTROID_FILE)
+
+    facilities = {}
+    for name, (path, id_column) in facility_sets.items():
+        facilities[name] = FacilityIndex.from_frame(load_records(path, [id_column, 'latitude', 'longitude']), id_column)
+        print(f"{name}: {len(facilities[name])} facilities")
+
+    access = block_group_access(centroids, facilities, k, workers=workers)
+    atomic_write_csv(access, output_file)
+    print(f"Wrote {len(access)} block groups to {output_file} in {time.perf_counter() - start:.1f}s")
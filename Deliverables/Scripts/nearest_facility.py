@@ -0,0 +1,240 @@
+# Nearest-facility distances for census block groups.
+# Facilities (dispensaries, pharmacies) go into a BallTree with the haversine metric; the k nearest
+# facilities of every block group centroid are then found in batched tree queries. Large point sets are
+# split into chunks that can be spread over a process pool, so national block groups (~240k) need no
+# pairwise distance matrix and no per-row Python loop.
+# Centroids: https://www2.census.gov/geo/docs/reference/cenpop2020/blkgrp/CenPop2020_Mean_BG39.txt (save under Data/Geo;
+# CenPop2020_Mean_BG.txt covers the whole country)
+
+# Imports
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from sklearn.neighbors import BallTree
+
+from geo_keys import parse_keys
+from geo_utils import DATA_DIR, GEO_DIR, coordinates
+
+# Variables
+CENTROID_FILE = GEO_DIR / 'CenPop2020_Mean_BG39.txt'
+ADI_FILE = DATA_DIR / 'OH_2021_ADI_Census_Block_Group_v4_0_1.csv'
+
+EARTH_RADIUS_MILES = 3958.8
+CHUNK_POINTS = 50000  # Points per tree query (and per process pool task)
+
+_worker_tree = None  # Tree shared by the pool workers (set once per worker process)
+
+# Functions
+def load_block_group_centroids(path: Path = CENTROID_FILE) -> pd.DataFrame:
+    """
+    Read the Census population-weighted block group centroids.
+
+    Args:
+        path (Path): CenPop2020_Mean_BG file (one state or national)
+
+    Returns:
+        pd.DataFrame: 'GEOID' (12-digit block group FIPS), 'latitude', 'longitude' and 'population'
+    """
+    if not Path(path).exists():
+        raise FileNotFoundError(f"Block group centroid file '{path}' not found")
+    raw = pd.read_csv(path, dtype=str, encoding='utf-8-sig')
+    raw.columns = raw.columns.str.strip()
+    return pd.DataFrame({
+        'GEOID': raw['STATEFP'] + raw['COUNTYFP'] + raw['TRACTCE'] + raw['BLKGRPCE'],
+        'latitude': pd.to_numeric(raw['LATITUDE'], errors='coerce'),
+        'longitude': pd.to_numeric(raw['LONGITUDE'], errors='coerce'),
+        'population': pd.to_numeric(raw['POPULATION'], errors='coerce').astype('Int64'),
+    })
+
+
+def load_adi(path: Path = ADI_FILE) -> pd.DataFrame:
+    """
+    Read the ADI block group ranks.
+
+    Returns:
+        pd.DataFrame: Indexed by Int64 block group key (see geo_keys), with Int64 'ADI_NATRANK' and
+            'ADI_STATERNK' (<NA> for suppressed ranks such as 'GQ' or 'PH')
+    """
+    adi = pd.read_csv(path, dtype=str, usecols=['FIPS', 'ADI_NATRANK', 'ADI_STATERNK'])
+    for col in ['ADI_NATRANK', 'ADI_STATERNK']:
+        adi[col] = pd.to_numeric(adi[col], errors='coerce').astype('Int64')
+    return adi.set_index(parse_keys(adi.pop('FIPS'), 'block_group').rename('block_group_key'))
+
+
+def _init_worker(tree: BallTree):
+    global _worker_tree
+    _worker_tree = tree
+
+
+def _query_chunk(points: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    return _worker_tree.query(points, k=k)
+
+
+def _radius_chunk(points: np.ndarray, radius: float) -> Tuple[np.ndarray, np.ndarray]:
+    return _worker_tree.query_radius(points, r=radius, return_distance=True)
+
+
+# Classes
+class FacilityIndex:
+    """
+    Haversine BallTree over a set of facilities.
+
+    Usage:
+        index = FacilityIndex.from_frame(dispensaries, 'License: Number')
+        miles, ids = index.nearest(centroids['latitude'], centroids['longitude'], k=3)
+    """
+
+    def __init__(self, latitude, longitude, ids):
+        """
+        Args:
+            latitude (array-like): Facility latitudes
+            longitude (array-like): Facility longitudes
+            ids (array-like): Facility identifiers returned by lookups
+        """
+        lat = np.asarray(latitude, dtype='float64')
+        lon = np.asarray(longitude, dtype='float64')
+        valid = ~(np.isnan(lat) | np.isnan(lon))
+        if not valid.any():
+            raise ValueError("No facility has coordinates")
+        self.ids = np.asarray(ids, dtype=object)[valid]
+        self.tree = BallTree(np.radians(np.column_stack([lat[valid], lon[valid]])), metric='haversine')
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, id_column: str, geo_column: str = 'Geo') -> 'FacilityIndex':
+        """Build from a roster with 'latitude'/'longitude' columns or a '(lat, lon)' column."""
+        coords = coordinates(df, geo_column)
+        return cls(coords['latitude'], coords['longitude'], df[id_column].to_numpy())
+
+    def __len__(self):
+        return len(self.ids)
+
+    def nearest(self, latitude, longitude, k: int = 1, chunk_size: int = CHUNK_POINTS,
+                workers: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find the k nearest facilities of every point.
+
+        Args:
+            latitude (array-like): Point latitudes
+            longitude (array-like): Point longitudes
+            k (int): Facilities per point (capped at the number of facilities)
+            chunk_size (int): Points per tree query
+            workers (int): Processes to spread the chunks over (1 queries in this process)
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: (n, k) distances in miles (NaN for points without coordinates)
+                and (n, k) facility ids (None), nearest first
+        """
+        lat = np.asarray(latitude, dtype='float64')
+        lon = np.asarray(longitude, dtype='float64')
+        k = min(k, len(self))
+        miles = np.full((len(lat), k), np.nan)
+        ids = np.full((len(lat), k), None, dtype=object)
+
+        valid = np.flatnonzero(~(np.isnan(lat) | np.isnan(lon)))
+        if not len(valid):
+            return miles, ids
+        points = np.radians(np.column_stack([lat[valid], lon[valid]]))
+        chunks = [points[start:start + chunk_size] for start in range(0, len(points), chunk_size)]
+
+        if workers > 1 and len(chunks) > 1:
+            with ProcessPoolExecutor(min(workers, len(chunks)), initializer=_init_worker, initargs=(self.tree,)) as pool:
+                results = list(pool.map(_query_chunk, chunks, repeat(k)))
+        else:
+            results = [self.tree.query(chunk, k=k) for chunk in chunks]
+
+        distances = np.concatenate([r[0] for r in results])
+        positions = np.concatenate([r[1] for r in results])
+        miles[valid] = distances * EARTH_RADIUS_MILES
+        ids[valid] = self.ids[positions]
+        return miles, ids
+
+    def within(self, latitude, longitude, radius_miles: float, chunk_size: int = CHUNK_POINTS,
+               workers: int = 1) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Find every (point, facility) pair closer than a radius, as sparse matrix coordinates.
+
+        Args:
+            latitude (array-like): Point latitudes
+            longitude (array-like): Point longitudes
+            radius_miles (float): Search radius
+            chunk_size (int): Points per tree query
+            workers (int): Processes to spread the chunks over
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray, np.ndarray]: Point positions, facility positions (into self.ids)
+                and distances in miles, one entry per pair
+        """
+        lat = np.asarray(latitude, dtype='float64')
+        lon = np.asarray(longitude, dtype='float64')
+        valid = np.flatnonzero(~(np.isnan(lat) | np.isnan(lon)))
+        points = np.radians(np.column_stack([lat[valid], lon[valid]]))
+        chunks = [points[start:start + chunk_size] for start in range(0, len(points), chunk_size)]
+        radius = radius_miles / EARTH_RADIUS_MILES
+
+        if workers > 1 and len(chunks) > 1:
+            with ProcessPoolExecutor(min(workers, len(chunks)), initializer=_init_worker, initargs=(self.tree,)) as pool:
+                results = list(pool.map(_radius_chunk, chunks, repeat(radius)))
+        else:
+            results = [self.tree.query_radius(chunk, r=radius, return_distance=True) for chunk in chunks]
+
+        # Ragged per-point results -> flat coordinate arrays
+        positions = [p for r in results for p in r[0]]
+        distances = [d for r in results for d in r[1]]
+        counts = np.fromiter((len(p) for p in positions), dtype='int64', count=len(positions))
+        rows = np.repeat(valid, counts)
+        cols = np.concatenate(positions).astype('int64') if len(positions) else np.empty(0, dtype='int64')
+        miles = np.concatenate(distances) * EARTH_RADIUS_MILES if len(distances) else np.empty(0)
+        return rows, cols, miles
+
+
+# Functions
+def nearest_facilities(points: pd.DataFrame, facilities: Dict[str, FacilityIndex], k: int = 1,
+                       chunk_size: int = CHUNK_POINTS, workers: int = 1) -> pd.DataFrame:
+    """
+    Nearest facility distances for a set of points, one column group per facility set.
+
+    Args:
+        points (pd.DataFrame): 'latitude' and 'longitude' columns (e.g. load_block_group_centroids)
+        facilities (Dict[str, FacilityIndex]): Facility set name -> index
+        k (int): Nearest facilities per set
+        chunk_size (int): Points per tree query
+        workers (int): Processes per facility set
+
+    Returns:
+        pd.DataFrame: Same index as points; '<name>_Miles_<i>' and '<name>_ID_<i>' for i = 1..k
+            (just '<name>_Miles' and '<name>_ID' when k is 1)
+    """
+    out = pd.DataFrame(index=points.index)
+    for name, index in facilities.items():
+        miles, ids = index.nearest(points['latitude'], points['longitude'], k, chunk_size, workers)
+        for i in range(miles.shape[1]):
+            suffix = f"_{i + 1}" if k > 1 else ""
+            out[f"{name}_Miles{suffix}"] = miles[:, i].round(3)
+            out[f"{name}_ID{suffix}"] = ids[:, i]
+    return out
+
+
+def block_group_access(centroids: pd.DataFrame, facilities: Dict[str, FacilityIndex], k: int = 1,
+                       adi: Optional[pd.DataFrame] = None, workers: int = 1) -> pd.DataFrame:
+    """
+    Nearest facilities of every block group, joined to its ADI ranks.
+
+    Args:
+        centroids (pd.DataFrame): Output of load_block_group_centroids
+        facilities (Dict[str, FacilityIndex]): Facility set name -> index
+        k (int): Nearest facilities per set
+        adi (pd.DataFrame): Output of load_adi (defaults to the Ohio ADI file)
+        workers (int): Processes per facility set
+
+    Returns:
+        pd.DataFrame: GEOID, population, ADI_NATRANK, ADI_STATERNK and the nearest_facilities columns
+    """
+    if adi is None:
+        adi = load_adi()
+    ranks = adi.reindex(parse_keys(centroids['GEOID'], 'block_group').array).set_axis(centroids.index)
+    out = pd.concat([centroids[['GEOID', 'population']], ranks], axis=1)
+    return pd.concat([out, nearest_facilities(centroids, facilities, k, workers=workers)], axis=1)
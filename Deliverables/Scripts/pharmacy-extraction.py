@@ -1,11 +1,12 @@
 # Imports
 from dotenv import find_dotenv, load_dotenv
 import os
-import requests
-import json
+import asyncio
 import pandas as pd
-import time
-import math
+
+from checkpoint import Journal, atomic_write_csv
+from geo_utils import OHIO_FIPS, StateFilter
+from places_tiler import cells_frame, search_region
 
 # Functions
 def extract_place_data(place):
@@ -40,193 +41,62 @@ def extract_place_data(place):
         print(f"Error extracting place data: {e}")
         return None
 
-def make_api_request(url, headers, payload, max_retries=3):
-    """Make API request with retry logic"""
-    for attempt in range(max_retries):
-        try:
-            response = requests.post(url, headers=headers, json=payload)
-            
-            if response.status_code == 200:
-                return response.json()
-            elif response.status_code == 429:  # Rate limit exceeded
-                wait_time = 2 ** attempt  # Exponential backoff
-                print(f"Rate limit exceeded. Waiting {wait_time} seconds...")
-                time.sleep(wait_time)
-            else:
-                print(f"API request failed with status {response.status_code}: {response.text}")
-                if attempt == max_retries - 1:
-                    return None
-        except Exception as e:
-            print(f"Request error on attempt {attempt + 1}: {e}")
-            if attempt < max_retries - 1:
-                time.sleep(2 ** attempt)
-    
-    return None
-
-def generate_ohio_grid(grid_size_miles=25):
-    """Generate a grid of search points covering Ohio"""
-    # Ohio boundaries (approximate)
-    ohio_bounds = {
-        'north': 41.977,
-        'south': 38.403,
-        'east': -80.519,
-        'west': -84.820
-    }
-    
-    # Convert miles to degrees (approximate)
-    # 1 degree latitude ≈ 69 miles
-    # 1 degree longitude ≈ 69 * cos(latitude) miles
-    lat_step = grid_size_miles / 69.0
-    
-    grid_points = []
-    current_lat = ohio_bounds['south']
-    
-    while current_lat <= ohio_bounds['north']:
-        # Calculate longitude step based on current latitude
-        lon_step = grid_size_miles / (69.0 * math.cos(math.radians(current_lat)))
-        current_lon = ohio_bounds['west']
-        
-        while current_lon <= ohio_bounds['east']:
-            grid_points.append({
-                'latitude': current_lat,
-                'longitude': current_lon
-            })
-            current_lon += lon_step
-        
-        current_lat += lat_step
-    
-    return grid_points
-
-def search_around_point(url, headers, lat, lon, radius_meters=40000):
-    """Search for pharmacies around a specific point"""
-    payload = {
-        "textQuery": "pharmacy",
-        "includedType": "pharmacy",
-        "maxResultCount": 20,
-        "locationBias": {
-            "circle": {
-                "center": {"latitude": lat, "longitude": lon},
-                "radius": radius_meters
-            }
-        }
-    }
-    
-    all_places = []
-    next_page_token = None
-    page_count = 0
-    
-    while True:
-        page_count += 1
-        
-        # Add nextPageToken if available
-        if next_page_token:
-            payload["pageToken"] = next_page_token
-        elif "pageToken" in payload:
-            del payload["pageToken"]
-        
-        # Make API request
-        data = make_api_request(url, headers, payload)
-        
-        if not data:
-            break
-        
-        # Process places from current page
-        places = data.get('places', [])
-        all_places.extend(places)
-        
-        # Check for next page token
-        next_page_token = data.get("nextPageToken")
-        
-        if not next_page_token or page_count >= 3:  # Limit pages per point to control API usage
-            break
-        
-        # Small delay between page requests
-        time.sleep(1)
-    
-    return all_places
-
-def is_in_ohio(lat, lon):
-    """Check if coordinates are within Ohio boundaries (approximate)"""
-    ohio_bounds = {
-        'north': 41.977,
-        'south': 38.403,
-        'east': -80.519,
-        'west': -84.820
-    }
-    
-    return (ohio_bounds['south'] <= lat <= ohio_bounds['north'] and 
-            ohio_bounds['west'] <= lon <= ohio_bounds['east'])
-
 # Variables
 env_path = find_dotenv()  # Path to .env file (in root)
 load_dotenv(env_path)  # Load env variables
 GOOGLE_API_KEY = os.environ['GEO_API_KEY']  # API_KEY
 
 # API configuration
-url = "https://places.googleapis.com/v1/places:searchText"
-
 headers = {
     'Content-Type': 'application/json',
     'X-Goog-Api-Key': GOOGLE_API_KEY,
     'X-Goog-FieldMask': 'places.displayName,places.businessStatus,places.formattedAddress,places.location,places.id,nextPageToken'
 }
 
+state_fips = OHIO_FIPS  # State to collect
+
 columnHeaders = ['Business_Name', 'Address', 'Geo', 'Operational_Status', 'Places_ID']
 df = pd.DataFrame(columns=columnHeaders)
 
 ### MAIN ###
 print("Starting comprehensive pharmacy data collection for Ohio...")
-print("Using grid-based search strategy to cover the entire state...")
-
-# Generate search grid
-grid_points = generate_ohio_grid(grid_size_miles=25)  # 25-mile grid
-print(f"Generated {len(grid_points)} search points across Ohio")
+print("Using adaptive cell search: cells that hit the 60 result cap are split into four...")
+
+# Search the Ohio boundary, splitting saturated cells and skipping cells outside the state
+# Places outside the state polygon, or whose address does not say OH, are dropped as each cell finishes
+# (the state polygon, Data/Geo/tl_2020_us_state.zip, is required)
+# Finished cells are journaled, so a restarted run only searches the cells that are left
+state = StateFilter(state_fips)
+journal = Journal('ohio-pharmacy-search')
+cell_results = asyncio.run(search_region(headers, state.boundary, journal=journal, state_filter=state))
+total_api_calls = sum(result.requests for result in cell_results)
+print(f"Searched {len(cell_results)} cells")
 
 # Track unique places using Places_ID
 unique_places = set()
 all_pharmacy_data = []
-grid_point_count = 0
-total_api_calls = 0
+new_places_per_cell = []
 
-# Search around each grid point
-for point in grid_points:
-    grid_point_count += 1
-    lat, lon = point['latitude'], point['longitude']
-    
-    print(f"Searching grid point {grid_point_count}/{len(grid_points)} "
-          f"(Lat: {lat:.3f}, Lon: {lon:.3f})")
-    
-    # Search for pharmacies around this point
-    places = search_around_point(url, headers, lat, lon, radius_meters=40000)  # ~25 mile radius
-    total_api_calls += 1
-    
+for result in cell_results:
     new_places_count = 0
-    for place in places:
+    for place in result.places:
         place_data = extract_place_data(place)
         
         if place_data and place_data['Places_ID']:
             # Check if this is a new unique place
-            if place_data['Places_ID'] not in unique_places:
-                # Verify the place is actually in Ohio
-                if place_data['Geo']:
-                    try:
-                        place_lat, place_lon = map(float, place_data['Geo'].split(','))
-                        if is_in_ohio(place_lat, place_lon):
-                            unique_places.add(place_data['Places_ID'])
-                            all_pharmacy_data.append(place_data)
-                            new_places_count += 1
-                    except ValueError:
-                        continue
-    
-    print(f"  Found {len(places)} total places, {new_places_count} new unique Ohio pharmacies")
-    print(f"  Running total: {len(all_pharmacy_data)} unique pharmacies")
-    
-    # Rate limiting - wait between grid points
-    if grid_point_count % 5 == 0:  # Longer pause every 5 points
-        print("  Taking a longer break to respect API limits...")
-        time.sleep(5)
-    else:
-        time.sleep(2)
+            # Places outside Ohio were already dropped by the state filter
+            if place_data['Places_ID'] not in unique_places and place_data['Geo']:
+                unique_places.add(place_data['Places_ID'])
+                all_pharmacy_data.append(place_data)
+                new_places_count += 1
+    new_places_per_cell.append(new_places_count)
+
+# Save the per-cell results so coverage can be checked
+cells = cells_frame(cell_results)
+cells['New_Places'] = new_places_per_cell
+atomic_write_csv(cells, "ohio-pharmacy-search-cells.csv")
+print(f"Cell results saved to ohio-pharmacy-search-cells.csv ({cells['Saturated'].sum()} saturated, "
+      f"{int((cells['Saturated'] & ~cells['Split']).sum())} left unsplit, {cells['Failed'].sum()} failed)")
 
 # Convert to DataFrame
 if all_pharmacy_data:
@@ -236,7 +106,7 @@ else:
 
 # Final results
 print(f"\n=== COLLECTION COMPLETE ===")
-print(f"Grid points searched: {len(grid_points)}")
+print(f"Cells searched: {len(cell_results)}")
 print(f"Total API calls made: {total_api_calls}")
 print(f"Unique pharmacies found: {len(all_pharmacy_data)}")
 print(f"DataFrame shape: {df.shape}")
@@ -248,7 +118,9 @@ if not df.empty:
 
     # Save to CSV
     output_filename = "ohio-pharmacies.csv"
-    df.to_csv(output_filename, index=False)
+    atomic_write_csv(df, output_filename)
+    if not cells['Failed'].any():
+        journal.remove()  # Everything is merged; keep the journal only while failed cells need a rerun
     print(f"\nData saved to {output_filename}")
 
     # Display statistics
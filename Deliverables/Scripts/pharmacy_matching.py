@@ -0,0 +1,169 @@
+# Entity resolution between the Google Places pharmacies (Places_ID) and the Board of Pharmacy roster
+# (LicenseNumber). Candidate pairs come from blocking, not from comparing every place with every license:
+# two records are only compared when they share a ZCTA5 or lie in neighbouring grid cells. Each candidate
+# pair is then scored in bulk: name and street similarity are cosines of hashed character trigram vectors
+# (sparse row-wise products), and the haversine distance between the points.
+
+# Imports
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+from sklearn.feature_extraction.text import HashingVectorizer
+
+from address_parser import normalize_street
+from geo_utils import coordinates
+from nearest_facility import EARTH_RADIUS_MILES
+
+# Variables
+GRID_DEGREES = 0.01  # Blocking grid cell (~0.7 mi); neighbouring cells are compared too
+MAX_MILES = 0.5  # Distance score falls from 1 at 0 miles to 0 at this distance
+MATCH_THRESHOLD = 0.6  # Minimum combined score of an accepted match
+MIN_NAME_SCORE = 0.0  # Accepted matches must score above this on the name (a shared street alone is not enough)
+
+# Score weights (name, street, distance)
+WEIGHTS = (0.35, 0.4, 0.25)
+
+## Words that say nothing about which pharmacy a record is
+NAME_STOPWORDS = r'\b(?:PHARMACY|PHARMACIES|DRUG|DRUGS|STORE|STORES|INC|LLC|CORP|CORPORATION|CO|COMPANY|LTD|OF|OHIO|THE|RX)\b'
+
+_vectorizer = HashingVectorizer(analyzer='char_wb', ngram_range=(3, 3), n_features=2 ** 18,
+                                alternate_sign=False, norm='l2', lowercase=True)
+
+# Functions
+def clean_names(names: pd.Series) -> pd.Series:
+    """Uppercase names without store numbers, punctuation and generic words ('CVS PHARMACY #11049 ... LLC' -> 'CVS')."""
+    names = names.astype('string').str.upper().fillna('')
+    names = names.str.replace(r'#\s*\d+|\bNO\.?\s*\d+\b', ' ', regex=True)
+    names = names.str.replace(r'[^A-Z0-9 ]+', ' ', regex=True)
+    names = names.str.replace(NAME_STOPWORDS, ' ', regex=True)
+    return names.str.replace(r'\s+', ' ', regex=True).str.strip()
+
+
+def prepare(df: pd.DataFrame, id_column: str, name_columns: List[str], street_column: str,
+            zcta_column: Optional[str] = 'ZCTA5', geo_column: str = 'Geo') -> pd.DataFrame:
+    """
+    Standardize one side for matching.
+
+    Args:
+        df (pd.DataFrame): Roster
+        id_column (str): Identifier column (Places_ID, LicenseNumber)
+        name_columns (List[str]): Name columns; a pair scores its best matching name
+        street_column (str): Street line column
+        zcta_column (str): ZCTA5 column used for blocking (None to block by grid only)
+        geo_column (str): Coordinate column
+
+    Returns:
+        pd.DataFrame: 'id', 'name_<i>', 'street', 'zcta', 'latitude', 'longitude', 'cell_x', 'cell_y'
+    """
+    coords = coordinates(df, geo_column)
+    out = pd.DataFrame({'id': df[id_column].astype('string').to_numpy()})
+    for i, column in enumerate(name_columns):
+        out[f'name_{i}'] = clean_names(df[column]).to_numpy()
+    out['street'] = normalize_street(df[street_column].astype('string')).to_numpy()
+    zcta = df[zcta_column] if zcta_column and zcta_column in df.columns else pd.Series(pd.NA, index=df.index)
+    out['zcta'] = zcta.astype('string').str.extract(r'(\d{5})', expand=False).to_numpy()
+    out['latitude'] = coords['latitude'].to_numpy()
+    out['longitude'] = coords['longitude'].to_numpy()
+    out['cell_x'] = np.floor(out['longitude'] / GRID_DEGREES).astype('Int64')
+    out['cell_y'] = np.floor(out['latitude'] / GRID_DEGREES).astype('Int64')
+    return out
+
+
+def candidate_pairs(left: pd.DataFrame, right: pd.DataFrame) -> pd.DataFrame:
+    """
+    Blocked candidate pairs: same ZCTA5, or grid cells at most one cell apart.
+
+    Returns:
+        pd.DataFrame: 'left' and 'right' row positions, one row per distinct pair
+    """
+    l = left[['zcta', 'cell_x', 'cell_y']].assign(left=np.arange(len(left)))
+    r = right[['zcta', 'cell_x', 'cell_y']].assign(right=np.arange(len(right)))
+
+    by_zcta = l.dropna(subset=['zcta']).merge(r.dropna(subset=['zcta']), on='zcta')[['left', 'right']]
+
+    # Shift the right side into each of the 9 neighbouring cells and join on the cell
+    r_cells = r.dropna(subset=['cell_x', 'cell_y'])
+    shifted = pd.concat([r_cells.assign(cell_x=r_cells['cell_x'] + dx, cell_y=r_cells['cell_y'] + dy)
+                         for dx in (-1, 0, 1) for dy in (-1, 0, 1)])
+    by_cell = l.dropna(subset=['cell_x', 'cell_y']).merge(shifted, on=['cell_x', 'cell_y'])[['left', 'right']]
+
+    return pd.concat([by_zcta, by_cell]).drop_duplicates(ignore_index=True)
+
+
+def _pair_cosine(left_text: pd.Series, right_text: pd.Series, li: np.ndarray, ri: np.ndarray) -> np.ndarray:
+    """Trigram cosine of left_text[li] and right_text[ri], pair by pair, as one sparse product."""
+    a = _vectorizer.transform(left_text.fillna('').to_numpy())
+    b = _vectorizer.transform(right_text.fillna('').to_numpy())
+    return np.asarray(a[li].multiply(b[ri]).sum(axis=1)).ravel()
+
+
+def haversine_miles(lat1, lon1, lat2, lon2) -> np.ndarray:
+    """Great-circle distance in miles between paired points (arrays in degrees)."""
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(a, dtype='float64')) for a in (lat1, lon1, lat2, lon2))
+    h = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_MILES * np.arcsin(np.sqrt(h))
+
+
+def score_pairs(left: pd.DataFrame, right: pd.DataFrame, pairs: pd.DataFrame) -> pd.DataFrame:
+    """
+    Score candidate pairs.
+
+    Returns:
+        pd.DataFrame: pairs plus 'name_score', 'street_score', 'miles' and the weighted 'score' (0-1)
+    """
+    li, ri = pairs['left'].to_numpy(), pairs['right'].to_numpy()
+    left_names = [c for c in left.columns if c.startswith('name_')]
+    right_names = [c for c in right.columns if c.startswith('name_')]
+    name_score = np.zeros(len(pairs))
+    for lc in left_names:
+        for rc in right_names:
+            name_score = np.maximum(name_score, _pair_cosine(left[lc], right[rc], li, ri))
+
+    street_score = _pair_cosine(left['street'], right['street'], li, ri)
+    miles = haversine_miles(left['latitude'].to_numpy()[li], left['longitude'].to_numpy()[li],
+                            right['latitude'].to_numpy()[ri], right['longitude'].to_numpy()[ri])
+    distance_score = np.nan_to_num(np.clip(1 - miles / MAX_MILES, 0, 1))
+
+    w_name, w_street, w_distance = WEIGHTS
+    return pairs.assign(
+        name_score=name_score.round(4),
+        street_score=street_score.round(4),
+        miles=miles.round(4),
+        score=(w_name * name_score + w_street * street_score + w_distance * distance_score).round(4),
+    )
+
+
+def one_to_one(scored: pd.DataFrame, threshold: float = MATCH_THRESHOLD) -> pd.DataFrame:
+    """
+    Keep at most one match per record on each side.
+
+    In each round, pairs that are the best candidate of both their records are accepted and their
+    records removed, until no candidate above the threshold is left. Pairs whose names share nothing
+    (name_score not above MIN_NAME_SCORE, e.g. a pharmacist listed at a chain store's address) are never accepted.
+    """
+    eligible = (scored['score'] >= threshold) & (scored['name_score'] > MIN_NAME_SCORE)
+    pending = scored[eligible].sort_values('score', ascending=False, kind='stable')
+    accepted = []
+    while len(pending):
+        best = pending.drop_duplicates('left').drop_duplicates('right')
+        mutual = best.merge(pending.drop_duplicates('right')[['left', 'right']], on=['left', 'right'])
+        accepted.append(mutual)
+        pending = pending[~pending['left'].isin(mutual['left']) & ~pending['right'].isin(mutual['right'])]
+    return pd.concat(accepted, ignore_index=True) if accepted else scored.iloc[:0]
+
+
+def match_records(left: pd.DataFrame, right: pd.DataFrame, threshold: float = MATCH_THRESHOLD) -> pd.DataFrame:
+    """
+    Match two prepared rosters (see prepare).
+
+    Returns:
+        pd.DataFrame: 'left_id', 'right_id', 'score', 'name_score', 'street_score' and 'miles', best first
+    """
+    pairs = candidate_pairs(left, right)
+    print(f"Comparing {len(pairs)} blocked candidate pairs (of {len(left) * len(right)} possible)")
+    matches = one_to_one(score_pairs(left, right, pairs), threshold)
+    matches = matches.assign(left_id=left['id'].to_numpy()[matches['left']],
+                             right_id=right['id'].to_numpy()[matches['right']])
+    return matches[['left_id', 'right_id', 'score', 'name_score', 'street_score', 'miles']].sort_values(
+        'score', ascending=False, ignore_index=True)
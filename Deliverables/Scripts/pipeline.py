@@ -0,0 +1,335 @@
+# Enrichment pipeline runner.
+# Declares the roster enrichment scripts (address-to-coords -> coords-to-zcta -> coords-geo-match /
+# insurance-match / hh-income-match / find-tract -> life-expectancy) as a DAG of stages that pass one
+# DataFrame in memory.
+# Each stage's results are memoized per row, keyed by a hash of the row's input columns; a stage's
+# memo is dropped when its code or data files change. Rerunning after a one-row edit only recomputes
+# that row in the stages whose inputs it touched.
+
+# Imports
+import ast
+import hashlib
+import inspect
+import json
+import marshal
+import os
+import pickle
+import textwrap
+import time
+from dataclasses import dataclass, field
+from graphlib import TopologicalSorter
+from pathlib import Path
+from typing import Callable, Iterable, List, Optional, Sequence, Set
+
+import pandas as pd
+
+from geo_utils import DATA_DIR, GEO_DIR
+
+# Variables
+PIPELINE_CACHE_DIR = DATA_DIR / 'Cache' / 'pipeline'
+SCRIPTS_DIR = Path(__file__).parent
+ZCTA_DIR = DATA_DIR / 'ZCTA'
+
+# Functions
+def file_digest(path: Path) -> str:
+    """
+    SHA-256 of a file's content.
+
+    Digests are remembered per (path, size, mtime) so large boundary files are only
+    re-read when they actually change on disk.
+    """
+    path = Path(path)
+    if not path.exists():
+        return 'missing'
+
+    stat = path.stat()
+    memo_file = PIPELINE_CACHE_DIR / 'file-digests.json'
+    memo = json.loads(memo_file.read_text()) if memo_file.exists() else {}
+    key = f"{path.resolve()}|{stat.st_size}|{stat.st_mtime_ns}"
+    if key not in memo:
+        h = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                h.update(block)
+        memo[key] = h.hexdigest()
+        memo_file.parent.mkdir(parents=True, exist_ok=True)
+        memo_file.write_text(json.dumps(memo, indent=1))
+    return memo[key]
+
+
+def local_imports(source: str) -> Set[str]:
+    """Names of the Scripts modules a piece of source imports, including imports inside functions."""
+    names = set()
+    for node in ast.walk(ast.parse(textwrap.dedent(source))):
+        if isinstance(node, ast.Import):
+            names.update(alias.name.split('.')[0] for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            names.add(node.module.split('.')[0])
+    return {name for name in names if (SCRIPTS_DIR / f"{name}.py").exists()}
+
+
+def module_closure(modules: Iterable[str]) -> List[str]:
+    """The given Scripts modules plus every Scripts module they import, directly or not."""
+    seen, pending = set(), list(modules)
+    while pending:
+        module = pending.pop()
+        if module not in seen:
+            seen.add(module)
+            pending.extend(local_imports((SCRIPTS_DIR / f"{module}.py").read_text(encoding='utf-8')))
+    return sorted(seen)
+
+
+# Classes
+@dataclass
+class Stage:
+    """One enrichment step: reads `inputs` columns, returns a frame with `outputs` columns for the same rows."""
+    name: str
+    func: Callable[[pd.DataFrame], pd.DataFrame]
+    inputs: List[str]
+    outputs: List[str]
+    depends_on: List[str] = field(default_factory=list)
+    files: List[Path] = field(default_factory=list)     # Data files the stage reads
+    modules: List[str] = field(default_factory=list)    # Helper modules (in Scripts) the stage calls; their imports are followed
+
+    def digest(self) -> str:
+        """
+        Hash of the stage's code, helper modules and data files; a change invalidates the memo.
+
+        Besides `modules`, every Scripts module the stage function or those modules import (directly
+        or through other helpers, e.g. geocode_cache and async_client) is hashed.
+        """
+        h = hashlib.sha256()
+        modules = set(self.modules)
+        try:
+            source = inspect.getsource(self.func)
+            h.update(source.encode())
+            modules |= local_imports(source)
+        except OSError:  # Defined interactively, fall back to the bytecode
+            h.update(marshal.dumps(self.func.__code__))
+        for module in module_closure(modules):
+            h.update(module.encode())
+            h.update((SCRIPTS_DIR / f"{module}.py").read_bytes())
+        for path in self.files:
+            h.update(str(path).encode())
+            h.update(file_digest(path).encode())
+        return h.hexdigest()
+
+
+class Pipeline:
+    """Runs stages in dependency order with per-row memoization."""
+
+    def __init__(self, stages: Sequence[Stage], cache_dir: Path = PIPELINE_CACHE_DIR):
+        self.stages = {stage.name: stage for stage in stages}
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def order(self) -> List[str]:
+        """Topological order of the stages."""
+        graph = {name: set(stage.depends_on) for name, stage in self.stages.items()}
+        return list(TopologicalSorter(graph).static_order())
+
+    def _memo_path(self, stage: Stage) -> Path:
+        return self.cache_dir / f"{stage.name}.pkl"
+
+    def _load_memo(self, stage: Stage, digest: str) -> pd.DataFrame:
+        path = self._memo_path(stage)
+        if path.exists():
+            with open(path, 'rb') as f:
+                saved_digest, memo = pickle.load(f)
+            if saved_digest == digest:
+                return memo
+            print(f"  [{stage.name}] code or data changed, recomputing every row")
+        return pd.DataFrame(columns=stage.outputs, index=pd.Index([], dtype='uint64'))
+
+    def _save_memo(self, stage: Stage, digest: str, memo: pd.DataFrame):
+        # Write then rename so an interrupted run never leaves a truncated memo behind
+        path = self._memo_path(stage)
+        tmp = path.with_suffix('.tmp')
+        with open(tmp, 'wb') as f:
+            pickle.dump((digest, memo), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+
+    def run_stage(self, stage: Stage, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Run one stage, computing only rows whose inputs were not seen before.
+
+        Rows whose outputs are all missing (a failed geocode, ZCTA or block lookup) are returned but not
+        memoized, so the next run retries them, like GeocodeCache does with failed lookups.
+        """
+        start = time.perf_counter()
+        digest = stage.digest()
+        memo = self._load_memo(stage, digest)
+
+        row_keys = pd.util.hash_pandas_object(df[stage.inputs], index=False).to_numpy()
+        todo = ~pd.Index(row_keys).isin(memo.index)
+        # Rows with identical inputs are only computed once
+        todo_rows = df.loc[todo].assign(_row_key=row_keys[todo]).drop_duplicates('_row_key')
+
+        values, failed = memo, 0
+        if len(todo_rows):
+            result = stage.func(todo_rows.drop(columns='_row_key'))[stage.outputs]
+            result.index = pd.Index(todo_rows['_row_key'].to_numpy(), dtype='uint64')
+            found = result.notna().any(axis=1).to_numpy()
+            failed = int((~found).sum())
+            if found.any():
+                memo = pd.concat([memo, result[found]]) if len(memo) else result[found]
+                self._save_memo(stage, digest, memo)
+            values = pd.concat([memo, result[~found]]) if failed else memo
+
+        out = df.drop(columns=[c for c in stage.outputs if c in df.columns])
+        values = values.reindex(pd.Index(row_keys, dtype='uint64'))
+        for col in stage.outputs:
+            out[col] = values[col].to_numpy()
+
+        elapsed = (time.perf_counter() - start) * 1000
+        retry = f", {failed} without a result (retried next run)" if failed else ''
+        print(f"  [{stage.name}] {len(todo_rows)} computed, {len(df) - todo.sum()} reused{retry} ({elapsed:.1f} ms)")
+        return out
+
+    def run(self, df: pd.DataFrame, targets: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """
+        Run the pipeline over a roster.
+
+        Args:
+            df (pd.DataFrame): Input roster
+            targets (Sequence[str]): Only run these stages and their upstream stages (default: all)
+
+        Returns:
+            pd.DataFrame: The roster with every stage's output columns
+        """
+        needed = None
+        if targets:
+            needed, pending = set(), list(targets)
+            while pending:
+                name = pending.pop()
+                if name not in needed:
+                    needed.add(name)
+                    pending.extend(self.stages[name].depends_on)
+
+        print(f"Running pipeline over {len(df)} rows...")
+        for name in self.order():
+            if needed is None or name in needed:
+                df = self.run_stage(self.stages[name], df)
+        return df
+
+
+# Stage implementations
+def geocode_stage(df: pd.DataFrame) -> pd.DataFrame:
+    from dotenv import find_dotenv, load_dotenv
+    from api_lookups import geocode_addresses
+    from geocode_cache import GeocodeCache
+
+    load_dotenv(find_dotenv())
+    with GeocodeCache() as cache:
+        coords = geocode_addresses(df['Full Address'], os.environ.get('GEO_API_KEY', ''), cache=cache)
+        cache.report()
+    # Float coordinates for the later stages, plus "(lat, lon)" text like the existing CSVs
+    return pd.DataFrame({
+        'Geo': [str(c) if c is not None else None for c in coords],
+        'latitude': [c[0] if c is not None else float('nan') for c in coords],
+        'longitude': [c[1] if c is not None else float('nan') for c in coords],
+    }, index=df.index)
+
+
+def zcta_stage(df: pd.DataFrame) -> pd.DataFrame:
+    from zcta_resolver import ZCTA_FILE, add_zcta_column
+
+    if ZCTA_FILE.exists():
+        return add_zcta_column(df[['latitude', 'longitude']])
+
+    from api_lookups import census_zcta
+    from geocode_cache import GeocodeCache
+    coords = df[['latitude', 'longitude']]
+    valid = coords['latitude'].notna()
+    out = pd.DataFrame({'ZCTA5': None}, index=df.index)
+    with GeocodeCache() as cache:
+        out.loc[valid, 'ZCTA5'] = census_zcta(coords.loc[valid, 'latitude'], coords.loc[valid, 'longitude'], cache=cache)
+    return out
+
+
+def precinct_stage(df: pd.DataFrame) -> pd.DataFrame:
+    from precinct_index import resolve_precincts
+
+    results = resolve_precincts(df['latitude'], df['longitude'])
+    results.index = df.index
+    return results
+
+
+def insurance_stage(df: pd.DataFrame) -> pd.DataFrame:
+    from acs_loader import acs_wide, load_acs, merge_acs
+
+    insured = acs_wide(load_acs(ZCTA_DIR / 'ACSST5Y2023-health-Insurance-coverage-zcta.csv'), {
+        "TotalPop": ("Civilian noninstitutionalized population", "Total"),
+        "PopInsured": ("Civilian noninstitutionalized population", "Insured"),
+    })
+    return merge_acs(df[['ZCTA5']], insured)
+
+
+def income_stage(df: pd.DataFrame) -> pd.DataFrame:
+    from acs_loader import acs_wide, load_acs, merge_acs
+
+    income = acs_wide(load_acs(ZCTA_DIR / 'ACSST5Y2023-household-income-zcta.csv'), {
+        'Median_Income_Dollars': ('Median income (dollars)', 'Households'),
+        'Mean_Income_Dollars': ('Mean income (dollars)', 'Households'),
+    })
+    return merge_acs(df[['ZCTA5']], income)
+
+
+def tract_stage(df: pd.DataFrame) -> pd.DataFrame:
+    from tract_resolver import BLOCK_FILE, add_block_columns, split_block_fips
+
+    if BLOCK_FILE.exists():
+        return add_block_columns(df[['latitude', 'longitude']])
+
+    from api_lookups import fcc_block_fips
+    from geocode_cache import GeocodeCache
+    coords = df[['latitude', 'longitude']]
+    valid = coords['latitude'].notna()
+    with GeocodeCache() as cache:
+        found = fcc_block_fips(coords.loc[valid, 'latitude'], coords.loc[valid, 'longitude'], cache=cache)
+    blocks = pd.Series(found, index=df.index[valid], dtype='string').reindex(df.index)
+    return split_block_fips(blocks)
+
+
+def life_expectancy_stage(df: pd.DataFrame) -> pd.DataFrame:
+    from life_expectancy import join_life_expectancy
+
+    return join_life_expectancy(df[['Census_Tract_Code']])
+
+
+def build_stages() -> List[Stage]:
+    """The roster enrichment chain, one stage per script."""
+    return [
+        Stage('address-to-coords', geocode_stage, inputs=['Full Address'], outputs=['Geo', 'latitude', 'longitude'],
+              modules=['api_lookups', 'async_client', 'address_parser']),
+        Stage('coords-to-zcta', zcta_stage, inputs=['latitude', 'longitude'], outputs=['ZCTA5'], depends_on=['address-to-coords'],
+              files=[GEO_DIR / 'tl_2020_us_zcta520.zip'], modules=['zcta_resolver', 'geo_utils', 'api_lookups']),
+        Stage('coords-geo-match', precinct_stage, inputs=['latitude', 'longitude'], outputs=['GEOID', 'votes_dem', 'votes_rep', 'pct_dem_lead'],
+              depends_on=['address-to-coords'], files=[GEO_DIR / 'precincts-with-results.geojson'],
+              modules=['precinct_index', 'geo_utils', 'geo_keys']),
+        Stage('insurance-match', insurance_stage, inputs=['ZCTA5'], outputs=['TotalPop', 'PopInsured'],
+              depends_on=['coords-to-zcta'], files=[ZCTA_DIR / 'ACSST5Y2023-health-Insurance-coverage-zcta.csv'],
+              modules=['acs_loader', 'geo_keys']),
+        Stage('hh-income-match', income_stage, inputs=['ZCTA5'], outputs=['Median_Income_Dollars', 'Mean_Income_Dollars'],
+              depends_on=['coords-to-zcta'], files=[ZCTA_DIR / 'ACSST5Y2023-household-income-zcta.csv'],
+              modules=['acs_loader', 'geo_keys']),
+        Stage('find-tract', tract_stage, inputs=['latitude', 'longitude'], outputs=['Census_Tract_Code', 'Block_Group_FIPS', 'Block_FIPS'],
+              depends_on=['address-to-coords'], files=[GEO_DIR / 'tl_2020_39_tabblock20.zip'],
+              modules=['tract_resolver', 'geo_utils', 'geo_keys', 'api_lookups']),
+        Stage('life-expectancy', life_expectancy_stage, inputs=['Census_Tract_Code'], outputs=['Life_Expectancy', 'Life_Exp_Source'],
+              depends_on=['find-tract'], files=[DATA_DIR / 'ohio-life-exp-census-2023.csv', GEO_DIR / 'CenPop2020_Mean_BG39.txt'],
+              modules=['life_expectancy', 'crosswalk', 'nearest_facility', 'geo_keys']),
+    ]
+
+
+def add_full_address(df: pd.DataFrame, street: str, city: str, zip_code: str, state: Optional[str] = None) -> pd.DataFrame:
+    """
+    Concatenate the roster's address columns into 'Full Address' ("Street, City, OH Zip").
+
+    Rows missing any component get <NA> rather than an address containing 'nan', so they are not geocoded.
+    """
+    state_values = df[state].astype('string') if state else 'OH'
+    out = df.copy()
+    out['Full Address'] = (df[street].astype('string') + ', ' + df[city].astype('string') + ', '
+                           + state_values + ' ' + df[zip_code].astype('string'))
+    return out
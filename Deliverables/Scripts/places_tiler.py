@@ -0,0 +1,231 @@
+# Adaptive quadtree tiling for the Places text searches in pharmacy-extraction.py.
+# One search returns at most 60 places (3 pages of 20), so a fixed grid silently misses places in dense
+# cities and wastes calls in empty or out-of-state cells. Here every search is restricted to a rectangular
+# cell; a cell whose search hits the cap is split into four and searched again, and cells lying entirely
+# outside the state boundary are never searched. Places returned from the parts of a border cell that lie
+# outside the state can be dropped as each cell finishes (see search_region).
+
+# Imports
+import asyncio
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import shapely
+
+from async_client import PROVIDERS, AsyncAPIClient, ProviderConfig
+from checkpoint import Journal
+from geo_utils import StateFilter
+
+# Variables
+PAGE_SIZE = 20
+MAX_PAGES = 3
+MAX_RESULTS = PAGE_SIZE * MAX_PAGES  # Places text search cap per query
+MAX_DEPTH = 8  # Ohio's bounding box split 8 times gives cells of ~1.5 km
+JOURNAL_BATCH = 50  # Cells searched between journal writes
+
+# Classes
+@dataclass(frozen=True)
+class Cell:
+    """Rectangular search cell in degrees; depth counts the splits from the root cell."""
+    west: float
+    south: float
+    east: float
+    north: float
+    depth: int = 0
+
+    def box(self):
+        return shapely.box(self.west, self.south, self.east, self.north)
+
+    def rectangle(self) -> Dict:
+        """Places API locationRestriction rectangle for this cell."""
+        return {
+            "low": {"latitude": self.south, "longitude": self.west},
+            "high": {"latitude": self.north, "longitude": self.east},
+        }
+
+    def key(self) -> str:
+        """Stable identifier used in the search journal."""
+        return f"{self.depth}/{self.west:.6f},{self.south:.6f},{self.east:.6f},{self.north:.6f}"
+
+    def split(self) -> List['Cell']:
+        """Quarter the cell."""
+        mid_lon = (self.west + self.east) / 2
+        mid_lat = (self.south + self.north) / 2
+        depth = self.depth + 1
+        return [
+            Cell(self.west, self.south, mid_lon, mid_lat, depth),
+            Cell(mid_lon, self.south, self.east, mid_lat, depth),
+            Cell(self.west, mid_lat, mid_lon, self.north, depth),
+            Cell(mid_lon, mid_lat, self.east, self.north, depth),
+        ]
+
+
+@dataclass
+class CellResult:
+    """Outcome of searching one cell."""
+    cell: Cell
+    places: List[Dict] = field(default_factory=list)
+    requests: int = 0
+    saturated: Optional[bool] = False  # The search hit MAX_RESULTS, so the cell may hold more places (None: search failed)
+    split: bool = False      # The cell was split and its children searched
+
+
+# Search function: cell -> (places, requests sent, saturated); saturated is None when the search failed
+CellSearch = Callable[[Cell], Awaitable[Tuple[List[Dict], int, bool]]]
+
+# Functions
+async def search_cell(client: AsyncAPIClient, headers: Dict, cell: Cell, query: str = "pharmacy",
+                      included_type: Optional[str] = "pharmacy") -> Tuple[List[Dict], int, bool]:
+    """
+    Run one paged Places text search restricted to a cell.
+
+    Args:
+        client (AsyncAPIClient): Client for the google_places provider
+        headers (Dict): Request headers (API key and field mask, which must include nextPageToken)
+        cell (Cell): Area to search
+        query (str): Text query
+        included_type (str): Places type filter
+
+    Returns:
+        Tuple[List[Dict], int, bool]: Places found, requests sent, and whether the result cap was hit
+            (None if a request failed after its retries)
+    """
+    payload = {
+        "textQuery": query,
+        "pageSize": PAGE_SIZE,
+        "locationRestriction": {"rectangle": cell.rectangle()},
+    }
+    if included_type:
+        payload["includedType"] = included_type
+
+    places = []
+    next_page_token = None
+    for page in range(1, MAX_PAGES + 1):
+        if next_page_token:
+            payload["pageToken"] = next_page_token
+
+        data = await client.post_json(payload, headers=headers)
+        # A search without results returns {} (an empty, unsaturated page); None means the request failed
+        if data is None:
+            return places, page, None
+
+        places.extend(data.get('places', []))
+        next_page_token = data.get("nextPageToken")
+        if not next_page_token:
+            return places, page, len(places) >= MAX_RESULTS
+
+    # Pages left over after the last allowed page: the cell holds more places than one search returns
+    return places, MAX_PAGES, True
+
+
+def place_coordinates(places: List[Dict]) -> Tuple[np.ndarray, np.ndarray]:
+    """Latitude and longitude arrays of Places API results (NaN where a place has no location)."""
+    locations = [place.get('location') or {} for place in places]
+    lat = np.array([loc.get('latitude', np.nan) for loc in locations], dtype='float64')
+    lon = np.array([loc.get('longitude', np.nan) for loc in locations], dtype='float64')
+    return lat, lon
+
+
+async def tile_search(search: CellSearch, boundary, max_depth: int = MAX_DEPTH,
+                      journal: Optional[Journal] = None) -> List[CellResult]:
+    """
+    Search a region with an adaptive quadtree of cells.
+
+    Cells are searched level by level (JOURNAL_BATCH cells concurrently). Saturated cells are
+    split into four until max_depth; children lying entirely outside the boundary are dropped.
+    With a journal, finished cells are recorded after every batch and replayed instead of
+    searched again when an interrupted run is restarted.
+
+    Args:
+        search (CellSearch): Coroutine searching one cell (search_cell, or a stub in tests)
+        boundary (shapely.Geometry): Region to cover, e.g. geo_utils.load_state_boundary()
+        max_depth (int): Deepest level a cell is split to
+        journal (Journal): Optional journal of finished cells
+
+    Returns:
+        List[CellResult]: One result per searched cell, parents before children
+    """
+    shapely.prepare(boundary)
+    done = journal.load() if journal else {}
+    level = [Cell(*boundary.bounds)]
+    results = []
+
+    while level:
+        pending = [cell for cell in level if cell.key() not in done]
+        for start in range(0, len(pending), JOURNAL_BATCH):
+            batch = pending[start:start + JOURNAL_BATCH]
+            outcomes = await asyncio.gather(*(search(cell) for cell in batch))
+            finished = {cell.key(): list(outcome) for cell, outcome in zip(batch, outcomes)}
+            done.update(finished)
+            if journal:
+                # Failed cells stay out of the journal so a rerun searches them again
+                journal.append({key: outcome for key, outcome in finished.items() if outcome[2] is not None})
+
+        next_level = []
+        for cell in level:
+            places, requests, saturated = done[cell.key()]
+            result = CellResult(cell, places, requests, saturated)
+            if saturated and cell.depth < max_depth:
+                result.split = True
+                next_level.extend(child for child in cell.split() if boundary.intersects(child.box()))
+            elif saturated:
+                print(f"Cell {cell} is still saturated at depth {max_depth}; some places may be missing")
+            elif saturated is None:
+                print(f"Search failed for cell {cell}; rerun to retry it")
+            results.append(result)
+
+        if next_level:
+            print(f"Splitting {sum(r.split for r in results[-len(level):])} saturated cells into {len(next_level)} cells")
+        level = next_level
+    return results
+
+
+async def search_region(headers: Dict, boundary, max_depth: int = MAX_DEPTH,
+                        provider: ProviderConfig = PROVIDERS['google_places'],
+                        journal: Optional[Journal] = None,
+                        state_filter: Optional[StateFilter] = None) -> List[CellResult]:
+    """
+    Tile a region with Places searches through the shared rate limited client.
+
+    Args:
+        headers (Dict): Places request headers
+        boundary (shapely.Geometry): Region to cover
+        max_depth (int): Deepest split level
+        provider (ProviderConfig): Provider settings (swap the URL for a local stub with with_url)
+        journal (Journal): Optional journal of finished cells (see tile_search)
+        state_filter (StateFilter): If set, each cell keeps only the places inside the state polygon whose
+            formattedAddress names the state. Saturation is still judged on the unfiltered results
+
+    Returns:
+        List[CellResult]: Per-cell results (see tile_search)
+    """
+    async with AsyncAPIClient(provider) as client:
+        async def search(cell: Cell):
+            places, requests, saturated = await search_cell(client, headers, cell)
+            if state_filter is not None and places:
+                addresses = [place.get('formattedAddress') for place in places]
+                inside = state_filter.contains(*place_coordinates(places), addresses)
+                places = [place for place, keep in zip(places, inside) if keep]
+            return places, requests, saturated
+
+        results = await tile_search(search, boundary, max_depth, journal)
+        print(f"Places API requests sent: {client.requests_sent} ({client.retries} retries)")
+    return results
+
+
+def cells_frame(results: List[CellResult]) -> pd.DataFrame:
+    """Per-cell summary (bounds, depth, places, requests, saturated, split, failed) for saving alongside the places."""
+    return pd.DataFrame([{
+        'West': r.cell.west,
+        'South': r.cell.south,
+        'East': r.cell.east,
+        'North': r.cell.north,
+        'Depth': r.cell.depth,
+        'Places': len(r.places),
+        'Requests': r.requests,
+        'Saturated': bool(r.saturated),
+        'Split': r.split,
+        'Failed': r.saturated is None,
+    } for r in results])
@@ -0,0 +1,135 @@
+# Prebuilt Ohio precinct index for the 2020 presidential results.
+# Source: precincts-with-results.geojson from https://github.com/TheUpshot/presidential-precinct-map-2020 (save under Data/Geo)
+# The national file is read once, filtered to Ohio and saved as GeoParquet; later runs load only that file.
+
+# Imports
+from pathlib import Path
+from typing import Optional
+
+import geopandas as gpd
+import pandas as pd
+
+from geo_keys import precinct_keys
+from geo_utils import GEO_DIR, OHIO_BBOX, PolygonIndex, coordinates
+
+# Variables
+PRECINCT_SOURCE = GEO_DIR / 'precincts-with-results.geojson'
+PRECINCT_FILE = GEO_DIR / 'ohio-precincts.parquet'
+PRECINCT_KEY = 'GEOID'
+PRECINCT_COLUMNS = ['GEOID', 'votes_dem', 'votes_rep', 'pct_dem_lead']
+OHIO_PREFIX = '39'  # Ohio state FIPS; precinct GEOIDs look like '39143-GIBSONBURG B'
+
+NEAREST_DISTANCE = 0.01  # Degrees (~1 km); points in gaps between precincts get the nearest one within this
+
+_precinct_index = None  # Loaded once per process
+
+# Functions
+def build_precinct_file(source: Path = PRECINCT_SOURCE, dest: Path = PRECINCT_FILE) -> gpd.GeoDataFrame:
+    """
+    Filter the national precinct results to Ohio and save them as GeoParquet.
+
+    Rows are stored in Hilbert curve order so neighbouring precincts sit next to each other
+    in the file and in the packed STR-tree built on load.
+
+    Args:
+        source (Path): National precincts-with-results.geojson
+        dest (Path): Destination .parquet file
+
+    Returns:
+        gpd.GeoDataFrame: Ohio precincts with PRECINCT_COLUMNS and geometry
+    """
+    if not Path(source).exists():
+        raise FileNotFoundError(f"Precinct file '{source}' not found")
+
+    print(f"Building Ohio precinct file from {source}...")
+    gdf = gpd.read_file(source, bbox=OHIO_BBOX, columns=PRECINCT_COLUMNS)
+    gdf = gdf[gdf[PRECINCT_KEY].astype(str).str.startswith(OHIO_PREFIX)]
+    gdf = gdf.set_crs(epsg=4326) if gdf.crs is None else gdf.to_crs(epsg=4326)
+
+    gdf = gdf.iloc[gdf.hilbert_distance().argsort()]
+    gdf = gdf[PRECINCT_COLUMNS + ['geometry']].reset_index(drop=True)
+
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    gdf.to_parquet(dest, compression='zstd', write_covering_bbox=True)
+    print(f"Saved {len(gdf)} Ohio precincts to {dest}")
+    return gdf
+
+
+def load_precinct_index(path: Path = PRECINCT_FILE, source: Path = PRECINCT_SOURCE) -> PolygonIndex:
+    """
+    Load the Ohio precinct file (building it first if it is missing or older than the source) and index it.
+
+    Args:
+        path (Path): GeoParquet written by build_precinct_file
+        source (Path): National geojson used when the file has to be (re)built
+
+    Returns:
+        PolygonIndex: Index keyed by precinct GEOID, with the vote columns as its attributes
+    """
+    global _precinct_index
+    if _precinct_index is None:
+        if not path.exists() or (source.exists() and source.stat().st_mtime > path.stat().st_mtime):
+            gdf = build_precinct_file(source, path)
+        else:
+            gdf = gpd.read_parquet(path)
+        # Categorical GEOID: 'DDDDD-NAME' strings are stored once per precinct, not once per matched point
+        attributes = pd.DataFrame(gdf[PRECINCT_COLUMNS]).assign(GEOID=precinct_keys(gdf[PRECINCT_KEY])['GEOID'].array)
+        _precinct_index = PolygonIndex(gdf, PRECINCT_KEY, attributes)
+        print(f"Indexed {len(_precinct_index)} precincts")
+    return _precinct_index
+
+
+def resolve_precincts(latitude, longitude, index: Optional[PolygonIndex] = None,
+                      max_distance: Optional[float] = NEAREST_DISTANCE) -> pd.DataFrame:
+    """
+    Look up the precinct and 2020 results for arrays of coordinates in one call.
+
+    Args:
+        latitude (array-like): Point latitudes
+        longitude (array-like): Point longitudes
+        index (PolygonIndex): Prebuilt precinct index (defaults to the shared one)
+        max_distance (float): Nearest-precinct fallback distance in degrees; None disables it
+
+    Returns:
+        pd.DataFrame: Categorical 'GEOID', 'votes_dem', 'votes_rep' and 'pct_dem_lead', missing where no
+            precinct matched (geo_keys.precinct_keys gives the county key of a GEOID)
+    """
+    if index is None:
+        # The module paths are read at call time, so they can be pointed at another file (see benchmark_suite)
+        index = load_precinct_index(PRECINCT_FILE, PRECINCT_SOURCE)
+
+    # Points outside every precinct get the nearest one in the same query
+    idx = index.lookup_indices(latitude, longitude, max_distance)
+
+    found = idx >= 0
+    out = index.attributes.iloc[idx[found]].reset_index(drop=True)
+    out.index = found.nonzero()[0]
+    out = out.reindex(range(len(idx)))
+
+    # Keep vote counts as integers even when some points are unmatched
+    for col in ['votes_dem', 'votes_rep']:
+        out[col] = out[col].astype('Int64')
+    return out
+
+
+def add_precinct_columns(df: pd.DataFrame, geo_column: str = 'Geo', index: Optional[PolygonIndex] = None) -> pd.DataFrame:
+    """
+    Add 'GEOID', 'votes_dem', 'votes_rep' and 'pct_dem_lead' columns to a DataFrame of coordinates.
+
+    Drop-in replacement for the gpd.sjoin in coords-geo-match.py.
+
+    Args:
+        df (pd.DataFrame): Input rows with a coordinate column
+        geo_column (str): Name of the coordinate string column (used when there are no float columns)
+        index (PolygonIndex): Prebuilt precinct index (defaults to the shared one)
+
+    Returns:
+        pd.DataFrame: Copy of df with the precinct columns
+    """
+    coords = coordinates(df, geo_column)
+    results = resolve_precincts(coords['latitude'], coords['longitude'], index)
+
+    out = df.copy()
+    for col in PRECINCT_COLUMNS:
+        out[col] = results[col].array
+    return out
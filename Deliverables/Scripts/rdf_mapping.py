@@ -0,0 +1,377 @@
+# Declarative CSV-to-RDF mappings.
+# Every dataset is described by one YAML file in Deliverables/Mappings (format in the README there):
+# where its rows come from, the derived columns, and for each subject an IRI template, its classes and
+# column -> predicate mappings. compile_mapping turns a config into column-level term builders once, up
+# front, so converting a chunk is a few vectorized string operations per mapped column (see rdf_stream).
+
+# Imports
+import re
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+import pandas as pd
+import yaml
+from rdflib import RDF, XSD
+
+from acs_loader import clean_numeric, load_acs
+from geo_utils import DATA_DIR, parse_geo_column
+from region_join import LEVELS, resolve_regions, within_lines
+from rdf_stream import (CHUNK_ROWS, TripleWriter, _on_unique, date_terms, encode_local, iri, iri_terms,
+                        literal_terms, pfs, triple_lines)
+
+# Variables
+MAPPING_DIR = Path(__file__).parent.parent / 'Mappings'
+LOADERS = ('csv', 'acs')
+
+INTEGER_TYPES = {str(XSD[t]) for t in ('integer', 'int', 'long', 'nonNegativeInteger', 'positiveInteger')}
+DECIMAL_TYPES = {str(XSD[t]) for t in ('decimal', 'double', 'float')}
+
+_FIELD = re.compile(r"\{([^{}]+)\}")
+_CURIE = re.compile(r"^([A-Za-z][\w-]*):(.*)$")
+
+# Builder: chunk -> one term (or derived value) per row
+TermBuilder = Callable[[pd.DataFrame], pd.Series]
+
+# Functions
+def expand(name: str, prefixes: Dict = pfs) -> str:
+    """
+    Expand a prefixed name ('kl-ont:hasName') or '<full IRI>' to a full IRI string.
+
+    Raises:
+        ValueError: For an unknown prefix
+    """
+    name = name.strip()
+    if name.startswith('<') and name.endswith('>'):
+        return name[1:-1]
+    if name.startswith(('http://', 'https://')):
+        return name
+    match = _CURIE.match(name)
+    if not match or match.group(1) not in prefixes:
+        raise ValueError(f"Unknown prefix in '{name}' (known: {', '.join(prefixes)})")
+    return str(prefixes[match.group(1)]) + match.group(2)
+
+
+def compile_template(template: str) -> Tuple[Union[TermBuilder, str], List[str]]:
+    """
+    Compile an IRI template such as 'kl-res:license.{License: Number}'.
+
+    Each {column} is replaced by the column's percent-encoded value; a row with any missing field
+    gets no term. A template without fields is a constant IRI.
+
+    Returns:
+        Tuple: (builder, or the constant '<iri>' term), columns used
+    """
+    pieces = _FIELD.split(expand(template))
+    texts, columns = pieces[0::2], pieces[1::2]
+    if not columns:
+        return iri(texts[0]), []
+    if len(columns) == 1:
+        base, suffix = texts
+        return (lambda df: iri_terms(base, df[columns[0]], suffix)), columns
+
+    def build(df):
+        out = texts[0] + encode_local(df[columns[0]])
+        for column, text in zip(columns[1:], texts[1:]):
+            out = out + text + encode_local(df[column])
+        return '<' + out + texts[-1] + '>'
+    return build, columns
+
+
+def numeric_lexical(values: pd.Series, datatype: str) -> pd.Series:
+    """Lexical forms for numeric literals: ACS-style strings are cleaned, integers are rounded."""
+    numbers = values if pd.api.types.is_numeric_dtype(values) else clean_numeric(values)
+    if datatype in INTEGER_TYPES:
+        return numbers.round().astype('Int64').astype('string')
+    return numbers.astype('string')
+
+
+def compile_literal(spec: Dict) -> Tuple[TermBuilder, List[str]]:
+    """
+    Compile a literal object spec: {column, datatype, lang, format, map}.
+
+    'format' is the strptime format of xsd:date columns; 'map' translates raw values first
+    (e.g. {1: true, 0: false} for an xsd:boolean column).
+    """
+    column = spec['column']
+    datatype = expand(spec['datatype']) if spec.get('datatype') else None
+    lang = spec.get('lang')
+    value_map = None
+    if 'map' in spec:
+        value_map = {str(k): (str(v).lower() if isinstance(v, bool) else str(v)) for k, v in spec['map'].items()}
+
+    if datatype == str(XSD.date):
+        date_format = spec.get('format', '%m/%d/%Y')
+        convert = lambda values: date_terms(values, date_format)
+    elif datatype in INTEGER_TYPES | DECIMAL_TYPES:
+        convert = lambda values: literal_terms(numeric_lexical(values, datatype), datatype)
+    else:
+        convert = lambda values: literal_terms(values, datatype, lang)
+
+    def build(df):
+        values = df[column]
+        if value_map:
+            values = values.astype('string').str.strip().map(value_map)
+        return convert(values)
+    return build, [column]
+
+
+def compile_object(spec: Union[str, Dict]) -> Tuple[Union[TermBuilder, str], List[str]]:
+    """Compile a property value: a column name (plain literal), {iri: template} or a literal spec."""
+    if isinstance(spec, str):
+        spec = {'column': spec}
+    if 'iri' in spec:
+        return compile_template(spec['iri'])
+    if 'column' not in spec:
+        raise ValueError(f"Property value needs 'column' or 'iri': {spec}")
+    return compile_literal(spec)
+
+
+## Derived columns
+def _joined(df: pd.DataFrame, columns: Union[str, List[str]]) -> pd.Series:
+    columns = [columns] if isinstance(columns, str) else columns
+    out = df[columns[0]].astype('string').fillna('')
+    for column in columns[1:]:
+        out = out + ' ' + df[column].astype('string').fillna('')
+    return out
+
+
+def derive_slug(columns: Union[str, List[str]]) -> TermBuilder:
+    """Lowercase text with runs of other characters collapsed to '-' (several columns are joined first)."""
+    slug = lambda s: s.str.lower().str.replace(r'[^a-z0-9]+', '-', regex=True).str.strip('-')
+    return lambda df: _on_unique(_joined(df, columns), slug).replace('', pd.NA)
+
+
+def derive_lookup(column: str, table: str, key: str, value: str) -> TermBuilder:
+    """Map a column through a two-column table in Data (read once, when the mapping is compiled)."""
+    lookup = pd.read_csv(DATA_DIR / table, dtype=str, encoding='utf-8-sig')
+    lookup = lookup.drop_duplicates(key).set_index(key)[value]
+    return lambda df: df[column].astype('string').str.strip().map(lookup).astype('string')
+
+
+def derive_wkt_point(column: str) -> TermBuilder:
+    """WKT 'POINT(lon lat)' from a '(lat, lon)' column."""
+    def build(df):
+        coords = parse_geo_column(df[column])
+        return 'POINT(' + coords['longitude'].astype('string') + ' ' + coords['latitude'].astype('string') + ')'
+    return build
+
+
+def derive_prefix(column: str, length: int) -> TermBuilder:
+    """The first length characters, e.g. the 11-digit tract of a 12-digit block group FIPS."""
+    return lambda df: df[column].astype('string').str.strip().str[:length].where(lambda s: s.str.len() == length)
+
+
+def derive_equals(column: str, value: str) -> TermBuilder:
+    """'true'/'false' for whether a column equals a value."""
+    return lambda df: (df[column].astype('string').str.strip() == value).map({True: 'true', False: 'false'})
+
+
+DERIVATIONS = {
+    'slug': derive_slug,
+    'lookup': derive_lookup,
+    'wkt_point': derive_wkt_point,
+    'prefix': derive_prefix,
+    'equals': derive_equals,
+}
+
+
+def compile_derivation(spec: Dict) -> TermBuilder:
+    """Compile one derived column spec, e.g. {slug: Licensee} or {lookup: {column: ..., table: ...}}."""
+    if len(spec) != 1 or next(iter(spec)) not in DERIVATIONS:
+        raise ValueError(f"Derived column needs exactly one of {', '.join(DERIVATIONS)}: {spec}")
+    op, args = next(iter(spec.items()))
+    return DERIVATIONS[op](**args) if isinstance(args, dict) else DERIVATIONS[op](args)
+
+
+# Classes
+@dataclass(frozen=True)
+class Within:
+    """sfWithin materialization for a subject: its coordinate column, levels and fallback code columns."""
+    geo: str
+    levels: Tuple[str, ...] = tuple(LEVELS)
+    fallback: Tuple[Tuple[str, str], ...] = ()  # (level, column) pairs
+
+    def regions(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Spatially join the chunk's points once (see region_join.resolve_regions)."""
+        coords = parse_geo_column(df[self.geo])
+        fallback = pd.DataFrame({LEVELS[level][0]: df[column].to_numpy() for level, column in self.fallback})
+        regions = resolve_regions(coords['latitude'], coords['longitude'], fallback)
+        regions.index = df.index
+        return regions
+
+
+def compile_within(spec: Union[str, Dict]) -> Within:
+    """Compile 'within: Geo' or 'within: {geo: Geo, levels: [...], county: <fallback column>, ...}'."""
+    if isinstance(spec, str):
+        spec = {'geo': spec}
+    levels = spec.get('levels') or list(LEVELS)
+    unknown = (set(levels) | (set(spec) - {'geo', 'levels'})) - set(LEVELS)
+    if unknown:
+        raise ValueError(f"Unknown region level(s) {', '.join(sorted(unknown))} (use {', '.join(LEVELS)})")
+    fallback = tuple((level, spec[level]) for level in LEVELS if level in spec)
+    return Within(spec['geo'], tuple(levels), fallback)
+
+
+@dataclass
+class SubjectMap:
+    """One subject per row: its IRI, classes and (predicate, object) builders."""
+    subject: TermBuilder
+    classes: List[str]
+    properties: List[Tuple[str, Union[TermBuilder, str]]]
+    require: List[str] = field(default_factory=list)
+    distinct: bool = False
+    within: Optional['Within'] = None
+    seen: set = field(default_factory=set)
+
+    def emit(self, df: pd.DataFrame, regions: Optional[Dict] = None) -> List[pd.Series]:
+        if self.require:
+            df = df.dropna(subset=self.require)
+        subjects = self.subject(df)
+        if self.distinct:
+            # Subjects shared by many rows (licensees, ACS variables) are described once per run
+            keep = (subjects.notna() & ~subjects.duplicated() & ~subjects.isin(self.seen)).to_numpy()
+            df, subjects = df[keep], subjects[keep]
+            self.seen.update(subjects)
+        lines = [triple_lines(subjects, RDF.type, term) for term in self.classes]
+        for predicate, build in self.properties:
+            lines.append(triple_lines(subjects, predicate, build if isinstance(build, str) else build(df)))
+        if self.within:
+            lines.extend(within_lines(subjects, regions[self.within].loc[df.index], list(self.within.levels)))
+        return lines
+
+
+@dataclass
+class Mapping:
+    """A compiled dataset mapping (see compile_mapping)."""
+    name: str
+    source: Path
+    loader: str
+    read: Dict
+    derived: List[Tuple[str, TermBuilder]]
+    subjects: List[SubjectMap]
+    columns: set  # Source columns the mapping uses
+
+    def chunks(self, chunk_rows: int = CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+        """Source rows, chunk_rows at a time."""
+        if self.loader == 'acs':
+            long = load_acs(self.source)
+            for start in range(0, len(long), chunk_rows):
+                yield long.iloc[start:start + chunk_rows]
+            return
+        kwargs = {'encoding': 'utf-8-sig', **self.read}
+        for chunk in pd.read_csv(self.source, dtype=str, chunksize=chunk_rows, **kwargs):
+            chunk.columns = chunk.columns.str.strip()
+            yield chunk
+
+    def emit(self, df: pd.DataFrame) -> List[pd.Series]:
+        """Statements for one chunk."""
+        missing = self.columns - set(df.columns)
+        if missing:
+            raise ValueError(f"{self.source.name} has no column(s) {', '.join(sorted(missing))} (mapping '{self.name}')")
+        df = df.copy()
+        for name, build in self.derived:
+            df[name] = build(df)
+        # One spatial join per distinct within spec, shared by the subjects using it
+        regions = {within: within.regions(df) for within in {s.within for s in self.subjects if s.within}}
+        return [lines for subject in self.subjects for lines in subject.emit(df, regions)]
+
+    def run(self, writer: TripleWriter, chunk_rows: int = CHUNK_ROWS) -> int:
+        """Convert every chunk into an open writer; returns the number of triples written."""
+        start_triples, start = writer.triples, time.perf_counter()
+        for subject in self.subjects:
+            subject.seen.clear()
+        for chunk in self.chunks(chunk_rows):
+            writer.write(*self.emit(chunk))
+        triples, elapsed = writer.triples - start_triples, time.perf_counter() - start
+        print(f"{self.name}: {triples} triples in {elapsed:.1f}s ({triples / max(elapsed, 1e-9) * 60:,.0f} triples/min)")
+        return triples
+
+
+def compile_mapping(config: Dict, name: Optional[str] = None) -> Mapping:
+    """
+    Compile a mapping config (the parsed YAML) into term builders.
+
+    Args:
+        config (Dict): Mapping config
+        name (str): Mapping name (defaults to config['name'])
+
+    Returns:
+        Mapping: Ready to run
+
+    Raises:
+        ValueError: For unknown prefixes, loaders or derivations, or a subject without an IRI field
+    """
+    name = name or config.get('name', 'mapping')
+    loader = config.get('loader', 'csv')
+    if loader not in LOADERS:
+        raise ValueError(f"Unknown loader '{loader}' in mapping '{name}' (use {', '.join(LOADERS)})")
+
+    derived = [(column, compile_derivation(spec)) for column, spec in (config.get('derive') or {}).items()]
+    derived_names = {column for column, _ in derived}
+    used = set()
+
+    subjects = []
+    for spec in config['subjects']:
+        subject, columns = compile_template(spec['iri'])
+        if isinstance(subject, str):
+            raise ValueError(f"Subject template '{spec['iri']}' in mapping '{name}' has no {{column}} field")
+        used.update(columns)
+
+        classes = spec.get('class') or []
+        classes = [iri(expand(c)) for c in ([classes] if isinstance(classes, str) else classes)]
+
+        properties = []
+        for predicate, values in (spec.get('properties') or {}).items():
+            for value in (values if isinstance(values, list) else [values]):
+                build, columns = compile_object(value)
+                used.update(columns)
+                properties.append((expand(predicate), build))
+
+        require = spec.get('require') or []
+        require = [require] if isinstance(require, str) else require
+        used.update(require)
+
+        within = compile_within(spec['within']) if spec.get('within') else None
+        if within:
+            used.update([within.geo, *(column for _, column in within.fallback)])
+        subjects.append(SubjectMap(subject, classes, properties, require, bool(spec.get('distinct')), within))
+
+    # Derived columns may be built from source columns and be used by later derivations
+    for spec in (config.get('derive') or {}).values():
+        args = next(iter(spec.values()))
+        if isinstance(args, dict):
+            used.update(v for k, v in args.items() if k == 'column')
+        else:
+            used.update([args] if isinstance(args, str) else args)
+
+    return Mapping(name, DATA_DIR / config['source'], loader, config.get('read') or {}, derived, subjects,
+                   used - derived_names)
+
+
+def load_mapping(name: str, directory: Path = MAPPING_DIR) -> Mapping:
+    """Read and compile Mappings/<name>.yaml."""
+    path = Path(directory) / f"{name}.yaml"
+    with open(path, encoding='utf-8') as f:
+        return compile_mapping(yaml.safe_load(f), name)
+
+
+def mapping_names(directory: Path = MAPPING_DIR) -> List[str]:
+    """Names of every mapping config in the directory."""
+    return sorted(path.stem for path in Path(directory).glob('*.yaml'))
+
+
+def convert(names: List[str], output: Path, chunk_rows: int = CHUNK_ROWS) -> int:
+    """
+    Convert one or more datasets into a single .nt or .ttl file.
+
+    Returns:
+        int: Triples written
+    """
+    mappings = [load_mapping(name) for name in names]  # Compile everything before writing anything
+    with TripleWriter(output) as writer:
+        for mapping in mappings:
+            print(f"Converting {mapping.source.name} ({mapping.name})...")
+            mapping.run(writer, chunk_rows)
+        return writer.triples
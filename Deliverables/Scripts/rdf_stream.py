@@ -0,0 +1,192 @@
+# Streaming RDF output for the knowledge graph scripts.
+# Terms are built for whole columns at once as N-Triples strings and written chunk by chunk, so memory
+# stays constant however many rows are converted (no rdflib.Graph holding every triple).
+
+# Imports
+import re
+from pathlib import Path
+from typing import Callable, Iterable, Optional
+from urllib.parse import quote
+
+import pandas as pd
+from rdflib import OWL, RDF, RDFS, TIME, XSD, Namespace
+
+from geo_utils import DATA_DIR
+
+# Variables
+RDF_DIR = DATA_DIR / 'RDF'
+CHUNK_ROWS = 20000  # CSV rows converted per chunk
+
+## Prefixes
+name_space = "https://kastle-lab.org/"
+pfs = {
+"kl-res": Namespace(f"{name_space}lod/resource/"),
+"kl-ont": Namespace(f"{name_space}lod/ontology/"),
+"kwgr": Namespace("http://stko-kwg.geog.ucsb.edu/lod/resource/"),
+"kwg-ont": Namespace("http://stko-kwg.geog.ucsb.edu/lod/ontology/"),
+"geo": Namespace("http://www.opengis.net/ont/geosparql#"),
+"geof": Namespace("http://www.opengis.net/def/function/geosparql/"),
+"sf": Namespace("http://www.opengis.net/ont/sf#"),
+"wd": Namespace("http://www.wikidata.org/entity/"),
+"wdt": Namespace("http://www.wikidata.org/prop/direct/"),
+"dbo": Namespace("http://dbpedia.org/ontology/"),
+"ssn": Namespace("http://www.w3.org/ns/ssn/"),
+"sosa": Namespace("http://www.w3.org/ns/sosa/"),
+"cdt": Namespace("http://w3id.org/lindt/custom_datatypes#"),
+"ex": Namespace("https://example.com/"),
+"rdf": RDF,
+"rdfs": RDFS,
+"xsd": XSD,
+"owl": OWL,
+"time": TIME
+}
+
+FORMATS = {'nt': 'ntriples', 'ttl': 'turtle'}
+
+_UNSAFE_IRI = re.compile(r"[^A-Za-z0-9._~\-]")
+_ESCAPES = {'\\': '\\\\', '"': '\\"', '\n': '\\n', '\r': '\\r'}
+
+# Functions
+def _on_unique(values: pd.Series, func: Callable[[pd.Series], pd.Series]) -> pd.Series:
+    """Apply a string transform to the distinct values only (columns repeat a lot)."""
+    codes, uniques = pd.factorize(values)
+    mapped = func(pd.Series(uniques, dtype='string')).to_numpy()
+    out = pd.Series(pd.NA, index=values.index, dtype='string')
+    found = codes >= 0
+    out[found] = mapped[codes[found]]
+    return out
+
+
+def iri(term) -> str:
+    """N-Triples form of a single IRI (predicates, classes)."""
+    return f"<{term}>"
+
+
+def _encode(local: pd.Series) -> pd.Series:
+    return local.str.replace(_UNSAFE_IRI, lambda m: quote(m.group(), safe=''), regex=True)
+
+
+def encode_local(local: pd.Series) -> pd.Series:
+    """Percent-encode a whole column of IRI local names (<NA> for missing or blank values)."""
+    return _on_unique(local.astype('string').str.strip().replace('', pd.NA), _encode)
+
+
+def iri_terms(base, local: pd.Series, suffix: str = "") -> pd.Series:
+    """
+    Build IRIs for a whole column: base + percent-encoded local name (+ suffix).
+
+    Args:
+        base (str or Namespace): IRI prefix, e.g. pfs["kl-res"] + "dispensary."
+        local (pd.Series): Local names; missing values give missing terms
+        suffix (str): Fixed text after the local name
+
+    Returns:
+        pd.Series: '<iri>' strings (string dtype, <NA> where local is missing)
+    """
+    local = local.astype('string').str.strip().replace('', pd.NA)
+    return _on_unique(local, lambda s: f"<{base}" + _encode(s) + f"{suffix}>")
+
+
+def literal_terms(values: pd.Series, datatype=None, lang: Optional[str] = None) -> pd.Series:
+    """
+    Build literals for a whole column.
+
+    Args:
+        values (pd.Series): Lexical values (converted with str); missing values give missing terms
+        datatype: Datatype IRI (e.g. XSD.integer), None for plain strings
+        lang (str): Language tag for plain strings
+
+    Returns:
+        pd.Series: '"value"^^<datatype>' strings (string dtype)
+    """
+    values = values.astype('string').str.strip().replace('', pd.NA)
+    suffix = f"^^<{datatype}>" if datatype else (f"@{lang}" if lang else "")
+
+    def encode(s):
+        for char, escaped in _ESCAPES.items():
+            s = s.str.replace(char, escaped, regex=False)
+        return '"' + s + '"' + suffix
+    return _on_unique(values, encode)
+
+
+def date_terms(values: pd.Series, date_format: str = '%m/%d/%Y') -> pd.Series:
+    """Build xsd:date literals from dates written as date_format (unparseable dates are dropped)."""
+    dates = pd.to_datetime(values, format=date_format, errors='coerce').dt.strftime('%Y-%m-%d')
+    return literal_terms(dates, XSD.date)
+
+
+def triple_lines(subjects: pd.Series, predicate, objects) -> pd.Series:
+    """
+    Join subject, predicate and object terms into N-Triples statements, skipping missing terms.
+
+    Args:
+        subjects (pd.Series): Subject terms
+        predicate: Predicate IRI
+        objects (pd.Series or str): Object terms, or one term used for every row (e.g. a class)
+
+    Returns:
+        pd.Series: One 's p o .' line per complete row
+    """
+    lines = subjects + f" {iri(predicate)} " + objects + " ."
+    return lines.dropna()
+
+
+# Classes
+class TripleWriter:
+    """
+    Append N-Triples lines to an .nt or .ttl file.
+
+    Turtle output gets the prefix declarations first; the statements themselves use full IRIs,
+    which is valid Turtle, so both formats are written the same way.
+
+    Usage:
+        with TripleWriter(RDF_DIR / 'kg.ttl') as writer:
+            writer.write(triple_lines(...))
+    """
+
+    def __init__(self, path: Path, prefixes=pfs):
+        self.path = Path(path)
+        self.format = self.path.suffix.lstrip('.')
+        if self.format not in FORMATS:
+            raise ValueError(f"Unsupported RDF format '{self.path.suffix}' (use {', '.join('.' + f for f in FORMATS)})")
+        self.prefixes = prefixes
+        self.triples = 0
+        self.file = None
+
+    def __enter__(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.file = open(self.path, 'w', encoding='utf-8', newline='\n')
+        if self.format == 'ttl':
+            self.file.writelines(f"@prefix {prefix}: <{ns}> .\n" for prefix, ns in self.prefixes.items())
+            self.file.write("\n")
+        return self
+
+    def __exit__(self, *exc):
+        self.file.close()
+        print(f"Wrote {self.triples} triples to {self.path}")
+
+    def write(self, *line_groups: Iterable[str]):
+        """Write one or more groups of statements (e.g. the output of triple_lines)."""
+        for lines in line_groups:
+            lines = list(lines)
+            if lines:
+                self.file.write('\n'.join(lines) + '\n')
+                self.triples += len(lines)
+
+
+def stream_csv(path: Path, emit: Callable[[pd.DataFrame], Iterable[Iterable[str]]], writer: TripleWriter,
+               chunk_rows: int = CHUNK_ROWS, **read_csv_kwargs):
+    """
+    Convert a CSV to triples chunk by chunk.
+
+    Args:
+        path (Path): Input CSV (read as strings)
+        emit (Callable): Takes one chunk and returns groups of statements
+        writer (TripleWriter): Open output
+        chunk_rows (int): Rows per chunk
+        **read_csv_kwargs: Passed to pd.read_csv
+    """
+    read_csv_kwargs.setdefault('encoding', 'utf-8-sig')
+    for chunk in pd.read_csv(path, dtype=str, chunksize=chunk_rows, **read_csv_kwargs):
+        chunk.columns = chunk.columns.str.strip()
+        writer.write(*emit(chunk))
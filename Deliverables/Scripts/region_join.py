@@ -0,0 +1,111 @@
+# Materialized containment (kwg-ont:sfWithin) for point features.
+# Each batch of points is joined once against the census block polygons, which nest inside block groups,
+# tracts and counties, so the 15-digit block FIPS gives all three by prefix. A second join against the
+# ZCTA polygons (which do not nest) gives the ZCTA. The sfWithin triples are then plain index lookups at
+# query time instead of GeoSPARQL geometry functions.
+
+# Imports
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+from geo_utils import DATA_DIR
+from rdf_stream import iri_terms, pfs, triple_lines
+from tract_resolver import BLOCK_FILE, resolve_blocks
+from zcta_resolver import ZCTA_FILE, resolve_zcta
+
+# Variables
+COUNTY_FIPS_FILE = DATA_DIR / 'ohio-county-fips.csv'
+
+SF_WITHIN = pfs["kwg-ont"]["sfWithin"]
+
+# Region level -> (column in resolve_regions output, IRI base)
+LEVELS = {
+    'county': ('County_FIPS', pfs["kwgr"] + "administrativeRegion.USA."),
+    'zcta': ('ZCTA5', pfs["kl-res"] + "zcta."),
+    'tract': ('Census_Tract_Code', pfs["kl-res"] + "censusTract."),
+    'block_group': ('Block_Group_FIPS', pfs["kl-res"] + "blockGroup."),
+}
+
+_county_iris = None  # Loaded once per process
+_warned = set()
+
+# Functions
+def county_iris(path: Path = COUNTY_FIPS_FILE) -> pd.Series:
+    """KnowWhereGraph county IRIs ('reg') by 5-digit county FIPS, from ohio-county-fips.csv."""
+    global _county_iris
+    if _county_iris is None:
+        counties = pd.read_csv(path, dtype=str, encoding='utf-8-sig')
+        _county_iris = counties.drop_duplicates('fips').set_index('fips')['reg']
+    return _county_iris
+
+
+def _warn_once(message: str):
+    if message not in _warned:
+        _warned.add(message)
+        print(message)
+
+
+def resolve_regions(latitude, longitude, fallback: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+    """
+    Find the county, ZCTA, tract and block group containing each point.
+
+    Args:
+        latitude (array-like): Point latitudes
+        longitude (array-like): Point longitudes
+        fallback (pd.DataFrame): Optional codes from the source data (columns named like the output,
+            same length as the points), used where a polygon file is missing or no polygon contains the point
+
+    Returns:
+        pd.DataFrame: 'County_FIPS', 'ZCTA5', 'Census_Tract_Code' and 'Block_Group_FIPS' (string, <NA> where unknown)
+    """
+    lat = np.asarray(latitude, dtype='float64')
+    out = pd.DataFrame({column: pd.Series(pd.NA, index=range(len(lat)), dtype='string')
+                        for column, _ in LEVELS.values()})
+
+    if BLOCK_FILE.exists():
+        blocks = resolve_blocks(latitude, longitude)
+        out['Block_Group_FIPS'] = blocks['Block_Group_FIPS'].array
+        out['Census_Tract_Code'] = blocks['Census_Tract_Code'].array
+        out['County_FIPS'] = blocks['County_FIPS'].array
+    else:
+        _warn_once(f"Block file '{BLOCK_FILE}' not found; county, tract and block group come from the source columns only")
+
+    if ZCTA_FILE.exists():
+        out['ZCTA5'] = pd.array(resolve_zcta(latitude, longitude).to_numpy(), dtype='string')
+    else:
+        _warn_once(f"ZCTA file '{ZCTA_FILE}' not found; ZCTA comes from the source columns only")
+
+    if fallback is not None:
+        for column in fallback.columns.intersection(out.columns):
+            out[column] = out[column].fillna(pd.Series(fallback[column].astype('string').to_numpy()))
+    return out
+
+
+def within_lines(subjects: pd.Series, regions: pd.DataFrame, levels: Optional[List[str]] = None) -> List[pd.Series]:
+    """
+    sfWithin statements from each subject to its regions.
+
+    County objects are the KnowWhereGraph IRIs listed in ohio-county-fips.csv, so points outside
+    Ohio get no county.
+
+    Args:
+        subjects (pd.Series): Subject terms
+        regions (pd.DataFrame): Output of resolve_regions, aligned with subjects by position
+        levels (List[str]): Subset of LEVELS (default all)
+
+    Returns:
+        List[pd.Series]: One group of statements per level
+    """
+    lines = []
+    for level in levels or LEVELS:
+        column, base = LEVELS[level]
+        codes = pd.Series(regions[column].to_numpy(), index=subjects.index, dtype='string')
+        if level == 'county':
+            objects = '<' + codes.map(county_iris()).astype('string') + '>'
+        else:
+            objects = iri_terms(base, codes)
+        lines.append(triple_lines(subjects, SF_WITHIN, objects))
+    return lines
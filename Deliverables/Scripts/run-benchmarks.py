@@ -0,0 +1,58 @@
+# Benchmarks the enrichment stages (geocode, ZCTA, precinct join, insurance/income match, tract lookup,
+# life expectancy, Census batch geocoding and the RDF export) on synthetic rosters at several multiples
+# of the current size, against local stand-ins for the Google, Census and FCC APIs (see benchmark_suite.py).
+# Prints throughput, peak memory and scaling exponents, appends the run to Benchmarks/benchmark-runs.csv
+# and compares it with Benchmarks/baseline.csv when there is one.
+
+# Imports
+import time
+
+import pandas as pd
+
+from benchmark_suite import (BASELINE_FILE, NETWORK_SCALES, RUNS_FILE, SCALES, SCHEMAS, compare_with_baseline,
+                             run_benchmarks, scaling_curves)
+from checkpoint import atomic_write_csv
+
+# Variables
+schemas = list(SCHEMAS)  # 'dispensary', 'pharmacy-official', 'pharmacy-places'
+scales = SCALES  # 1x, 10x, 100x and 1000x
+network_scales = NETWORK_SCALES  # 1x-100x; None also runs the stub-backed stages at 1000x, which takes hours
+stages = None  # e.g. ['coords-to-zcta', 'find-tract']; None runs every stage
+
+latency = 0.0  # Seconds each stub response is held back (e.g. 0.05 to imitate the real services)
+rate_limits = False  # Keep the providers' rate limits (measures the limiter instead of the code)
+
+save_baseline = False  # Make this run the baseline later runs are compared with
+
+# MAIN
+if __name__ == "__main__":
+    start = time.perf_counter()
+    results = run_benchmarks(schemas, scales, stages, latency=latency, rate_limits=rate_limits,
+                             network_scales=network_scales)
+
+    with pd.option_context('display.width', 200, 'display.max_columns', 20):
+        print("\n=== THROUGHPUT (rows/s) ===")
+        print(results.pivot_table(index=['schema', 'stage'], columns='scale', values='rows_per_second', aggfunc='last'))
+        print("\n=== PEAK MEMORY (MB) ===")
+        print(results.pivot_table(index=['schema', 'stage'], columns='scale', values='peak_rss_mb', aggfunc='last'))
+        print("\n=== SCALING (seconds; exponent 1 = linear) ===")
+        print(scaling_curves(results))
+
+        skipped = results[results['status'] != 'ok']
+        for row in skipped.drop_duplicates(['stage', 'detail']).itertuples():
+            print(f"{row.stage} {row.status}: {row.detail}")
+
+        if BASELINE_FILE.exists():
+            comparison = compare_with_baseline(results, pd.read_csv(BASELINE_FILE))
+            print(f"\n=== AGAINST BASELINE ({BASELINE_FILE.name}) ===")
+            print(comparison.drop(columns=['peak_rss_mb', 'peak_rss_mb_baseline']).to_string(index=False))
+            regressions = comparison[comparison['regression']]
+            print(f"{len(regressions)} stage(s) slower than the baseline" if len(regressions) else "No regressions")
+
+    history = pd.read_csv(RUNS_FILE) if RUNS_FILE.exists() else pd.DataFrame()
+    atomic_write_csv(pd.concat([history, results], ignore_index=True), RUNS_FILE)
+    print(f"\nRun appended to {RUNS_FILE}")
+    if save_baseline:
+        atomic_write_csv(results, BASELINE_FILE)
+        print(f"Saved as the baseline in {BASELINE_FILE}")
+    print(f"Done in {time.perf_counter() - start:.1f}s")
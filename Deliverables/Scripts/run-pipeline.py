@@ -0,0 +1,40 @@
+# Runs the whole enrichment chain (Geo -> ZCTA -> votes -> insurance -> income -> tract) in one process.
+# Only rows whose inputs changed since the last run are recomputed; see pipeline.py.
+
+# Imports
+import time
+from pathlib import Path
+
+from pipeline import Pipeline, add_full_address, build_stages
+from typed_storage import load_records, save_records
+
+# Variables
+DATA_DIR = Path(__file__).parent.parent / 'Data'
+
+ROSTERS = {
+    'pharmacy': {
+        'in': DATA_DIR / 'Pharmacy' / 'Official' / 'Ohio-Retail-Pharmacies.csv',
+        'out': DATA_DIR / 'Pharmacy' / 'Official' / 'Ohio-Retail-Pharmacies-with-zcta-vote-ins-hh-tract.csv',
+        'address': ('LocationStreetAddress', 'LocationCity', 'LocationZip', 'LocationState'),
+    },
+    'dispensary': {
+        'in': DATA_DIR / '06-18-2024_Ohio_Medical_Marijuana_Dispensary_Roster_COOs.csv',
+        'out': DATA_DIR / 'Dispensary-Roster-Enriched.csv',
+        'address': ('Public Address Street', 'Public Address City', 'Public Zip', None),
+    },
+}
+
+roster = 'pharmacy'  # Which roster to enrich
+
+# MAIN
+if __name__ == "__main__":
+    config = ROSTERS[roster]
+    start = time.perf_counter()
+
+    df = load_records(config['in'])
+    df = add_full_address(df, *config['address'])
+
+    df = Pipeline(build_stages()).run(df)
+
+    save_records(df, config['out'])
+    print(f"Saved {len(df)} rows to {config['out']} in {time.perf_counter() - start:.2f} s")
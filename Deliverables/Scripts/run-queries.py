@@ -0,0 +1,48 @@
+# Runs the SPARQL queries in Deliverables/Queries against a local indexed store built from the generated
+# graph files (see triple_store.py), and reports per-query latency and result counts. Each run is appended
+# to Data/RDF/query-timings.csv with the store size, so timings can be compared as the graph grows.
+
+# Imports
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from checkpoint import atomic_write_csv
+from rdf_mapping import mapping_names
+from rdf_stream import RDF_DIR
+from triple_store import STORE_FILE, open_store, time_query
+
+# Variables
+QUERY_DIR = Path(__file__).parent.parent / 'Queries'
+TIMINGS_FILE = RDF_DIR / 'query-timings.csv'
+
+output_format = 'ttl'  # Format mappings-to-rdf.py wrote the graph files in
+repeat = 5  # Runs per query (the first one is reported separately as the cold run)
+
+# MAIN
+if __name__ == "__main__":
+    sources = [RDF_DIR / f"{name}.{output_format}" for name in mapping_names()]
+    missing = [p.name for p in sources if not p.exists()]
+    if missing:
+        print(f"Missing graph files ({', '.join(missing)}); run mappings-to-rdf.py first")
+        sources = [p for p in sources if p.exists()]
+
+    graph = open_store(sources, STORE_FILE)
+    triples = len(graph)
+
+    rows = []
+    for query_file in sorted(QUERY_DIR.glob('*.txt')) + sorted(QUERY_DIR.glob('*.rq')):
+        try:
+            stats = time_query(graph, query_file.read_text(encoding='utf-8'), repeat)
+        except Exception as e:
+            print(f"{query_file.name}: failed ({e})")
+            continue
+        print(f"{query_file.name}: {stats['results']} results, cold {stats['first_ms']} ms, "
+              f"median {stats['median_ms']} ms, min {stats['min_ms']} ms")
+        rows.append({'run': time.strftime('%Y-%m-%d %H:%M:%S'), 'query': query_file.name, 'triples': triples, **stats})
+
+    if rows:
+        history = pd.read_csv(TIMINGS_FILE) if TIMINGS_FILE.exists() else pd.DataFrame()
+        atomic_write_csv(pd.concat([history, pd.DataFrame(rows)], ignore_index=True), TIMINGS_FILE)
+        print(f"Timings appended to {TIMINGS_FILE}")
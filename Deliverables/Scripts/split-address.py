@@ -1,6 +1,8 @@
 import pandas as pd
 from pathlib import Path
 
+from address_parser import parse_addresses, normalize_addresses
+
 # Load the CSV file
 file_path = Path(__file__).parent.parent / 'Data' / 'Pharmacy' /'ohio-pharmacies-with-zcta.csv' 
 out_file = Path(__file__).parent.parent / 'Data' / 'Pharmacy' / 'ohio-pharmacies-with-zcta-split.csv'
@@ -10,17 +12,23 @@ df = pd.read_csv(file_path)
 # Rename the 'Address' column to 'Full Address'
 df.rename(columns={'Address': 'Full Address'}, inplace=True)
 
-# Extract the street, city, and zip code from the full address
+# Extract the street, city, and zip code from the full address, keeping their original case
 # Expected format: "Street, City, OH Zip, USA"
 address_split = df['Full Address'].str.extract(r'^(.*?),\s*(.*?),\s*OH\s*(\d{5})')
 
-# Assign new columns based on the extracted values
-df['Public Address Street'] = address_split[0]
-df['Public Address City'] = address_split[1]
-df['Public Zip'] = address_split[2]
+# Addresses that do not fit (ZIP+4, no comma before the city, ...) come from the address parser instead,
+# in its cleaned uppercase form
+parsed = parse_addresses(df['Full Address'])
+unsplit = address_split[0].isna()
+
+# Assign new columns based on the extracted values; the normalized form is only used for 'Normalized Address'
+df['Public Address Street'] = address_split[0].where(~unsplit, parsed['Street'])
+df['Public Address City'] = address_split[1].where(~unsplit, parsed['City'])
+df['Public Zip'] = address_split[2].where(~unsplit, parsed['Zip5'])
+df['Normalized Address'] = normalize_addresses(df['Full Address'])
 
 # Optionally, save the updated DataFrame to a new CSV
 df.to_csv(out_file, index=False)
 
 # Show the updated DataFrame (for interactive use)
-print(df[['Full Address', 'Public Address Street', 'Public Address City', 'Public Zip']].head())
+print(df[['Full Address', 'Public Address Street', 'Public Address City', 'Public Zip', 'Normalized Address']].head())
@@ -0,0 +1,275 @@
+# Cached ingestion of the spreadsheet-style source tables: the PUMA-ACS-5-Yr exports, Ohio_County_Data.csv
+# (columns as documented in the Ohio County Data Codebook) and ohio-dangerous-drug-distributors.XLSX.
+# Reading the workbooks goes through openpyxl and takes about a second each, so every source is parsed
+# once into a typed Arrow IPC file under Data/Cache/tables. The cache entry is keyed on the source's
+# SHA-256 and modification time (plus the parser version), and later loads memory-map the Arrow file
+# instead of parsing anything.
+
+# Imports
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import pandas as pd
+import pyarrow as pa
+
+from acs_loader import clean_numeric
+from geo_utils import DATA_DIR
+from typed_storage import to_typed
+
+# Variables
+CACHE_DIR = DATA_DIR / 'Cache' / 'tables'
+PUMA_DIR = DATA_DIR / 'PUMA-ACS-5-Yr'
+COUNTY_DATA_FILE = DATA_DIR / 'Ohio_County_Data.csv'
+DISTRIBUTORS_FILE = DATA_DIR / 'Pharmacy' / 'Official' / 'ohio-dangerous-drug-distributors.XLSX'
+
+PARSER_VERSION = 1  # Bump when a parser's output changes, so cached tables are rebuilt
+HASH_CHUNK = 1 << 20
+
+## Ohio_County_Data.csv column types (see 'Ohio County Data Codebook.pdf' for their meaning)
+COUNTY_DATA_SCHEMA = {
+    'co_fip': 'Int32',
+    'state': 'category',
+    'population': 'Int32',
+    'under18': 'float64',
+    'over65': 'float64',
+    'black_pct': 'float64',
+    'asian_pct': 'float64',
+    'native_pct': 'float64',
+    'hispanic_pct': 'float64',
+    'white_pct': 'float64',
+    'rural_pct': 'float64',
+    'pop_density_2020': 'Int32',
+    'college_pct_2020': 'float64',
+    'rural_urban_continuum_code_2013': 'Int8',
+    'urban_influence_code_2013': 'Int8',
+    'metro_2013': 'Int8',
+    'hh_income_med_2020': 'float64',
+    'hh_income_med_pct_of_state_2020': 'float64',
+    'five_ohios': 'Int8',
+    'six_ohios': 'Int8',
+    'Religious2010': 'float64',
+    'Evangelical2010': 'float64',
+    'Mainline2010': 'float64',
+    'Catholic2010': 'float64',
+    'evan_prri': 'float64',
+    'DMA': 'category',
+    'DMAnumber': 'Int16',
+    'black_18': 'Int16',
+    'latino_18': 'Int16',
+    'age_18': 'Int16',
+    'density_18': 'Int32',
+    'rural': 'Int8',
+    'rural2': 'Int8',
+}
+
+## Board of Pharmacy distributor roster column types; license numbers keep their leading zeros as strings
+DISTRIBUTORS_SCHEMA = {
+    'LicenseType': 'category',
+    'LicenseTypeSubCategory': 'category',
+    'LicenseCategoryNumber': 'Int8',
+    'LicenseStatus': 'category',
+    'LicenseSubStatus': 'category',
+    'LocationState': 'category',
+    'LocationCounty': 'category',
+    'MailingState': 'category',
+    'MailingCounty': 'category',
+    'BoardAction': 'category',
+    'FirstIssuanceDate': 'date:%Y.%m.%d',
+    'LicenseEffectiveDate': 'date:%Y.%m.%d',
+    'LicenseExpirationDate': 'date:%Y.%m.%d',
+}
+
+# Functions
+def file_digest(path: Path) -> str:
+    """SHA-256 of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _read_raw(path: Path) -> pd.DataFrame:
+    """All cells of a workbook's first sheet or a CSV as strings, without a header row."""
+    if path.suffix.lower() in ('.xlsx', '.xls'):
+        return pd.read_excel(path, header=None, dtype=str)
+    return pd.read_csv(path, header=None, dtype=str, encoding='utf-8-sig')
+
+
+def parse_puma_table(path: Path) -> pd.DataFrame:
+    """
+    Parse a data.census.gov PUMS export (workbook or CSV) into the uniform PUMA table layout.
+
+    The exports start with a few 'Dataset: ...' / 'Weight: ...' / restriction lines, then a
+    'Selected Geographies, Count' header, a 'Total' row and one row per PUMA ('Allen County PUMA; Ohio').
+
+    Returns:
+        pd.DataFrame: 'PUMA_Name' and 'State' strings and an Int64 count column named after the file
+            ('Below_200_perc_poverty_level'); the header lines and the total are kept in attrs
+    """
+    raw = _read_raw(path)
+    labels = raw[0].astype('string').str.strip()
+    header = labels.eq('Selected Geographies')
+    if not header.any():
+        raise ValueError(f"No 'Selected Geographies' header found in {path}")
+    start = header.to_numpy().argmax()
+
+    rows = raw.iloc[start + 1:]
+    names = labels.iloc[start + 1:].str.rsplit(';', n=1)
+    counts = clean_numeric(rows[1]).round().astype('Int64')
+    total = labels.iloc[start + 1:].eq('Total')
+
+    column = path.stem.split('_', 1)[-1]  # 'ACSPUMS5Y2023_Income_Loss' -> 'Income_Loss'
+    table = pd.DataFrame({
+        'PUMA_Name': names.str[0].str.strip(),
+        'State': names.str[1].str.strip(),
+        column: counts,
+    })[~total.to_numpy() & names.str.len().eq(2).to_numpy()].reset_index(drop=True)
+
+    table.attrs = {
+        'source': path.name,
+        'header': ' | '.join(labels.iloc[:start].dropna().str.rstrip(',')),
+        'total': str(counts[total.to_numpy()].iloc[0]) if total.any() else '',
+    }
+    return table
+
+
+def parse_county_data(path: Path) -> pd.DataFrame:
+    """Ohio_County_Data.csv with the COUNTY_DATA_SCHEMA types ('42,342' incomes become numbers)."""
+    return to_typed(pd.read_csv(path, dtype=str, encoding='utf-8-sig'), schema=COUNTY_DATA_SCHEMA)
+
+
+def parse_distributors(path: Path) -> pd.DataFrame:
+    """The dangerous drug distributor roster with the DISTRIBUTORS_SCHEMA types."""
+    return to_typed(pd.read_excel(path, dtype=str), schema=DISTRIBUTORS_SCHEMA)
+
+
+def _write_arrow(df: pd.DataFrame, path: Path):
+    """Write an uncompressed Arrow IPC file (memory-mappable) through a temporary file."""
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}),
+                                           b'attrs': json.dumps(df.attrs).encode('utf-8')})
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f, pa.ipc.new_file(f, table.schema) as writer:
+            writer.write_table(table)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def _read_arrow(path: Path) -> pd.DataFrame:
+    """Memory-map an Arrow IPC file written by _write_arrow."""
+    with pa.memory_map(str(path), 'r') as source:
+        table = pa.ipc.open_file(source).read_all()
+    df = table.to_pandas()
+    df.attrs = json.loads((table.schema.metadata or {}).get(b'attrs', b'{}'))
+    return df
+
+
+def cached_table(path: Path, parse: Callable[[Path], pd.DataFrame], cache_dir: Path = CACHE_DIR) -> pd.DataFrame:
+    """
+    Load a source table through the Arrow cache, parsing it only when it changed.
+
+    The cache entry records the source's size, mtime and SHA-256. An unchanged mtime and size skip the
+    hash; a touched file with the same hash keeps its cached table.
+
+    Args:
+        path (Path): Source file
+        parse (Callable): Parser producing the typed table (parse_puma_table, parse_county_data, ...)
+        cache_dir (Path): Cache directory
+
+    Returns:
+        pd.DataFrame: Typed table
+    """
+    path = Path(path)
+    if not path.exists():
+        raise FileNotFoundError(f"Source table '{path}' not found")
+    cache_dir = Path(cache_dir)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    meta_path = cache_dir / f"{path.stem}.json"
+    stat = path.stat()
+    parser = f"{parse.__name__}/{PARSER_VERSION}"
+
+    meta = json.loads(meta_path.read_text(encoding='utf-8')) if meta_path.exists() else {}
+    cached = cache_dir / meta.get('table', '')
+    if meta.get('parser') == parser and meta.get('source') == str(path) and cached.is_file():
+        if meta.get('mtime_ns') == stat.st_mtime_ns and meta.get('size') == stat.st_size:
+            return _read_arrow(cached)
+        digest = file_digest(path)
+        if meta.get('sha256') == digest:
+            meta['mtime_ns'] = stat.st_mtime_ns
+            meta_path.write_text(json.dumps(meta, indent=2), encoding='utf-8')
+            return _read_arrow(cached)
+    else:
+        digest = file_digest(path)
+
+    table = parse(path)
+    table_path = cache_dir / f"{path.stem}-{digest[:16]}.arrow"
+    _write_arrow(table, table_path)
+    if cached.is_file() and cached != table_path:
+        cached.unlink()
+    meta_path.write_text(json.dumps({
+        'source': str(path),
+        'parser': parser,
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'sha256': digest,
+        'table': table_path.name,
+    }, indent=2), encoding='utf-8')
+    print(f"Cached {path.name} ({len(table)} rows) as {table_path.name}")
+    return table
+
+
+def puma_files(directory: Path = PUMA_DIR) -> List[Path]:
+    """The PUMS exports in a directory (workbooks and CSVs)."""
+    return sorted(p for p in Path(directory).iterdir() if p.suffix.lower() in ('.xlsx', '.csv'))
+
+
+def load_puma_tables(directory: Path = PUMA_DIR, puma_keys: bool = True) -> pd.DataFrame:
+    """
+    Every PUMS export in a directory, joined into one PUMA-indexed table.
+
+    Args:
+        directory (Path): PUMA-ACS-5-Yr directory
+        puma_keys (bool): Add an Int64 'puma_key' column from the PUMA names file (see crosswalk);
+            left out with a message when that file is missing
+
+    Returns:
+        pd.DataFrame: Indexed by 'PUMA_Name', with 'State', one count column per export and optionally 'puma_key'
+    """
+    tables = [cached_table(path, parse_puma_table).set_index(['PUMA_Name', 'State']) for path in puma_files(directory)]
+    if not tables:
+        raise FileNotFoundError(f"No PUMS exports found in '{directory}'")
+    wide = pd.concat(tables, axis=1).reset_index(level='State')
+
+    if puma_keys:
+        from crosswalk import puma_keys_by_name
+        try:
+            wide['puma_key'] = puma_keys_by_name(wide.index.to_series()).to_numpy()
+        except FileNotFoundError as e:
+            print(f"No PUMA keys: {e}")
+    return wide
+
+
+def load_county_data(path: Path = COUNTY_DATA_FILE) -> pd.DataFrame:
+    """Typed Ohio_County_Data.csv (cached)."""
+    return cached_table(path, parse_county_data)
+
+
+def load_distributors(path: Path = DISTRIBUTORS_FILE) -> pd.DataFrame:
+    """Typed dangerous drug distributor roster (cached)."""
+    return cached_table(path, parse_distributors)
+
+
+# Source file -> parser, for warming the whole cache at once (see ingest-tables.py)
+def sources() -> Dict[Path, Callable[[Path], pd.DataFrame]]:
+    tables = {path: parse_puma_table for path in puma_files()}
+    tables[COUNTY_DATA_FILE] = parse_county_data
+    tables[DISTRIBUTORS_FILE] = parse_distributors
+    return tables
@@ -0,0 +1,99 @@
+# Offline census block / block group / tract resolver built on the 2020 TIGER tabulation block polygons.
+# Polygons: https://www2.census.gov/geo/tiger/TIGER2020/TABBLOCK20/tl_2020_39_tabblock20.zip (save under Data/Geo)
+
+# Imports
+from pathlib import Path
+from typing import Optional
+
+import pandas as pd
+
+from geo_keys import format_keys, parent_keys, parse_keys
+from geo_utils import GEO_DIR, PolygonIndex, coordinates, read_polygons
+
+# Variables
+BLOCK_FILE = GEO_DIR / 'tl_2020_39_tabblock20.zip'
+BLOCK_KEY = 'GEOID20'
+
+_block_indexes = {}  # path -> index, loaded once per process
+
+# Functions
+def load_block_index(path: Path = BLOCK_FILE) -> PolygonIndex:
+    """
+    Load the tabulation block polygons and build the spatial index.
+
+    Args:
+        path (Path): Path to the TIGER tabblock20 shapefile (zipped is fine)
+
+    Returns:
+        PolygonIndex: Index keyed by 15-digit block FIPS (shared by later calls with the same path)
+    """
+    key = Path(path).resolve()
+    if key not in _block_indexes:
+        print(f"Loading census block polygons from {path}...")
+        gdf = read_polygons(path, [BLOCK_KEY])
+        _block_indexes[key] = PolygonIndex(gdf, BLOCK_KEY)
+        print(f"Indexed {len(_block_indexes[key])} blocks")
+    return _block_indexes[key]
+
+
+def split_block_fips(block_fips: pd.Series) -> pd.DataFrame:
+    """
+    Derive the block group, tract and county codes from 15-digit block FIPS codes.
+
+    Format: SS CCC TTTTTT B BBB (State, County, Tract, Block group + Block); the parents come from
+    integer keys (see geo_keys), not from string slices.
+
+    Args:
+        block_fips (pd.Series): 15-digit block FIPS strings
+
+    Returns:
+        pd.DataFrame: 'Block_FIPS', 'Block_Group_FIPS' (12 digits), 'Census_Tract_Code' (11 digits)
+            and 'County_FIPS' (5 digits)
+    """
+    keys = parse_keys(block_fips, 'block')
+    return pd.DataFrame({
+        'Block_FIPS': format_keys(keys, 'block'),
+        'Block_Group_FIPS': format_keys(parent_keys(keys, 'block', 'block_group'), 'block_group'),
+        'Census_Tract_Code': format_keys(parent_keys(keys, 'block', 'tract'), 'tract'),
+        'County_FIPS': format_keys(parent_keys(keys, 'block', 'county'), 'county'),
+    }, index=block_fips.index)
+
+
+def resolve_blocks(latitude, longitude, index: Optional[PolygonIndex] = None) -> pd.DataFrame:
+    """
+    Resolve block, block group and tract codes for arrays of coordinates in one call.
+
+    Args:
+        latitude (array-like): Point latitudes
+        longitude (array-like): Point longitudes
+        index (PolygonIndex): Prebuilt block index (defaults to the shared one)
+
+    Returns:
+        pd.DataFrame: See split_block_fips; missing (<NA>) where no block contains the point
+    """
+    if index is None:
+        index = load_block_index()
+    return split_block_fips(index.lookup(latitude, longitude))
+
+
+def add_block_columns(df: pd.DataFrame, geo_column: str = 'Geo', index: Optional[PolygonIndex] = None) -> pd.DataFrame:
+    """
+    Add 'Census_Tract_Code', 'Block_Group_FIPS' and 'Block_FIPS' columns to a DataFrame of coordinates ('latitude'/'longitude' or '(lat, lon)' strings).
+
+    Drop-in replacement for the per-row FCC API loop in find-tract.py.
+
+    Args:
+        df (pd.DataFrame): Input rows with a coordinate column
+        geo_column (str): Name of the coordinate string column (used when there are no float columns)
+        index (PolygonIndex): Prebuilt block index (defaults to the shared one)
+
+    Returns:
+        pd.DataFrame: Copy of df with the new columns
+    """
+    coords = coordinates(df, geo_column)
+    codes = resolve_blocks(coords['latitude'], coords['longitude'], index)
+
+    out = df.copy()
+    for col in ['Census_Tract_Code', 'Block_Group_FIPS', 'Block_FIPS']:
+        out[col] = codes[col].to_numpy()
+    return out
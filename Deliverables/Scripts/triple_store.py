@@ -0,0 +1,271 @@
+# Local indexed triple store for running the SPARQL queries in Deliverables/Queries offline.
+# Triples are dictionary encoded (every distinct term gets an integer id) and kept in SQLite in three
+# orders: SPO (the table's clustered primary key), POS and OSP (covering indexes). Any triple pattern
+# with bound terms is then a single index range scan.
+# The store plugs into rdflib as a Store, so rdflib's SPARQL engine evaluates the queries on top of it.
+
+# Imports
+import sqlite3
+import time
+from pathlib import Path
+from statistics import median
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pcsv
+from rdflib import BNode, Graph, Literal, URIRef
+from rdflib.store import Store
+from rdflib.util import from_n3
+
+from rdf_stream import RDF_DIR, _ESCAPES
+
+# Variables
+STORE_FILE = RDF_DIR / 'kg.sqlite'
+LOAD_BLOCK = 1 << 25  # Bytes of a graph file read per batch when loading
+
+INDEXES = {
+    'pos': '(p, o, s)',
+    'osp': '(o, s, p)',
+}
+
+_STATEMENT = r'^\S+ <[^>]*> '  # Start of an 's p o .' line
+_PATTERN_TERMS = (URIRef, Literal, BNode)
+
+# Functions
+def nt_term(term) -> str:
+    """N-Triples form of an rdflib term (the key terms are stored under)."""
+    if isinstance(term, URIRef):
+        return f"<{term}>"
+    if isinstance(term, BNode):
+        return f"_:{term}"
+    text = str(term)
+    for char, escaped in _ESCAPES.items():
+        text = text.replace(char, escaped)
+    if term.datatype:
+        return f'"{text}"^^<{term.datatype}>'
+    return f'"{text}"@{term.language}' if term.language else f'"{text}"'
+
+
+def read_statements(path: Path, batch_bytes: int = LOAD_BLOCK) -> Iterable[pa.Table]:
+    """
+    Read a graph file as batches of (s, p, o) N-Triples term strings.
+
+    Files written by rdf_stream.TripleWriter (.nt, or .ttl with only a prefix header) are streamed as
+    lines and split with pyarrow compute kernels, without parsing the terms; any other RDF file is
+    parsed with rdflib.
+    """
+    options = dict(
+        read_options=pcsv.ReadOptions(column_names=['line'], block_size=batch_bytes),
+        parse_options=pcsv.ParseOptions(delimiter='\x1f', quote_char=False, escape_char=False),
+        convert_options=pcsv.ConvertOptions(column_types={'line': pa.string()}, strings_can_be_null=False),
+    )
+    batches = []
+    for record_batch in pcsv.open_csv(path, **options):
+        lines = record_batch.column(0)
+        lines = pc.filter(lines, pc.invert(pc.starts_with(lines, '@prefix')))
+        if not pc.all(pc.and_(pc.ends_with(lines, ' .'), pc.match_substring_regex(lines, _STATEMENT))).as_py():
+            batches = None
+            break
+        parts = pc.split_pattern(pc.utf8_slice_codeunits(lines, 0, -2), ' ', max_splits=2).flatten()
+        batches.append(pa.table({name: parts.take(np.arange(i, len(parts), 3)) for i, name in enumerate('spo')}))
+        if len(batches) > 1:
+            yield batches.pop(0)
+    if batches is not None:
+        yield from batches
+        return
+
+    # Not line-based N-Triples: fall back to a full parse
+    rows = [(nt_term(s), nt_term(p), nt_term(o)) for s, p, o in Graph().parse(path)]
+    yield pa.table({name: [row[i] for row in rows] for i, name in enumerate('spo')})
+
+
+# Classes
+class IndexedStore(Store):
+    """
+    rdflib Store over a dictionary encoded SQLite triple table with SPO/POS/OSP indexes.
+
+    Usage:
+        store = IndexedStore(STORE_FILE)
+        store.load(RDF_DIR.glob('*.ttl'))
+        graph = Graph(store=store)
+        graph.query(open(query_file).read())
+    """
+    context_aware = False
+    formula_aware = False
+    transaction_aware = False
+
+    def __init__(self, path: Path = STORE_FILE):
+        super().__init__()
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(self.path)
+        self.conn.executescript("""
+            PRAGMA journal_mode = WAL;
+            CREATE TABLE IF NOT EXISTS terms (id INTEGER PRIMARY KEY, term TEXT UNIQUE NOT NULL);
+            CREATE TABLE IF NOT EXISTS triples (
+                s INTEGER NOT NULL, p INTEGER NOT NULL, o INTEGER NOT NULL, PRIMARY KEY (s, p, o)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS prefixes (prefix TEXT PRIMARY KEY, namespace TEXT NOT NULL);
+        """)
+        self._create_indexes()
+        self._ids: Dict[str, Optional[int]] = {}
+        self._terms: Dict[int, object] = {}
+
+    def _create_indexes(self):
+        # The table itself is clustered on SPO (its primary key, which also keeps duplicates out)
+        for name in ('pos', 'osp'):
+            self.conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON triples {INDEXES[name]}")
+        self.conn.commit()
+
+    def close(self, commit_pending_transaction=False):
+        self.conn.close()
+
+    # Loading
+    def clear(self):
+        """Remove every triple and term."""
+        self.conn.executescript("DELETE FROM triples; DELETE FROM terms;")
+        self._ids.clear()
+        self._terms.clear()
+
+    def load(self, paths: Iterable[Path], batch_bytes: int = LOAD_BLOCK) -> int:
+        """
+        Bulk load graph files. The secondary indexes are dropped during the load and rebuilt once at the end.
+
+        Returns:
+            int: Triples in the store afterwards
+        """
+        start = time.perf_counter()
+        self.conn.executescript("DROP INDEX IF EXISTS pos; DROP INDEX IF EXISTS osp; PRAGMA synchronous = OFF;")
+        ids = dict(self.conn.execute("SELECT term, id FROM terms"))
+        next_id = max(ids.values(), default=0) + 1
+
+        for path in paths:
+            for statements in read_statements(path, batch_bytes):
+                encoded = pa.concat_arrays([statements[c].combine_chunks() for c in 'spo']).dictionary_encode()
+                codes = encoded.indices.to_numpy()
+                uniques = encoded.dictionary.to_pylist()
+                new = [term for term in uniques if term not in ids]
+                self.conn.executemany("INSERT INTO terms VALUES (?, ?)", enumerate(new, next_id))
+                ids.update(zip(new, range(next_id, next_id + len(new))))
+                next_id += len(new)
+
+                term_ids = np.array([ids[term] for term in uniques], dtype='int64')[codes].reshape(3, -1).T
+                term_ids = term_ids[np.lexsort(term_ids.T[::-1])]  # Insert in primary key order
+                self.conn.executemany("INSERT OR IGNORE INTO triples VALUES (?, ?, ?)", term_ids.tolist())
+            print(f"Loaded {path.name}")
+
+        self._create_indexes()
+        self.conn.execute("ANALYZE")
+        self.conn.commit()
+        self.conn.execute("PRAGMA synchronous = FULL")
+        self._ids.clear()
+        total = len(self)
+        print(f"Store {self.path.name}: {total} triples, {len(ids)} terms ({time.perf_counter() - start:.1f}s)")
+        return total
+
+    # Term dictionary
+    def _id(self, term) -> Optional[int]:
+        key = nt_term(term)
+        if key not in self._ids:
+            row = self.conn.execute("SELECT id FROM terms WHERE term = ?", (key,)).fetchone()
+            self._ids[key] = row[0] if row else None
+        return self._ids[key]
+
+    def _term(self, term_id: int):
+        if term_id not in self._terms:
+            text = self.conn.execute("SELECT term FROM terms WHERE id = ?", (term_id,)).fetchone()[0]
+            self._terms[term_id] = from_n3(text)
+        return self._terms[term_id]
+
+    # rdflib Store interface
+    def triples(self, triple_pattern, context=None):
+        where, params = [], []
+        for column, term in zip('spo', triple_pattern):
+            if term is None:
+                continue
+            if not isinstance(term, _PATTERN_TERMS):
+                # Variables and other non-term pattern values act as wildcards
+                continue
+            term_id = self._id(term)
+            if term_id is None:
+                return
+            where.append(f"{column} = ?")
+            params.append(term_id)
+
+        sql = "SELECT s, p, o FROM triples" + (" WHERE " + " AND ".join(where) if where else "")
+        for s, p, o in self.conn.execute(sql, params):
+            yield (self._term(s), self._term(p), self._term(o)), iter(())
+
+    def __len__(self, context=None):
+        return self.conn.execute("SELECT COUNT(*) FROM triples").fetchone()[0]
+
+    def add(self, triple, context=None, quoted=False):
+        terms = [nt_term(term) for term in triple]
+        self.conn.executemany("INSERT OR IGNORE INTO terms (term) VALUES (?)", [(t,) for t in terms])
+        ids = [self.conn.execute("SELECT id FROM terms WHERE term = ?", (t,)).fetchone()[0] for t in terms]
+        self.conn.execute("INSERT OR IGNORE INTO triples VALUES (?, ?, ?)", ids)
+        self._ids.clear()
+
+    def remove(self, triple_pattern, context=None):
+        for (s, p, o), _ in list(self.triples(triple_pattern)):
+            self.conn.execute("DELETE FROM triples WHERE s = ? AND p = ? AND o = ?", (self._id(s), self._id(p), self._id(o)))
+
+    def bind(self, prefix, namespace, override=True):
+        if override or not self.namespace(prefix):
+            self.conn.execute("INSERT OR REPLACE INTO prefixes VALUES (?, ?)", (prefix, str(namespace)))
+
+    def namespace(self, prefix):
+        row = self.conn.execute("SELECT namespace FROM prefixes WHERE prefix = ?", (prefix,)).fetchone()
+        return URIRef(row[0]) if row else None
+
+    def prefix(self, namespace):
+        row = self.conn.execute("SELECT prefix FROM prefixes WHERE namespace = ?", (str(namespace),)).fetchone()
+        return row[0] if row else None
+
+    def namespaces(self):
+        for prefix, namespace in self.conn.execute("SELECT prefix, namespace FROM prefixes").fetchall():
+            yield prefix, URIRef(namespace)
+
+
+# Functions
+def open_store(sources: List[Path], path: Path = STORE_FILE) -> Graph:
+    """
+    Open the store as an rdflib Graph, (re)loading it when any source file is newer than the store.
+
+    Args:
+        sources (List[Path]): Graph files the store is built from
+        path (Path): SQLite store file
+
+    Returns:
+        Graph: Graph backed by the IndexedStore
+    """
+    sources = [Path(p) for p in sources]
+    stale = not path.exists() or any(p.stat().st_mtime > path.stat().st_mtime for p in sources)
+    store = IndexedStore(path)
+    if stale or len(store) == 0:
+        print(f"Building {path.name} from {len(sources)} graph files...")
+        store.clear()
+        store.load(sources)
+    return Graph(store=store)
+
+
+def time_query(graph: Graph, query: str, repeat: int = 5) -> Dict:
+    """
+    Run a query repeat times.
+
+    Returns:
+        Dict: 'results' (row count), 'first_ms' (cold run), 'median_ms' and 'min_ms' over every run
+    """
+    timings, results = [], 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        results = len(list(graph.query(query)))
+        timings.append((time.perf_counter() - start) * 1000)
+    return {
+        'results': results,
+        'first_ms': round(timings[0], 2),
+        'median_ms': round(median(timings), 2),
+        'min_ms': round(min(timings), 2),
+    }
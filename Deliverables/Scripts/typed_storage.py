@@ -0,0 +1,186 @@
+# Typed columnar (Parquet) storage for the dispensary and pharmacy records.
+# The enriched CSVs keep numbers as "$99,622.00 " / "58,425" strings and coordinates as "(lat, lon)" text,
+# so every consumer re-parses them. to_typed() converts a roster once to the schema below; Parquet keeps
+# those types, and read_records() loads only the requested columns. load_records() reads a CSV roster
+# through its Parquet copy (rebuilt when the CSV is newer) and save_records() writes both.
+
+# Imports
+from pathlib import Path
+from typing import Dict, Optional, Sequence
+
+import pandas as pd
+
+from acs_loader import clean_numeric
+from checkpoint import atomic_write_csv
+from geo_utils import DATA_DIR, parse_geo_column
+
+# Variables
+PARQUET_DIR = DATA_DIR / 'Parquet'
+
+## Column name -> storage type, covering the dispensary roster, the official pharmacy roster and the gPlaces pharmacies
+SCHEMA = {
+    # Coordinates ("Geo" is split into these two)
+    'latitude': 'float64',
+    'longitude': 'float64',
+    # Geographic keys (Int64 like the geo_keys keys they are joined on)
+    'ZCTA5': 'Int64',
+    'Fips': 'Int64',
+    'Census_Tract_Code': 'Int64',
+    'Block_Group_FIPS': 'Int64',
+    'Block_FIPS': 'Int64',
+    # Votes and ACS values
+    'votes_dem': 'Int32',
+    'votes_rep': 'Int32',
+    'pct_dem_lead': 'float64',
+    'TotalPop': 'Int32',
+    'PopInsured': 'Int32',
+    'Median_Income_Dollars': 'float64',
+    'Mean_Income_Dollars': 'float64',
+    'HH Income (median)': 'float64',
+    'HH Income (mean)': 'float64',
+    'Life Exp': 'float64',
+    'Life_Expectancy': 'float64',
+    'Life_Exp_Source': 'category',
+    # License and place attributes ('LicenseNumber' stays a string: Board license numbers have leading zeros)
+    'LicenseCategoryNumber': 'Int8',
+    'Type': 'category',
+    'LicenseType': 'category',
+    'LicenseTypeSubCategory': 'category',
+    'LicenseStatus': 'category',
+    'LicenseSubStatus': 'category',
+    'Operational_Status': 'category',
+    'Public Address - County': 'category',
+    'LocationCounty': 'category',
+    'LocationState': 'category',
+    'LocationCity': 'category',
+    'Public Address City': 'category',
+    # Dates
+    'Issue Date': 'date',
+    'Expiration Date': 'date',
+    'Effective Date': 'date',
+}
+
+# Functions
+def to_typed(df: pd.DataFrame, geo_column: str = 'Geo', schema: Optional[Dict[str, str]] = None) -> pd.DataFrame:
+    """
+    Convert a roster read from CSV to the typed schema.
+
+    Column names are stripped of stray whitespace, 'Geo' is replaced by float 'latitude' and
+    'longitude' columns, known columns get their SCHEMA type and everything else becomes a
+    string column.
+
+    Args:
+        df (pd.DataFrame): Roster as read from CSV
+        geo_column (str): Name of the "(lat, lon)" column
+        schema (Dict[str, str]): Column types to use instead of SCHEMA; 'date' parses m/d/Y and
+            'date:<format>' any other strftime format
+
+    Returns:
+        pd.DataFrame: Typed copy of df
+    """
+    out = df.rename(columns=lambda c: c.strip())
+
+    if geo_column in out.columns and 'latitude' in out.columns:
+        out = out.drop(columns=geo_column)  # Already split (pipeline output)
+    elif geo_column in out.columns:
+        coords = parse_geo_column(out[geo_column])
+        position = out.columns.get_loc(geo_column)
+        out = out.drop(columns=geo_column)
+        out.insert(position, 'latitude', coords['latitude'])
+        out.insert(position + 1, 'longitude', coords['longitude'])
+
+    schema = SCHEMA if schema is None else schema
+    for col in out.columns:
+        kind = schema.get(col)
+        if kind is None:
+            out[col] = out[col].astype('string')
+        elif kind == 'category':
+            if isinstance(out[col].dtype, pd.CategoricalDtype):
+                continue
+            out[col] = out[col].astype('string').str.strip().astype('category')
+        elif kind.startswith('date'):
+            date_format = kind.partition(':')[2] or '%m/%d/%Y'
+            out[col] = pd.to_datetime(out[col], format=date_format, errors='coerce')
+        else:
+            values = out[col] if pd.api.types.is_numeric_dtype(out[col]) else clean_numeric(out[col])
+            if kind.startswith('Int'):
+                values = values.round()
+            out[col] = values.astype(kind)
+    return out
+
+
+def to_csv_layout(df: pd.DataFrame) -> pd.DataFrame:
+    """Rebuild the '(lat, lon)' Geo column and m/d/Y dates for scripts that still read the CSV layout."""
+    out = df.copy()
+    if 'latitude' in out.columns and 'longitude' in out.columns:
+        if 'Geo' in out.columns:  # Pipeline output carries both
+            out = out.drop(columns=['latitude', 'longitude'])
+        else:
+            geo = '(' + out['latitude'].astype('string') + ', ' + out['longitude'].astype('string') + ')'
+            position = out.columns.get_loc('latitude')
+            out = out.drop(columns=['latitude', 'longitude'])
+            out.insert(position, 'Geo', geo)
+    for col in out.columns:
+        if SCHEMA.get(col) == 'date' and pd.api.types.is_datetime64_any_dtype(out[col]):
+            out[col] = out[col].dt.strftime('%m/%d/%Y')
+    return out
+
+
+def write_records(df: pd.DataFrame, path: Path):
+    """
+    Persist a roster to Parquet with the typed schema.
+
+    Args:
+        df (pd.DataFrame): Roster (raw CSV layout or already typed)
+        path (Path): Destination .parquet file
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    typed = to_typed(df)
+    typed.to_parquet(path, index=False, compression='zstd')
+    print(f"Saved {len(typed)} typed rows to {path}")
+
+
+def read_records(path: Path, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """
+    Load a typed roster, reading only the requested columns.
+
+    Args:
+        path (Path): Parquet file written by write_records
+        columns (Sequence[str]): Columns to load (default: all)
+
+    Returns:
+        pd.DataFrame: Typed roster
+    """
+    return pd.read_parquet(path, columns=list(columns) if columns else None)
+
+
+def parquet_path(csv_path: Path) -> Path:
+    """Typed Parquet copy of a CSV roster (PARQUET_DIR/<csv stem>.parquet)."""
+    return PARQUET_DIR / f"{Path(csv_path).stem}.parquet"
+
+
+def load_records(csv_path: Path, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """
+    Load a CSV roster through its typed Parquet copy, reading only the requested columns.
+
+    The copy is (re)built from the CSV when it is missing or older than the CSV, so only the first
+    load after the CSV changes parses it.
+
+    Args:
+        csv_path (Path): CSV roster
+        columns (Sequence[str]): Typed columns to load ('latitude'/'longitude' instead of 'Geo'; default: all)
+
+    Returns:
+        pd.DataFrame: Typed roster
+    """
+    csv_path, path = Path(csv_path), parquet_path(csv_path)
+    if not path.exists() or (csv_path.exists() and csv_path.stat().st_mtime > path.stat().st_mtime):
+        write_records(pd.read_csv(csv_path, dtype=str, encoding='utf-8-sig'), path)
+    return read_records(path, columns)
+
+
+def save_records(df: pd.DataFrame, csv_path: Path):
+    """Write a roster as CSV (see to_csv_layout) and as its typed Parquet copy, for the next load_records."""
+    atomic_write_csv(to_csv_layout(df), csv_path)
+    write_records(df, parquet_path(csv_path))
@@ -0,0 +1,77 @@
+# Offline ZCTA resolver: assigns ZCTA5 codes from the 2020 Census ZCTA polygons without any API calls.
+# Polygons: https://www2.census.gov/geo/tiger/TIGER2020/ZCTA520/tl_2020_us_zcta520.zip (save under Data/Geo)
+
+# Imports
+from pathlib import Path
+from typing import Optional
+
+import pandas as pd
+
+from geo_utils import GEO_DIR, OHIO_BBOX, PolygonIndex, coordinates, read_polygons
+
+# Variables
+ZCTA_FILE = GEO_DIR / 'tl_2020_us_zcta520.zip'
+ZCTA_KEY = 'ZCTA5CE20'
+
+_zcta_indexes = {}  # (path, bbox) -> index, loaded once per process
+
+# Functions
+def load_zcta_index(path: Path = ZCTA_FILE, bbox=OHIO_BBOX) -> PolygonIndex:
+    """
+    Load the ZCTA polygons and build the spatial index.
+
+    Args:
+        path (Path): Path to the TIGER ZCTA shapefile (zipped is fine)
+        bbox (tuple): Optional (west, south, east, north) read filter; None loads the whole country
+
+    Returns:
+        PolygonIndex: Index keyed by 5-digit ZCTA code (shared by later calls with the same path and bbox)
+    """
+    key = (Path(path).resolve(), tuple(bbox) if bbox is not None else None)
+    if key not in _zcta_indexes:
+        print(f"Loading ZCTA polygons from {path}...")
+        gdf = read_polygons(path, [ZCTA_KEY], bbox=bbox)
+        _zcta_indexes[key] = PolygonIndex(gdf, ZCTA_KEY)
+        print(f"Indexed {len(_zcta_indexes[key])} ZCTAs")
+    return _zcta_indexes[key]
+
+
+def resolve_zcta(latitude, longitude, index: Optional[PolygonIndex] = None) -> pd.Series:
+    """
+    Resolve ZCTA5 codes for arrays of coordinates in one vectorized call.
+
+    Args:
+        latitude (array-like): Point latitudes
+        longitude (array-like): Point longitudes
+        index (PolygonIndex): Prebuilt ZCTA index (defaults to the shared one)
+
+    Returns:
+        pd.Series: 5-digit ZCTA5 strings, None where the point falls outside every ZCTA
+    """
+    if index is None:
+        index = load_zcta_index()
+    return index.lookup(latitude, longitude).rename('ZCTA5')
+
+
+def add_zcta_column(df: pd.DataFrame, geo_column: str = 'Geo', index: Optional[PolygonIndex] = None) -> pd.DataFrame:
+    """
+    Add a 'ZCTA5' column to a DataFrame of coordinates ('latitude'/'longitude' or '(lat, lon)' strings).
+
+    Drop-in replacement for the per-row Census geocoder loop in coords-to-zcta.py.
+
+    Args:
+        df (pd.DataFrame): Input rows with a coordinate column
+        geo_column (str): Name of the coordinate string column (used when there are no float columns)
+        index (PolygonIndex): Prebuilt ZCTA index (defaults to the shared one)
+
+    Returns:
+        pd.DataFrame: Copy of df with the 'ZCTA5' column filled in
+    """
+    coords = coordinates(df, geo_column)
+    out = df.copy()
+    out['ZCTA5'] = resolve_zcta(coords['latitude'], coords['longitude'], index).to_numpy()
+
+    missing = out['ZCTA5'].isna().sum()
+    if missing:
+        print(f"ZCTA not found for {missing} of {len(out)} rows")
+    return out